@@ -0,0 +1,4 @@
+"""Offline benchmarks and parity checks run against recorded fixtures.
+
+Run them from the project root, e.g. ``python -m benchmarks.parser_parity``.
+"""
@@ -0,0 +1,85 @@
+"""
+Benchmark near-duplicate clustering at growing input sizes.
+
+Generates synthetic Romanian headlines (about 10% of them reworded or
+re-spelled copies, including cedilla ş/ţ variants), clusters them with
+``cluster_near_duplicates`` and reports the time and the number of exactly
+compared candidate pairs next to the all-pairs count. The fitted growth
+exponent must stay well below 2 (quadratic).
+
+Usage:
+    python -m benchmarks.dedupe_scaling
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import sys
+import time
+
+from functions.dedupe import MinHashLSH, cluster_near_duplicates, normalize_title, shingles
+
+SIZES = (300, 1000, 3000, 10000)
+MAX_EXPONENT = 1.5
+
+WORDS = (
+    "guvernul parlamentul președintele ministerul primăria spitalul școala "
+    "românia bucurești moldova ucraina nato uniunea europeană bugetul pensiile "
+    "salariile prețurile energia benzina inflația dobânda protest grevă "
+    "cutremur inundații incendiu accident poliția procurorii dna ancheta "
+    "aprobat anunțat respins amânat crește scade lansează investește "
+    "pentru despre după înainte în la pe cu din noul noua mari mici "
+    "cluj timișoara iași constanța brașov craiova galați oradea sibiu arad "
+    "tribunalul curtea senatul camera deputaților consiliul județean agenția "
+    "fermierii profesorii medicii pacienții elevii studenții pensionarii "
+    "autostrada aeroportul portul trenul metroul tarom cfr hidroelectrica "
+    "romgaz petrom bnr anaf ing bcr bursa leul euro dolarul aurul grâul "
+    "seceta ninsori caniculă viscol furtună alertă cod galben portocaliu roșu"
+).split()
+
+
+def make_titles(count: int, seed: int = 7) -> list[str]:
+    """Random headlines with roughly 10% near-duplicate variants."""
+    generator = random.Random(seed)
+    titles: list[str] = []
+    for _ in range(count):
+        if titles and generator.random() < 0.1:
+            words = generator.choice(titles).split()
+            words[generator.randrange(len(words))] = generator.choice(WORDS)
+            title = " ".join(words).replace("ș", "ş").replace("ț", "ţ")
+        else:
+            title = " ".join(generator.choice(WORDS) for _ in range(generator.randint(8, 12)))
+        titles.append(title.capitalize())
+    return titles
+
+
+def main() -> int:
+    lsh = MinHashLSH()
+    timings: list[tuple[int, float]] = []
+    print(f"{'items':>7} {'time (ms)':>10} {'candidates':>11} {'all pairs':>12} {'clusters':>9}")
+
+    for size in SIZES:
+        titles = make_titles(size)
+        start = time.perf_counter()
+        clusters = cluster_near_duplicates(titles, lsh=lsh)
+        elapsed = time.perf_counter() - start
+
+        signatures = [lsh.signature(shingles(normalize_title(t), 5)) for t in titles]
+        candidates = len(lsh.candidate_pairs(signatures))
+        merged = sum(1 for members in clusters if len(members) > 1)
+        print(
+            f"{size:>7} {elapsed * 1000:>10.1f} {candidates:>11} "
+            f"{size * (size - 1) // 2:>12} {merged:>9}"
+        )
+        timings.append((size, elapsed))
+
+    (small_n, small_t), (large_n, large_t) = timings[0], timings[-1]
+    exponent = math.log(large_t / small_t) / math.log(large_n / small_n)
+    verdict = "OK" if exponent < MAX_EXPONENT else "REGRESSION"
+    print(f"\nFitted growth exponent: {exponent:.2f} (quadratic = 2.00)  {verdict}")
+    return 0 if exponent < MAX_EXPONENT else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark per-recipient email preparation.
+
+Renders the recorded model answer in ``fixtures/ai_response.txt`` for a list
+of recipients two ways: building, serializing and base64-encoding a full
+``MIMEMultipart`` per recipient (``build_email_message``), and rendering once
+with ``RenderedEmail`` and only stamping the headers per recipient. Checks
+that both produce the same decoded parts and headers, then reports CPU time
+per recipient.
+
+Usage:
+    python -m benchmarks.email_render
+"""
+
+from __future__ import annotations
+
+import base64
+import email
+import sys
+import time
+from email import policy
+from pathlib import Path
+
+from functions.ai_client import clean_ai_html_response
+from functions.email_service import RenderedEmail, build_email_message
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ai_response.txt"
+RECIPIENTS = [f"reader{i}@example.com" for i in range(500)]
+SUBJECT = "Știri de astăzi - Analiză AI"
+FROM_HEADER = "AI News <news@example.com>"
+
+
+def per_message_baseline(body: str) -> list[str]:
+    return [
+        base64.urlsafe_b64encode(
+            build_email_message(recipient, SUBJECT, body, FROM_HEADER).as_bytes()
+        ).decode("utf-8")
+        for recipient in RECIPIENTS
+    ]
+
+
+def render_once(body: str) -> list[str]:
+    rendered = RenderedEmail(SUBJECT, body, FROM_HEADER)
+    return [rendered.encode_for(recipient) for recipient in RECIPIENTS]
+
+
+def summarize(raw: str) -> tuple:
+    """Headers and decoded parts that must match between both paths."""
+    message = email.message_from_bytes(base64.urlsafe_b64decode(raw), policy=policy.default)
+    parts = tuple(
+        (part.get_content_type(), part.get_content()) for part in message.iter_parts()
+    )
+    return str(message["to"]), str(message["from"]), str(message["subject"]), parts
+
+
+def timed(function, body: str) -> tuple[float, list[str]]:
+    start = time.process_time()
+    result = function(body)
+    return time.process_time() - start, result
+
+
+def main() -> int:
+    body = clean_ai_html_response(FIXTURE.read_text(encoding="utf-8"))
+
+    baseline_time, baseline = timed(per_message_baseline, body)
+    rendered_time, rendered = timed(render_once, body)
+
+    for old, new in zip(baseline, rendered):
+        if summarize(old) != summarize(new):
+            print("MISMATCH between per-message and render-once output")
+            return 1
+    message = email.message_from_bytes(base64.urlsafe_b64decode(rendered[0]))
+    if not message["message-id"]:
+        print("MISMATCH: rendered message has no Message-ID")
+        return 1
+
+    count = len(RECIPIENTS)
+    print(f"{'path':<22} {'total (ms)':>11} {'per recipient (µs)':>19}")
+    for name, elapsed in (
+        ("build per recipient", baseline_time),
+        ("render once + stamp", rendered_time),
+    ):
+        print(f"{name:<22} {elapsed * 1000:>11.1f} {elapsed / count * 1e6:>19.1f}")
+    print(f"\nSpeedup: {baseline_time / max(rendered_time, 1e-9):.0f}x, outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark bulk sending against a local fake of the Gmail API.
+
+Starts an in-process HTTP server that answers ``users.messages.send`` after a
+simulated latency and rejects a small share of calls with 429 (Retry-After: 0),
+then sends one digest to every synthetic recipient with ``GmailSender.send_bulk``,
+first on one worker and then on the configured pool. The rate limiter is
+raised far above Gmail's real quota so the numbers show the client overhead.
+Every recipient must end up delivered exactly once.
+
+Usage:
+    python -m benchmarks.gmail_bulk_send [recipients]
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import settings
+from functions.email_service import GMAIL_AVAILABLE, GmailSender
+
+RECIPIENTS = 1000
+LATENCY = 0.01
+RATE_LIMITED_SHARE = 0.02
+SEND_PATH = "/gmail/v1/users/me/messages/send"
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    """Minimal ``users.messages.send`` endpoint."""
+
+    sent: list[str] = []
+    lock = threading.Lock()
+    rng = random.Random(3)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(LATENCY)
+        if not self.path.startswith(SEND_PATH):
+            self._reply(404, {"error": {"code": 404, "message": "not found"}})
+            return
+        with self.lock:
+            limited = self.rng.random() < RATE_LIMITED_SHARE
+        if limited:
+            self._reply(
+                429,
+                {"error": {"code": 429, "message": "rateLimitExceeded"}},
+                {"Retry-After": "0"},
+            )
+            return
+        message_id = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.sent.append(message_id)
+        self._reply(200, {"id": message_id, "labelIds": ["SENT"]})
+
+    def _reply(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass
+
+
+def start_fake_gmail() -> tuple[ThreadingHTTPServer, str]:
+    """Serve ``FakeGmailHandler`` on a free port; returns the server and its URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGmailHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run(sender: GmailSender, recipients: list[str], workers: int) -> tuple[float, int]:
+    FakeGmailHandler.sent.clear()
+    report = sender.send_bulk(
+        recipients, "Benchmark", "<p>Știri de astăzi</p>", max_workers=workers
+    )
+    if report.sent != len(recipients) or len(FakeGmailHandler.sent) != len(recipients):
+        raise SystemExit(
+            f"delivery mismatch: {report.sent} reported, "
+            f"{len(FakeGmailHandler.sent)} received, {len(recipients)} expected"
+        )
+    return report.messages_per_second, sum(r.attempts for r in report.results)
+
+
+def main() -> int:
+    if not GMAIL_AVAILABLE:
+        print("Google API libraries not installed; skipping.")
+        return 0
+    from google.oauth2.credentials import Credentials
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else RECIPIENTS
+    server, endpoint = start_fake_gmail()
+
+    settings.gmail.send_rate_per_second = 10_000
+    settings.gmail.send_burst = 100
+    settings.gmail.send_backoff_base = 0.0
+    recipients = [f"reader{i}@example.com" for i in range(count)]
+
+    print(f"{'workers':>7} {'msg/s':>8} {'attempts':>9}")
+    for workers in (1, settings.gmail.send_workers, 16):
+        sender = GmailSender(
+            from_email="news@example.com",
+            from_name="AI News",
+            credentials=Credentials(token="fake"),
+            api_endpoint=endpoint,
+        )
+        rate, attempts = run(sender, recipients, workers)
+        print(f"{workers:>7} {rate:>8.1f} {attempts:>9}")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Compare the single-pass HTML sanitizer with the previous multi-pass chain.
+
+Builds large model outputs by repeating the list items of
+``fixtures/ai_response.txt``. Each output is prepared for email two ways:
+the previous chain (``clean_ai_html_response`` regexes plus ``unescape``,
+then ``prepare_html_for_email`` with its BeautifulSoup fallback and the
+DOCTYPE/html/head strips, kept here as a reference copy) and
+``sanitize_html``. The sanitizer is also run on 20-character streamed
+chunks, and both are timed on an output cut off before ``</body>``. Outputs
+must agree apart from two deliberate fixes: the disclaimer paragraph is now
+actually removed, and entities in an unescaped document are left alone.
+The ``EDGE_CASES`` documents must also give the same result streamed and
+whole, and the expected body.
+
+Usage:
+    python -m benchmarks.html_sanitizer
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from html import unescape
+from pathlib import Path
+
+from functions.html_parser import parse_html
+from functions.html_sanitizer import HtmlSanitizer, sanitize_html
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ai_response.txt"
+SIZES = (1, 20, 100)
+CHUNK = 20
+# (model output, expected email body) pairs for malformed documents.
+EDGE_CASES = (
+    # No </head>: the head ends at <body>.
+    (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><body><p>x</p></body></html>',
+        "<p>x</p>",
+    ),
+    # No </head> and no <body>: the head ends at the first body element.
+    (
+        "<html><head><title>Știri</title><h1>Azi</h1><p>x</p></html>",
+        "<h1>Azi</h1><p>x</p>",
+    ),
+)
+DISCLAIMER = re.compile(r"<p[^>]*>[^<]*Site-ul stiripesurse\.ro[^<]*</p>", re.IGNORECASE)
+
+
+def legacy_clean(ai_response: str) -> str:
+    """``clean_ai_html_response`` before the sanitizer (reference copy)."""
+    content = ai_response.strip()
+    if "```" in content:
+        match = re.search(r"```(?:html|HTML)?\s*\n?(.*?)```", content, re.DOTALL)
+        if match:
+            content = match.group(1).strip()
+    if "&lt;" in content or "&gt;" in content or "&amp;" in content:
+        content = unescape(content)
+    doctype_match = re.search(r"<!DOCTYPE[^>]*>", content, re.IGNORECASE)
+    html_match = re.search(r"<html[^>]*>", content, re.IGNORECASE)
+    if doctype_match:
+        content = content[doctype_match.start() :]
+    elif html_match:
+        content = content[html_match.start() :]
+    html_end_match = re.search(r"</html>", content, re.IGNORECASE)
+    if html_end_match:
+        content = content[: html_end_match.end()]
+    cleaned = content.strip()
+    if "Site-ul stiripesurse.ro este cunoscut pentru o gamă variată de știri" in cleaned:
+        cleaned = re.sub(
+            r"<p[^>]*>[^<]*Site-ul stiripesurse\\.ro[^<]*</p>", "", cleaned, flags=re.IGNORECASE
+        )
+    return cleaned
+
+
+def legacy_email_body(html_content: str) -> str:
+    """``prepare_html_for_email`` plus the strips in ``build_email_message`` (reference copy)."""
+    html_body = None
+    body_match = re.search(r"<body[^>]*>(.*?)</body>", html_content, re.DOTALL | re.IGNORECASE)
+    if body_match:
+        body_content = body_match.group(1).strip()
+        if body_content and "<!DOCTYPE" not in body_content and not body_content.startswith("<html"):
+            html_body = body_content
+    if html_body is None:
+        soup = parse_html(html_content)
+        body_tag = soup.find("body") if soup.find("html") else None
+        html_body = body_tag.decode_contents().strip() if body_tag else str(soup).strip()
+    if "<!DOCTYPE" in html_body or html_body.strip().startswith("<html"):
+        html_body = re.sub(r"<!DOCTYPE[^>]*>", "", html_body, flags=re.IGNORECASE)
+        html_body = re.sub(r"<html[^>]*>", "", html_body, flags=re.IGNORECASE)
+        html_body = re.sub(r"</html>", "", html_body, flags=re.IGNORECASE)
+        html_body = re.sub(r"<head[^>]*>.*?</head>", "", html_body, flags=re.DOTALL | re.IGNORECASE)
+        html_body = html_body.strip()
+    return html_body
+
+
+def make_output(repeat: int) -> str:
+    """The fixture answer with its first list item repeated ``repeat`` times."""
+    raw = FIXTURE.read_text(encoding="utf-8")
+    start = raw.index("<li style=")
+    end = raw.index("</li>", start) + len("</li>")
+    return raw[:start] + raw[start:end] * repeat + raw[end:]
+
+
+def streamed(raw: str, chunk: int = CHUNK) -> HtmlSanitizer:
+    sanitizer = HtmlSanitizer()
+    for offset in range(0, len(raw), chunk):
+        sanitizer.feed(raw[offset : offset + chunk])
+        if sanitizer.done:
+            break
+    sanitizer.finish()
+    return sanitizer
+
+
+def best_of(function, argument, runs: int = 5) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> int:
+    failures = 0
+    print(f"{'size (KB)':>9} {'legacy (ms)':>12} {'single pass':>12} {'streamed':>9} {'speedup':>8}")
+    for repeat in SIZES:
+        raw = make_output(repeat)
+
+        def legacy(text: str) -> tuple[str, str]:
+            document = legacy_clean(text)
+            return document, legacy_email_body(document)
+
+        legacy_time, (old_document, old_body) = best_of(legacy, raw)
+        new_time, result = best_of(sanitize_html, raw)
+        stream_time, stream_result = best_of(streamed, raw)
+
+        expected_document = DISCLAIMER.sub("", old_document)
+        expected_body = DISCLAIMER.sub("", old_body).strip()
+        if (
+            unescape(result.document) != expected_document
+            or unescape(result.body) != expected_body
+            or stream_result.document != result.document
+            or stream_result.body != result.body
+        ):
+            print(f"MISMATCH at {len(raw) // 1024} KB")
+            failures += 1
+
+        print(
+            f"{len(raw) / 1024:>9.0f} {legacy_time * 1000:>12.2f} {new_time * 1000:>12.2f} "
+            f"{stream_time * 1000:>9.2f} {legacy_time / new_time:>7.1f}x"
+        )
+
+    for raw, expected_body in EDGE_CASES:
+        whole = sanitize_html(raw)
+        for chunk in (1, 7, CHUNK):
+            result = streamed(raw, chunk)
+            if (result.document, result.body) != (whole.document, whole.body):
+                print(f"MISMATCH streaming {raw[:40]!r}... in {chunk}-character chunks")
+                failures += 1
+        if whole.body != expected_body:
+            print(f"MISMATCH {raw[:40]!r}...: body {whole.body!r}")
+            failures += 1
+
+    # A generation cut off before </body> (e.g. by stream_max_seconds) makes
+    # the old chain fall back to a full BeautifulSoup parse.
+    raw = make_output(SIZES[-1])
+    truncated = raw[: raw.index("</body>")]
+    legacy_time, _ = best_of(lambda text: legacy_email_body(legacy_clean(text)), truncated)
+    new_time, _ = best_of(sanitize_html, truncated)
+    print(
+        f"{len(truncated) / 1024:>9.0f} {legacy_time * 1000:>12.2f} {new_time * 1000:>12.2f} "
+        f"{'':>9} {legacy_time / new_time:>7.1f}x  (truncated output)"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Check that every HTML parser backend extracts identical data.
+
+Runs the stiripesurse.ro and Biziday extractors on the saved fixture pages
+with each available backend, checks the email HTML preparation, compares
+the results with ``html.parser`` and prints the parse time per backend.
+The same comparison runs as a test in ``tests/test_parser_parity.py``.
+
+Usage:
+    python -m benchmarks.parser_parity
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+from functions.ai_client import clean_ai_html_response
+from functions.article import Article
+from functions.email_service import prepare_html_for_email
+from functions.html_parser import FALLBACK_BACKEND, available_backends, parse_html
+from functions.sources import get_source
+
+FIXTURES = Path(__file__).parent / "fixtures"
+BIZIDAY_PAGES = ("biziday_page1.html", "biziday_page2.html")
+
+
+def extract_all(backend: str) -> dict:
+    """Run every parser-dependent extraction step with ``backend``."""
+    stiripesurse = get_source("stiripesurse").extract(
+        parse_html((FIXTURES / "stiripesurse.html").read_bytes(), backend)
+    )
+
+    biziday: list[Article] = []
+    seen_keys: set[tuple[str, str]] = set()
+    for name in BIZIDAY_PAGES:
+        soup = parse_html((FIXTURES / name).read_bytes(), backend)
+        get_source("biziday").extract(soup, biziday, seen_keys)
+
+    ai_html = clean_ai_html_response((FIXTURES / "ai_response.txt").read_text("utf-8"))
+    email_html = prepare_html_for_email(ai_html)
+    return {
+        "stiripesurse": stiripesurse,
+        "biziday": biziday,
+        "email_html": email_html,
+    }
+
+
+def main() -> int:
+    reference = extract_all(FALLBACK_BACKEND)
+    failures = 0
+
+    for backend in available_backends():
+        start = time.perf_counter()
+        result = extract_all(backend)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        mismatched = [key for key in reference if result[key] != reference[key]]
+        status = "OK" if not mismatched else f"MISMATCH in {', '.join(mismatched)}"
+        print(
+            f"{backend:12} {elapsed:8.2f} ms  "
+            f"{len(result['stiripesurse'])} stiripesurse / "
+            f"{len(result['biziday'])} biziday items  {status}"
+        )
+        failures += bool(mismatched)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
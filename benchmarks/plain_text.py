@@ -0,0 +1,101 @@
+"""
+Compare the streaming plain-text renderer with the BeautifulSoup conversion.
+
+Builds email bodies of 100 KB and more by repeating the first analysed
+article of ``fixtures/ai_response.txt`` and renders their text/plain part
+two ways: the previous ``get_text`` conversion (with every available parser backend, kept
+here as a reference copy) and ``html_to_text``. Prints the time and peak
+traced memory of each, and how many article links and list bullets survive
+in the text.
+
+Usage:
+    python -m benchmarks.plain_text
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from functions.html_parser import available_backends, parse_html
+from functions.html_sanitizer import sanitize_html
+from functions.html_text import html_to_text
+
+FIXTURE = Path(__file__).parent / "fixtures" / "ai_response.txt"
+SIZES = (100, 400)
+LINK = re.compile(r'href="(https?://[^"]+)"')
+
+
+def make_body(repeat: int) -> str:
+    """Email body of the fixture answer with its first article repeated ``repeat`` times."""
+    body = sanitize_html(FIXTURE.read_text(encoding="utf-8")).body
+    start = body.index("<li style=")
+    end = body.index("<li style=", start + 1)
+    return body[:start] + body[start:end] * repeat + body[end:]
+
+
+def legacy_plain_text(html_body: str, backend: str) -> str:
+    """``html_to_plain_text`` before the renderer (reference copy)."""
+    soup = parse_html(html_body, backend)
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def measure(function, *args, runs: int = 3) -> tuple[float, int, str]:
+    """Best wall time, peak traced memory (bytes) and result of ``function``."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main() -> int:
+    failures = 0
+    print(
+        f"{'size (KB)':>9}  {'converter':22} {'time (ms)':>10} {'peak (KB)':>10} "
+        f"{'links':>7} {'bullets':>8}"
+    )
+    for repeat in SIZES:
+        html_body = make_body(repeat)
+        links = LINK.findall(html_body)
+        items = html_body.count("<li")
+
+        runs = [
+            (f"get_text ({backend})", legacy_plain_text, backend)
+            for backend in available_backends()
+        ]
+        runs.append(("html_to_text", html_to_text, None))
+
+        timings = {}
+        for name, function, argument in runs:
+            elapsed, peak, text = measure(function, html_body, argument)
+            timings[name] = elapsed
+            kept_links = sum(1 for link in links if link in text)
+            bullets = sum(1 for line in text.splitlines() if line.lstrip().startswith("- "))
+            print(
+                f"{len(html_body) / 1024:>9.0f}  {name:22} {elapsed * 1000:>10.2f} "
+                f"{peak / 1024:>10.0f} {kept_links:>3}/{len(links):<3} {bullets:>4}/{items:<4}"
+            )
+            if function is html_to_text and (kept_links != len(links) or bullets != items):
+                print("  renderer dropped links or bullets")
+                failures += 1
+
+        fastest_legacy = min(value for name, value in timings.items() if name != "html_to_text")
+        speedup = fastest_legacy / timings["html_to_text"]
+        print(f"{'':>9}  speedup vs fastest get_text: {speedup:.1f}x")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
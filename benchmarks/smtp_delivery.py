@@ -0,0 +1,132 @@
+"""
+Compare SMTP and Gmail API delivery against local stand-ins.
+
+Runs an aiosmtpd server and the fake Gmail endpoint from
+``benchmarks.gmail_bulk_send`` side by side. Both add the same simulated
+latency per message, and the SMTP server answers 421 (closing channel) to
+every 50th DATA command to exercise reconnects. The same digest goes to
+every recipient through ``SmtpSender`` and ``GmailSender``. Each recipient
+must be delivered exactly once by both backends.
+
+Usage:
+    python -m benchmarks.smtp_delivery [recipients]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import sys
+import threading
+
+from config import SmtpConfig, settings
+from functions.email_service import GMAIL_AVAILABLE, GmailSender, SmtpSender
+
+try:
+    from aiosmtpd.controller import Controller
+
+    AIOSMTPD_AVAILABLE = True
+except ImportError:  # pragma: no cover - benchmark-only dependency
+    AIOSMTPD_AVAILABLE = False
+
+from benchmarks.gmail_bulk_send import LATENCY, FakeGmailHandler, start_fake_gmail
+
+RECIPIENTS = 1000
+DROP_EVERY = 50
+BODY = "<p>Știri de astăzi</p>"
+
+
+class CountingHandler:
+    """aiosmtpd handler that records recipients and drops some sessions."""
+
+    def __init__(self) -> None:
+        self.delivered: list[str] = []
+        self.data_commands = 0
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope) -> str:  # noqa: N802
+        await asyncio.sleep(LATENCY)
+        with self.lock:
+            self.data_commands += 1
+            if self.data_commands % DROP_EVERY == 0:
+                return "421 Service closing transmission channel"
+            self.delivered.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def check(name: str, delivered: list[str], recipients: list[str]) -> bool:
+    if sorted(delivered) != sorted(recipients):
+        print(f"{name}: delivered {len(delivered)} of {len(recipients)} (or duplicates)")
+        return False
+    return True
+
+
+def main() -> int:
+    if not AIOSMTPD_AVAILABLE:
+        print("aiosmtpd not installed (pip install aiosmtpd); skipping.")
+        return 0
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else RECIPIENTS
+    recipients = [f"reader{i}@example.com" for i in range(count)]
+    workers = settings.smtp.pool_size
+
+    handler = CountingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    smtp = SmtpSender(
+        from_email="news@example.com",
+        from_name="AI News",
+        config=SmtpConfig(
+            host="127.0.0.1",
+            port=port,
+            starttls=False,
+        ),
+    )
+    smtp_report = smtp.send_bulk(recipients, "Benchmark", BODY)
+    smtp.close()
+    controller.stop()
+    ok = check("smtp", handler.delivered, recipients)
+
+    rows = [
+        (
+            "smtp",
+            smtp_report.messages_per_second,
+            smtp.connections_opened,
+            handler.data_commands - len(recipients),
+        )
+    ]
+
+    if GMAIL_AVAILABLE:
+        from google.oauth2.credentials import Credentials
+
+        server, endpoint = start_fake_gmail()
+        settings.gmail.send_rate_per_second = 10_000
+        settings.gmail.send_burst = 100
+        settings.gmail.send_backoff_base = 0.0
+        FakeGmailHandler.sent.clear()
+        gmail = GmailSender(
+            from_email="news@example.com",
+            from_name="AI News",
+            credentials=Credentials(token="fake"),
+            api_endpoint=endpoint,
+        )
+        gmail_report = gmail.send_bulk(recipients, "Benchmark", BODY, max_workers=workers)
+        server.shutdown()
+        ok = ok and gmail_report.sent == len(recipients)
+        retries = sum(result.attempts for result in gmail_report.results) - len(recipients)
+        rows.append(("gmail api", gmail_report.messages_per_second, workers, retries))
+
+    print(f"\n{'backend':<10} {'msg/s':>8} {'connections':>12} {'retries':>8}")
+    for name, rate, connections, retries in rows:
+        print(f"{name:<10} {rate:>8.1f} {connections:>12} {retries:>8}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Measure and gate the import time of the ``news-ai-emailer`` entry point.
+
+Imports the console script target from ``pyproject.toml`` in fresh
+interpreters under ``python -X importtime``, reports the best cumulative
+time and the slowest modules, and fails when the time exceeds the budget
+or when one of the heavy dependencies that are meant to load on first use
+(OpenAI, Google API client, requests, BeautifulSoup, lxml, tiktoken,
+python-dotenv) is imported at startup.
+
+Usage:
+    python -m benchmarks.startup [--budget MS] [--runs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover - Python 3.10
+    tomllib = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPT = "news-ai-emailer"
+DEFAULT_ENTRY_POINT = "main:main"
+# Top-level packages that must not be imported just by starting the CLI.
+DEFERRED = (
+    "openai",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "google",
+    "requests",
+    "bs4",
+    "lxml",
+    "tiktoken",
+    "dotenv",
+)
+DEFAULT_BUDGET_MS = 120.0
+
+
+def entry_point() -> str:
+    """The ``module:attribute`` target of the console script."""
+    if tomllib is None:
+        return DEFAULT_ENTRY_POINT
+    with open(ROOT / "pyproject.toml", "rb") as handle:
+        scripts = tomllib.load(handle).get("project", {}).get("scripts", {})
+    return scripts.get(SCRIPT, DEFAULT_ENTRY_POINT)
+
+
+def import_profile(target: str) -> list[tuple[str, int, int]]:
+    """
+    Import ``target`` in a fresh interpreter under ``-X importtime``.
+
+    Returns:
+        (module, self µs, cumulative µs) per imported module, in import order.
+    """
+    module, _, attribute = target.partition(":")
+    statement = f"from {module} import {attribute}" if attribute else f"import {module}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time gate for the CLI entry point.")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help="maximum ms")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to try")
+    args = parser.parse_args()
+
+    target = entry_point()
+    module = target.partition(":")[0]
+    best_ms = float("inf")
+    best_rows: list[tuple[str, int, int]] = []
+    for _ in range(args.runs):
+        rows = import_profile(target)
+        total_ms = next(cumulative for name, _, cumulative in rows if name == module) / 1000
+        if total_ms < best_ms:
+            best_ms, best_rows = total_ms, rows
+
+    print(f"{SCRIPT} ({target}): import {module} in {best_ms:.1f} ms (budget {args.budget:.0f} ms)")
+    print("slowest modules (self time):")
+    for name, self_us, _ in sorted(best_rows, key=lambda row: row[1], reverse=True)[:8]:
+        print(f"  {self_us / 1000:7.2f} ms  {name}")
+
+    failures = 0
+    loaded = sorted(
+        {name.split(".")[0] for name, _, _ in best_rows} & set(DEFERRED)
+    )
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failures += 1
+    if best_ms > args.budget:
+        print(f"FAIL: {best_ms:.1f} ms is over the {args.budget:.0f} ms budget")
+        failures += 1
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""
+Benchmark every hot path on recorded and scaled-up fixtures.
+
+Each case runs on the recorded pages in ``fixtures/`` and on synthetic
+copies with 10x and 100x the articles (distinct titles and links, so
+Biziday deduplication keeps them all):
+
+- ``parse.stiripesurse`` / ``parse.biziday``: ``parse_html`` plus the
+  compiled source extractor, the CPU work of ``scrape_stiripesurse`` and
+  ``scrape_biziday``
+- ``format.news``: ``format_news`` of the extracted articles (prompt text)
+- ``clean.ai_html``: ``clean_ai_html_response`` on the model answer
+- ``email.prepare_html``: ``prepare_html_for_email``
+- ``email.plain_to_html``: ``plain_text_to_html`` on the news text
+- ``email.mime``: the MIME construction of ``send_email_with_gmail``
+  (``RenderedEmail`` plus the base64url message for one recipient)
+
+Every case runs in a fresh interpreter. For each case and scale it reports
+the best wall time, input throughput, items per second and peak traced
+memory, then compares time and memory with the stored baseline. Baseline
+times are rescaled by a fixed pure-Python calibration loop, so a baseline
+recorded on another machine still gives a usable comparison; regressions
+beyond the tolerances make the command exit with status 1.
+
+Usage:
+    python -m benchmarks.suite [--scales 1 10 100] [--only PREFIX]
+                               [--update-baseline] [--time-tolerance 0.3]
+                               [--memory-tolerance 0.15]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from config import settings
+from functions.ai_client import clean_ai_html_response
+from functions.article import Article
+from functions.email_service import (
+    RenderedEmail,
+    plain_text_to_html,
+    prepare_html_for_email,
+)
+from functions.html_parser import parse_html
+from functions.scraping import format_news
+from functions.sources import get_source
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).parent / "fixtures"
+BASELINE = Path(__file__).parent / "baseline.json"
+# Case names, in report order (see ``build_cases``).
+CASES = (
+    "parse.stiripesurse",
+    "parse.biziday",
+    "format.news",
+    "clean.ai_html",
+    "email.prepare_html",
+    "email.plain_to_html",
+    "email.mime",
+)
+BIZIDAY_PAGES = ("biziday_page1.html", "biziday_page2.html")
+DEFAULT_SCALES = (1, 10, 100)
+# Each timing repeats the call until a batch takes at least BATCH_SECONDS
+# (like ``timeit``), and the best of REPEATS batches is kept.
+BATCH_SECONDS = 0.05
+REPEATS = 5
+SUBJECT = "Știri de astăzi - Analiză AI"
+FROM_HEADER = "AI News <news@example.com>"
+RECIPIENT = "reader@example.com"
+
+
+@dataclass
+class Case:
+    """One benchmarked function and the input it runs on."""
+
+    name: str
+    function: Callable[[Any], Any]
+    argument: Any
+    # Input size in bytes, for throughput.
+    size: int
+    # Articles (or list items) handled, for items per second.
+    items: int
+
+
+# -- scaled fixtures -----------------------------------------------------------
+
+
+def _repeat(markup: str, start: int, end: int, scale: int, tag: str) -> str:
+    """
+    Repeat ``markup[start:end]`` ``scale`` times.
+
+    Every copy after the first gets unique links and ``tag`` elements get a
+    copy marker in their text, so extractors treat them as new articles.
+    """
+    block = markup[start:end]
+    copies = [block]
+    for copy in range(2, scale + 1):
+        distinct = block.replace('.html"', f'-{copy}.html"').replace(
+            f'{tag}">', f'{tag}">[{copy}] '
+        )
+        copies.append(distinct)
+    return markup[:start] + "".join(copies) + markup[end:]
+
+
+def stiripesurse_page(scale: int) -> str:
+    page = (FIXTURES / "stiripesurse.html").read_text(encoding="utf-8")
+    start = page.index("<article")
+    end = page.rindex("</article>") + len("</article>")
+    return _repeat(page, start, end, scale, "article__title")
+
+
+def biziday_pages(scale: int) -> list[str]:
+    pages = []
+    for name in BIZIDAY_PAGES:
+        page = (FIXTURES / name).read_text(encoding="utf-8")
+        start = page.index('<li class="news-item">')
+        end = page.index("</ul>", start)
+        pages.append(_repeat(page, start, end, scale, "news-item"))
+    return pages
+
+
+def ai_answer(scale: int) -> str:
+    """The recorded model answer with its article list items repeated."""
+    raw = (FIXTURES / "ai_response.txt").read_text(encoding="utf-8")
+    start = raw.index("<li style=")
+    end = raw.rindex("</li>") + len("</li>")
+    return _repeat(raw, start, end, scale, "li")
+
+
+# -- cases ---------------------------------------------------------------------
+
+
+def parse_stiripesurse(page: str) -> list[Article]:
+    return get_source("stiripesurse").extract(parse_html(page))
+
+
+def parse_biziday(pages: list[str]) -> list[Article]:
+    articles: list[Article] = []
+    seen_keys: set[tuple[str, str]] = set()
+    source = get_source("biziday")
+    for page in pages:
+        source.extract(parse_html(page), articles, seen_keys)
+    return articles
+
+
+def build_mime(body: str) -> str:
+    return RenderedEmail(SUBJECT, body, FROM_HEADER).encode_for(RECIPIENT)
+
+
+def build_cases(scale: int) -> list[Case]:
+    """All cases at ``scale`` times the recorded article count."""
+    stiripesurse = stiripesurse_page(scale)
+    biziday = biziday_pages(scale)
+    results = {
+        "stiripesurse": parse_stiripesurse(stiripesurse),
+        "biziday": parse_biziday(biziday),
+    }
+    articles = sum(len(items) for items in results.values())
+    news = format_news(results)
+    answer = ai_answer(scale)
+    document = clean_ai_html_response(answer)
+    answer_items = answer.count("<li")
+
+    return [
+        Case(
+            "parse.stiripesurse",
+            parse_stiripesurse,
+            stiripesurse,
+            len(stiripesurse.encode()),
+            len(results["stiripesurse"]),
+        ),
+        Case(
+            "parse.biziday",
+            parse_biziday,
+            biziday,
+            sum(len(page.encode()) for page in biziday),
+            len(results["biziday"]),
+        ),
+        Case("format.news", format_news, results, len(news.encode()), articles),
+        Case(
+            "clean.ai_html",
+            clean_ai_html_response,
+            answer,
+            len(answer.encode()),
+            answer_items,
+        ),
+        Case(
+            "email.prepare_html",
+            prepare_html_for_email,
+            document,
+            len(document.encode()),
+            answer_items,
+        ),
+        Case("email.plain_to_html", plain_text_to_html, news, len(news.encode()), articles),
+        Case("email.mime", build_mime, document, len(document.encode()), answer_items),
+    ]
+
+
+# -- measurement ---------------------------------------------------------------
+
+
+def measure(case: Case) -> dict[str, float]:
+    """Best wall time per call (batched, warmed up) and peak traced memory."""
+    start = time.perf_counter()
+    case.function(case.argument)
+    number = max(1, int(BATCH_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.function(case.argument)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    # Parse trees are cyclic: without the collector the peak does not depend
+    # on when a collection happens to run.
+    gc.collect()
+    gc.disable()
+    try:
+        tracemalloc.start()
+        case.function(case.argument)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        gc.enable()
+    return {
+        "ms": best * 1000,
+        "mb_per_s": case.size / best / 1e6,
+        "items_per_s": case.items / best,
+        "peak_kb": peak / 1024,
+        "items": case.items,
+        "size_kb": case.size / 1024,
+    }
+
+
+def measure_isolated(name: str, scale: int) -> dict[str, float]:
+    """
+    ``measure`` one case in a fresh interpreter.
+
+    Allocator and cache state left by earlier cases changes the timing of
+    small ones by up to 2x, so every case starts from the same state.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--measure", f"{name}@{scale}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def calibrate() -> float:
+    """Seconds for a fixed pure-Python workload (best of 15), to compare machines."""
+    best = float("inf")
+    for _ in range(15):
+        start = time.perf_counter()
+        total = 0
+        parts = []
+        for i in range(200_000):
+            total += i * i % 7
+            if i % 50 == 0:
+                parts.append(str(total))
+        "".join(parts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load_baseline() -> dict[str, Any]:
+    if not BASELINE.exists():
+        return {}
+    with open(BASELINE, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_baseline(results: dict[str, dict[str, float]], calibration: float) -> None:
+    data = load_baseline()
+    data.update(
+        {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration_s": round(calibration, 6),
+        }
+    )
+    cases = data.setdefault("cases", {})
+    for key, result in results.items():
+        cases[key] = {"ms": round(result["ms"], 3), "peak_kb": round(result["peak_kb"], 1)}
+    data["cases"] = dict(sorted(cases.items()))
+    with open(BASELINE, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, ensure_ascii=False)
+        handle.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the hot paths.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES))
+    parser.add_argument("--only", default="", help="run cases whose name starts with this")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help=f"store the results in {BASELINE.name}"
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.3, help="allowed slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.15, help="allowed growth")
+    parser.add_argument("--measure", metavar="CASE@SCALE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        name, _, scale = args.measure.partition("@")
+        # Scaled pages hold more articles than a real run keeps.
+        settings.news.max_articles = 10**9
+        case = next(case for case in build_cases(int(scale)) if case.name == name)
+        print(json.dumps(measure(case)))
+        return 0
+
+    calibration = calibrate()
+    baseline = load_baseline()
+    cases_baseline = baseline.get("cases", {})
+    speed = calibration / baseline["calibration_s"] if baseline.get("calibration_s") else 1.0
+    if baseline and baseline.get("python") != platform.python_version():
+        print(f"note: baseline recorded with Python {baseline.get('python')}")
+
+    print(
+        f"{'case':<22} {'scale':>5} {'items':>6} {'KB':>7} {'ms':>9} {'MB/s':>7} "
+        f"{'items/s':>9} {'peak KB':>8}  vs baseline"
+    )
+    results: dict[str, dict[str, float]] = {}
+    regressions = []
+    for scale in args.scales:
+        for name in CASES:
+            if not name.startswith(args.only):
+                continue
+            key = f"{name}@{scale}x"
+            result = results[key] = measure_isolated(name, scale)
+
+            comparison = "(no baseline)"
+            previous = cases_baseline.get(key)
+            if previous:
+                expected_ms = previous["ms"] * speed
+                time_ratio = result["ms"] / expected_ms
+                memory_ratio = result["peak_kb"] / max(previous["peak_kb"], 1.0)
+                comparison = f"time {time_ratio:.2f}x  mem {memory_ratio:.2f}x"
+                if time_ratio > 1 + args.time_tolerance:
+                    comparison += "  SLOWER"
+                    regressions.append(key)
+                if memory_ratio > 1 + args.memory_tolerance:
+                    comparison += "  MORE MEMORY"
+                    regressions.append(key)
+            print(
+                f"{name:<22} {scale:>4}x {result['items']:>6} {result['size_kb']:>7.0f} "
+                f"{result['ms']:>9.2f} {result['mb_per_s']:>7.1f} "
+                f"{result['items_per_s']:>9.0f} {result['peak_kb']:>8.0f}  {comparison}"
+            )
+
+    print(f"\ncalibration: {calibration * 1000:.1f} ms (machine speed factor {speed:.2f})")
+    if args.update_baseline:
+        save_baseline(results, calibration)
+        print(f"baseline updated: {BASELINE}")
+        return 0
+    if regressions:
+        print(f"FAIL: regressions in {', '.join(sorted(set(regressions)))}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
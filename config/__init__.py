@@ -1,7 +1,7 @@
+import json
 import os
-from dataclasses import dataclass
-
-from dotenv import load_dotenv
+import threading
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -13,6 +13,34 @@ class AIConfig:
     temperature: float | None = None
     # Maximum number of completion tokens to generate from the model.
     max_completion_tokens: int = 32000
+    # On-disk cache of raw model outputs keyed by model + prompt + parameters.
+    cache_enabled: bool = True
+    cache_path: str = ".cache/ai_responses.sqlite3"
+    cache_ttl: float = 7 * 24 * 60 * 60
+    cache_max_bytes: int = 20 * 1024 * 1024
+    # Stream completions, stop reading at </html> and report time-to-first-token.
+    stream: bool = False
+    # Cancel a streamed generation after this many seconds (None = no limit).
+    stream_max_seconds: float | None = None
+    # Prompt packing: rank articles and fit them into an input token budget,
+    # with short article IDs instead of full URLs.
+    prompt_packing_enabled: bool = False
+    input_token_budget: int = 12000
+    # Ranking weight per source (missing sources default to 1.0).
+    source_weights: dict[str, float] = field(
+        default_factory=lambda: {"stiripesurse": 1.0, "biziday": 1.0}
+    )
+    # How strongly word overlap with higher ranked headlines lowers priority (0-1).
+    novelty_weight: float = 0.5
+    # Map-reduce mode: score articles in parallel batches, then one final call.
+    map_reduce_enabled: bool = False
+    batch_size: int = 40
+    map_reduce_workers: int = 4
+    batch_max_completion_tokens: int = 4000
+    # Batch items scored below this are not reported back by the model.
+    map_reduce_min_score: int = 4
+    # Number of top-scored candidates passed to the final (reduce) call.
+    map_reduce_candidates: int = 10
 
 
 @dataclass
@@ -22,6 +50,39 @@ class NewsConfig:
     stiripesurse_url: str = "https://www.stiripesurse.ro/"
     biziday_url: str = "https://www.biziday.ro/"
     max_articles: int = 150
+    # HTML parser backend ("lxml" or "html.parser"); also used for email HTML.
+    # Falls back to "html.parser" when lxml is not installed.
+    html_parser: str = "lxml"
+    # Number of Biziday listing pages (/page/N/) to scrape.
+    biziday_max_pages: int = 8
+    # Maximum number of simultaneous requests sent to a single host.
+    max_concurrent_per_host: int = 4
+    # HTTP client: timeouts (seconds), retries with backoff and pool sizing.
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    http_retries: int = 3
+    http_backoff_factor: float = 0.5
+    # Number of per-host pools kept, and open connections kept per host.
+    http_pool_hosts: int = 10
+    http_pool_size: int = 8
+    # On-disk conditional-GET cache (ETag / Last-Modified revalidation).
+    http_cache_enabled: bool = True
+    http_cache_dir: str = ".cache/http"
+    # Entries older than this many seconds are dropped instead of revalidated.
+    http_cache_ttl: float = 24 * 60 * 60
+    # Upper bound for the compressed bodies kept on disk (LRU eviction).
+    http_cache_max_bytes: int = 50 * 1024 * 1024
+    # Cross-source near-duplicate clustering (MinHash/LSH over headlines).
+    dedupe_enabled: bool = False
+    # Minimum Jaccard similarity of character shingles to merge two headlines.
+    dedupe_threshold: float = 0.6
+    dedupe_shingle_size: int = 5
+    # Headlines shorter than this (after normalization, e.g. empty ones) are
+    # never merged: they share too few shingles to tell stories apart.
+    dedupe_min_title_length: int = 10
+    # SQLite store of already scraped articles (enables "only new" runs).
+    article_store_enabled: bool = True
+    article_store_path: str = ".cache/articles.sqlite3"
 
 
 @dataclass
@@ -31,12 +92,162 @@ class GmailConfig:
     credentials_file: str = "credentials.json"
     token_file: str = "token.json"
     default_subject: str = "Știri de astăzi - Analiză AI"
+    # Line width of the text/plain part rendered from the HTML digest (0 = no wrapping).
+    plain_text_width: int = 78
+    # Bulk sending: worker threads and a token bucket sized for Gmail's
+    # per-user quota (250 units/s, messages.send costs 100 units).
+    send_workers: int = 4
+    send_rate_per_second: float = 2.5
+    send_burst: int = 5
+    # Retries (exponential backoff, seconds) on 429/rateLimitExceeded and 5xx.
+    send_max_retries: int = 5
+    send_backoff_base: float = 1.0
+    # Override the Gmail API endpoint, e.g. a local fake for testing.
+    api_endpoint: str | None = None
+    # Durable outbox of digests and per-recipient delivery status, so an
+    # interrupted send can be resumed without scraping or analyzing again.
+    outbox_enabled: bool = True
+    outbox_path: str = ".cache/outbox.sqlite3"
+
+
+@dataclass
+class SmtpConfig:
+    """Configuration for the SMTP delivery backend."""
+
+    host: str = "localhost"
+    port: int = 587
+    # STARTTLS on a plain connection, or implicit TLS (usually port 465).
+    starttls: bool = True
+    use_ssl: bool = False
+    timeout: float = 30.0
+    username: str | None = None
+    password: str | None = None
+    # Envelope and From address; defaults to the username.
+    from_email: str | None = None
+    # Persistent connections (and concurrent senders) in the pool.
+    pool_size: int = 4
+    # Reconnect after this many messages, below typical server session limits.
+    messages_per_connection: int = 100
+
+
+@dataclass
+class MetricsConfig:
+    """Configuration for run instrumentation (timed spans and counters)."""
+
+    # JSON report of the last run: every span with its timing, and counters.
+    report_path: str | None = ".cache/run_report.json"
+    # Prometheus textfile for the node_exporter textfile collector.
+    prometheus_path: str | None = ".cache/news_ai_emailer.prom"
+    # Mirror spans and counters to the OpenTelemetry API (needs
+    # opentelemetry-api; exporters are set up through the OTel SDK).
+    otel_enabled: bool = False
+    # Level of the application log (logging module level name).
+    log_level: str = "INFO"
+
+
+@dataclass
+class PipelineConfig:
+    """Concurrency of the staged digest pipeline (see ``functions.pipeline``)."""
+
+    # Capacity of the queue in front of every stage (backpressure).
+    queue_size: int = 16
+    # Concurrent page downloads over all hosts; each host is still limited
+    # to ``NewsConfig.max_concurrent_per_host``.
+    fetch_workers: int = 8
+    # Pages parsed at once (different sources; each source in page order).
+    extract_workers: int = 2
+    # Analyses of different source sets run at once (multi-digest runs);
+    # the prompts of one source set always run concurrently.
+    analyze_workers: int = 4
+    # Concurrent deliveries; None uses the backend's own default.
+    deliver_workers: int | None = None
+
+
+@dataclass
+class DaemonConfig:
+    """Configuration for daemon mode (``main.py --daemon``)."""
+
+    # Cron expression in local time: minute hour day-of-month month day-of-week.
+    schedule: str = "0 7 * * *"
+    # Every scheduled run starts a random 0..jitter_seconds after its time.
+    jitter_seconds: float = 60.0
+    # Local trigger / health endpoint (None = no endpoint).
+    host: str = "127.0.0.1"
+    port: int | None = 8787
+    # Options of every run (a trigger may ask for only_new).
+    send_email: bool = True
+    only_new: bool = False
+
+
+@dataclass
+class DigestConfig:
+    """
+    One digest of a multi-digest run: its sources, prompt and audience.
+
+    Digests that share sources share the scraping and the article
+    processing; digests that also share the prompt share the analysis.
+    """
+
+    name: str
+    # Registered source names, in prompt order (empty = every source).
+    sources: list[str] = field(default_factory=list)
+    # Name of the analysis prompt template in ``config.prompts``.
+    prompt: str = "NEWS_ANALYSIS_PROMPT"
+    recipients: list[str] = field(default_factory=list)
+    # Email subject; None uses ``GmailConfig.default_subject``.
+    subject: str | None = None
+
+    def prompt_template(self) -> str:
+        """
+        The prompt template text.
+
+        Raises:
+            ValueError: If ``config.prompts`` has no such template, or it has
+                no ``{news}`` placeholder.
+        """
+        from config import prompts
+
+        template = getattr(prompts, self.prompt, None)
+        if not isinstance(template, str) or "{news}" not in template:
+            raise ValueError(
+                f"Digest {self.name!r}: {self.prompt!r} is not a prompt template "
+                "with a {news} placeholder in config/prompts.py"
+            )
+        return template
+
+
+def load_digests(path: str) -> list[DigestConfig]:
+    """
+    Read digest definitions from a JSON file.
+
+    The file holds a list of objects with the fields of ``DigestConfig``,
+    e.g. ``[{"name": "brief", "sources": ["biziday"], "prompt":
+    "NEWS_BRIEF_PROMPT", "recipients": ["a@example.com"]}]``.
+
+    Raises:
+        ValueError: If the file is not a list of digest objects or two
+            digests have the same name.
+    """
+    with open(path, encoding="utf-8") as handle:
+        entries = json.load(handle)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a list of digests")
+    try:
+        digests = [DigestConfig(**entry) for entry in entries]
+    except TypeError as e:
+        raise ValueError(f"{path}: invalid digest definition ({e})") from None
+    names = [digest.name for digest in digests]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: digest names must be unique")
+    return digests
 
 
 class Settings:
     """Global application settings with environment loading."""
 
     def __init__(self) -> None:
+        from dotenv import load_dotenv
+
         # Load environment variables from `.env` if present
         load_dotenv(override=True)
 
@@ -54,9 +265,76 @@ class Settings:
         self.news = NewsConfig()
         self.gmail = GmailConfig()
 
+        # Delivery backend for digests: "gmail" (Gmail API) or "smtp"
+        self.email_backend: str = os.getenv("EMAIL_BACKEND", "gmail").strip() or "gmail"
+        self.smtp = SmtpConfig(
+            host=os.getenv("SMTP_HOST", "localhost"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("SMTP_USERNAME") or None,
+            password=os.getenv("SMTP_PASSWORD") or None,
+            from_email=os.getenv("SMTP_FROM") or None,
+        )
+
+        self.pipeline = PipelineConfig()
+        daemon_port = os.getenv("DAEMON_PORT", "8787").strip()
+        self.daemon = DaemonConfig(
+            schedule=os.getenv("DAEMON_SCHEDULE", "0 7 * * *").strip() or "0 7 * * *",
+            port=int(daemon_port) if daemon_port else None,
+        )
+
+        # Optional: JSON file of digest definitions (multi-digest runs)
+        digests_file = os.getenv("DIGESTS_FILE", "").strip()
+        self.digests: list[DigestConfig] = load_digests(digests_file) if digests_file else []
+
+        self.metrics = MetricsConfig(
+            otel_enabled=os.getenv("OTEL_ENABLED", "").strip().lower() in ("1", "true", "yes"),
+            log_level=os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO",
+        )
+
+
+class LazySettings:
+    """
+    Proxy to the ``Settings`` singleton, built on first attribute access.
+
+    Importing ``config`` therefore reads neither ``.env`` nor the
+    environment; code that never touches a setting never pays for it.
+    Attribute reads and writes go to the real instance.
+    """
+
+    __slots__ = ("_settings", "_lock")
+
+    def __init__(self) -> None:
+        object.__setattr__(self, "_settings", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self) -> Settings:
+        loaded = self._settings
+        if loaded is None:
+            with self._lock:
+                loaded = self._settings
+                if loaded is None:
+                    loaded = Settings()
+                    object.__setattr__(self, "_settings", loaded)
+        return loaded
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._load(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._settings is not None else "not loaded"
+        return f"<LazySettings ({state})>"
+
+
+def get_settings() -> Settings:
+    """Return the ``Settings`` singleton, building it on first use."""
+    return settings._load()
+
 
 # Singleton-like settings instance for convenient imports
-settings = Settings()
+settings = LazySettings()
 
 
 
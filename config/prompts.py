@@ -160,4 +160,47 @@ IMPORTANT: Returnează DOAR codul HTML, fără alt text înainte sau după!
 """
 
 
+NEWS_BRIEF_PROMPT = """Ești un editor de știri. Scrie un rezumat scurt al zilei pe baza acestor știri, pentru un cititor grăbit care NU le-a văzut.
 
+INSTRUCȚIUNI CRITICE PENTRU FORMATARE:
+- Returnează DOAR cod HTML RAW, fără markdown, fără code blocks, fără explicații
+- NU escapa tag-urile HTML (folosește < nu &lt;)
+- Returnează HTML complet cu DOCTYPE, html, head, body
+- Folosește DOAR inline styles (style="...") pentru toate elementele
+
+ȘTIRI (DOAR CA INPUT):
+{news}
+
+STRUCTURA:
+1. TITLU (h1): "Pe scurt - [Data]"
+2. CELE MAI IMPORTANTE 5 ȘTIRI (h2 + listă):
+   - câte o propoziție clară pentru fiecare, cu link-ul către articolul original
+   - ordonate după importanță
+3. ÎN CONCLUZIE (h2): 2-3 propoziții despre tonul general al zilei
+
+- Fii concis: întregul rezumat trebuie să poată fi citit în cel mult 2 minute
+- NU include recomandări, sfaturi sau îndemnuri
+
+IMPORTANT: Returnează DOAR codul HTML, fără alt text înainte sau după!
+"""
+
+
+NEWS_BATCH_SCORING_PROMPT = """Ești un analist expert de știri. Primești un LOT dintr-o listă mai mare de știri din presa românească.
+Evaluează FIECARE știre din lot, una câte una, pentru riscul de „Fake News” / dezinformare.
+
+Pentru fiecare știre, calculează un „scor de Fake News” pe o scară de la 1 la 10 (1 = risc foarte mic, 10 = risc foarte mare), ținând cont dacă știrea pare:
+- exagerată sau senzaționalistă
+- slab susținută de surse credibile
+- bazată pe afirmații neconfirmate sau conspirații
+
+INSTRUCȚIUNI CRITICE PENTRU FORMATARE:
+- Returnează DOAR un obiect JSON valid, fără markdown, fără code blocks, fără explicații
+- Include în "items" DOAR știrile cu scor mai mare sau egal cu {min_score}
+- Folosește exact câmpul "id" primit pentru fiecare știre
+
+Format:
+{{"items": [{{"id": 3, "score": 7, "description": "știre politică despre X", "context": "o propoziție despre ce este știrea", "reasons": ["motiv 1", "motiv 2"]}}]}}
+
+ȘTIRI DIN LOT:
+{articles}
+"""
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    Declarative description of a news listing site.
+
+    String settings may reference ``NewsConfig`` fields in braces (e.g.
+    ``"{biziday_url}"``); they are resolved when the source is scraped, so
+    overriding ``settings.news`` keeps working. Tag lists are matched with
+    BeautifulSoup ``find``/``find_all`` semantics (first match in document
+    order).
+    """
+
+    # Registry key; also the key of the source in scrape results.
+    name: str
+    # Section header for the source in the text sent to the AI.
+    header: str
+    # Listing URL (first page).
+    url: str
+    # Further listing pages, e.g. "{url}/page/{page}/" for pages 2..max_pages.
+    page_url: Optional[str] = None
+    # Number of listing pages; an int or the name of a NewsConfig field.
+    max_pages: Union[int, str] = 1
+    # Optional section anchor: the first of ``anchor_tags`` whose text contains
+    # ``anchor_text``; items are then looked up in the next ``container_tags``
+    # element after it, falling back to the whole page.
+    anchor_tags: tuple[str, ...] = ()
+    anchor_text: Optional[str] = None
+    container_tags: tuple[str, ...] = ("ul", "div", "section")
+    # Tag of the elements that hold one item each.
+    item_tag: str = "article"
+    # Apply ``max_articles`` to the raw item elements instead of accepted items.
+    limit_candidates: bool = False
+    # Skip items whose parent id/class contains any of these words.
+    exclude_parent: tuple[str, ...] = ()
+    # First descendant of one of these tags is the title; empty = whole item.
+    title_tags: tuple[str, ...] = ()
+    # Separator used when joining the title text nodes.
+    title_separator: str = ""
+    # Drop items whose title text is empty.
+    skip_empty_title: bool = True
+    # Regexes removed from the title (the raw text is kept if nothing is left).
+    title_cleanup: tuple[str, ...] = ()
+    # Base for relative links (defaults to ``url``).
+    link_base: Optional[str] = None
+    # Drop items without a link element; otherwise they link to ``link_base``
+    # (as do links with an empty href).
+    require_link: bool = True
+    # Drop repeated (title, link) pairs across all pages.
+    dedupe: bool = False
+    # Wording used in the "Found N ..." progress line.
+    label: str = "articles"
+
+
+STIRIPESURSE = SourceSpec(
+    name="stiripesurse",
+    header="Știri din stiripesurse.ro:",
+    url="{stiripesurse_url}",
+    item_tag="article",
+    limit_candidates=True,
+    title_tags=("h2", "h3", "a"),
+    skip_empty_title=False,
+    link_base="https://www.stiripesurse.ro",
+)
+
+BIZIDAY = SourceSpec(
+    name="biziday",
+    header="Știri din biziday.ro (Știri verificate):",
+    url="{biziday_url}",
+    page_url="{url}/page/{page}/",
+    max_pages="biziday_max_pages",
+    anchor_tags=("h1", "h2", "h3", "strong"),
+    anchor_text="Știri verificate",
+    item_tag="li",
+    exclude_parent=("menu", "cookie", "footer", "privacy"),
+    title_separator=" ",
+    # Many Biziday bullets end with "Biziday · [date]"
+    title_cleanup=(r"Biziday\s*·\s*\d{4}-\d{2}-\d{2}.*$",),
+    require_link=False,
+    dedupe=True,
+    label="Biziday items",
+)
+
+# Built-in sources, scraped in this order.
+DEFAULT_SOURCES: tuple[SourceSpec, ...] = (STIRIPESURSE, BIZIDAY)
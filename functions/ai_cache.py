@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional
+
+from config import AIConfig, settings
+
+
+def make_cache_key(model: str, prompt: str, params: dict[str, Any]) -> str:
+    """Hash the model, the rendered prompt and the completion parameters."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AIResponseCache:
+    """
+    Content-addressed on-disk cache of raw model outputs.
+
+    Entries are keyed by ``make_cache_key`` and stored zlib-compressed in a
+    SQLite file. The raw completion text is kept (not the cleaned HTML), so
+    changes to ``clean_ai_html_response`` never require invalidation. Entries
+    expire after ``ttl`` seconds and the least recently used ones are evicted
+    once the stored outputs exceed ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 7 * 24 * 60 * 60,
+        max_bytes: int = 20 * 1024 * 1024,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Optional[AIConfig] = None) -> "AIResponseCache":
+        """Build a cache from the response cache fields of ``AIConfig``."""
+        config = config or settings.ai
+        return cls(
+            path=config.cache_path,
+            ttl=config.cache_ttl,
+            max_bytes=config.cache_max_bytes,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached raw output for ``key``, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key: str, model: str, raw_output: str) -> None:
+        """Store a raw model output under ``key``."""
+        body = zlib.compress(raw_output.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, body, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, body, len(body), now, now),
+            )
+            self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current cache size."""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._db.close()
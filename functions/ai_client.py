@@ -1,108 +1,478 @@
 from __future__ import annotations
 
+import json
+import logging
 import re
-from typing import Optional
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Optional
 
-try:
-    from openai import OpenAI
+# The OpenAI SDK is slow to import; it is loaded on the first request.
+AI_AVAILABLE = find_spec("openai") is not None
 
-    AI_AVAILABLE = True
-except ImportError:  # pragma: no cover - optional dependency
-    AI_AVAILABLE = False
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 from config import settings
-from config.prompts import NEWS_ANALYSIS_PROMPT
+from config.prompts import NEWS_ANALYSIS_PROMPT, NEWS_BATCH_SCORING_PROMPT
+from functions.ai_cache import AIResponseCache, make_cache_key
+from functions.article import Article
+from functions.html_sanitizer import HtmlSanitizer, sanitize_html
+from functions.metrics import annotate, bind_context, count, span
+
+logger = logging.getLogger(__name__)
 
 
 def clean_ai_html_response(ai_response: str) -> str:
     """
     Clean the AI response to extract actual HTML code.
 
-    The AI often wraps HTML in markdown code blocks or escapes it.
+    The AI often wraps HTML in markdown code blocks or escapes it; see
+    ``HtmlSanitizer`` for every step, all done in one pass.
+    """
+    return sanitize_html(ai_response).document
+
+
+def _create_client() -> Optional["OpenAI"]:
+    """
+    Create an OpenAI client from settings.
+
+    Returns:
+        The client, or None if the library or the API key is missing.
+    """
+    if not AI_AVAILABLE:
+        logger.error(
+            "Error: OpenAI library not installed. Install with: pip install openai"
+        )
+        return None
+
+    api_key: Optional[str] = settings.openai_api_key
+    if not api_key:
+        logger.error("Error: OPENAI_API_KEY not set in environment variables")
+        return None
+
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+_openai_client: Optional["OpenAI"] = None
+_openai_client_key: Optional[str] = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client() -> Optional["OpenAI"]:
     """
-    content = ai_response.strip()
+    Return the process-wide OpenAI client, creating it on first use.
 
-    # Remove markdown code blocks (```html ... ```)
-    if "```" in content:
-        pattern = r"```(?:html|HTML)?\s*\n?(.*?)```"
-        match = re.search(pattern, content, re.DOTALL)
-        if match:
-            content = match.group(1).strip()
+    The client keeps its connection pool between calls and runs, and is
+    recreated when the API key setting changes.
 
-    # Unescape HTML entities if needed
-    if "&lt;" in content or "&gt;" in content or "&amp;" in content:
-        from html import unescape
+    Returns:
+        The client, or None if the library or the API key is missing.
+    """
+    global _openai_client, _openai_client_key
+    with _openai_client_lock:
+        if _openai_client is None or _openai_client_key != settings.openai_api_key:
+            _openai_client = _create_client()
+            _openai_client_key = settings.openai_api_key if _openai_client else None
+        return _openai_client
+
+
+def _open_cache(use_cache: bool) -> Optional[AIResponseCache]:
+    """Open the response cache unless it is bypassed or disabled."""
+    if use_cache and settings.ai.cache_enabled:
+        return AIResponseCache.from_config()
+    return None
+
+
+def _close_cache(cache: Optional[AIResponseCache]) -> None:
+    """Report cache metrics and close it."""
+    if cache is not None:
+        stats = cache.stats()
+        logger.info(f"🗄️ AI cache: {stats['hits']} hits, {stats['misses']} misses")
+        cache.close()
 
-        content = unescape(content)
 
-    # Remove any leading/trailing text that's not HTML
-    doctype_match = re.search(r"<!DOCTYPE[^>]*>", content, re.IGNORECASE)
-    html_match = re.search(r"<html[^>]*>", content, re.IGNORECASE)
+def _stream_completion(
+    client: "OpenAI",
+    prompt: str,
+    params: dict,
+) -> tuple[str, str, bool]:
+    """
+    Stream one chat completion and clean it while it arrives.
 
-    if doctype_match:
-        content = content[doctype_match.start() :]
-    elif html_match:
-        content = content[html_match.start() :]
+    Reading stops at ``</html>`` (or after ``AIConfig.stream_max_seconds``),
+    which closes the connection and cancels the rest of the generation.
+    The time limit is checked on every chunk, keep-alives included, and is
+    also the client's read timeout, so a stalled stream is cancelled too;
+    the output received until then is kept. Time-to-first-token and
+    tokens/sec are printed at the end.
 
-    # Remove any text after </html> tag
-    html_end_match = re.search(r"</html>", content, re.IGNORECASE)
-    if html_end_match:
-        content = content[: html_end_match.end()]
-    cleaned = content.strip()
+    Returns:
+        (raw output received, incrementally cleaned HTML, whether the
+        output is complete: the model finished or ``</html>`` was reached)
+    """
+    start = time.perf_counter()
+    first_token_at: Optional[float] = None
+    raw_parts: list[str] = []
+    cleaner = HtmlSanitizer()
+    usage = None
+    chunks = 0
+    finished = False
+    max_seconds = settings.ai.stream_max_seconds
 
-    # Remove known generic disclaimer about stiripesurse.ro reliability if present
-    disclaimer_snippet = (
-        "Site-ul stiripesurse.ro este cunoscut pentru o gamă variată de știri"
+    stream = client.chat.completions.create(
+        model=settings.ai.model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+        stream_options={"include_usage": True},
+        **({"timeout": max_seconds} if max_seconds else {}),
+        **params,
     )
-    if disclaimer_snippet in cleaned:
-        cleaned = re.sub(
-            r"<p[^>]*>[^<]*Site-ul stiripesurse\\.ro[^<]*</p>",
-            "",
-            cleaned,
-            flags=re.IGNORECASE,
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            choice = chunk.choices[0] if chunk.choices else None
+            if choice is not None and choice.finish_reason:
+                finished = True
+            delta = choice.delta.content if choice is not None else None
+            if delta:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks += 1
+                raw_parts.append(delta)
+                cleaner.feed(delta)
+                if cleaner.done:
+                    break
+
+            if max_seconds and time.perf_counter() - start > max_seconds:
+                logger.warning(f"⚠️ Generation exceeded {max_seconds:.0f}s; cancelling stream")
+                break
+    except Exception as error:
+        if not (raw_parts and _is_timeout(error)):
+            raise
+        logger.warning("⚠️ The stream stalled and timed out; keeping the output received")
+    finally:
+        stream.close()
+    # Checked before finish(), which closes whatever is still open.
+    finished = finished or cleaner.done
+    cleaner.finish()
+
+    _record_usage(usage)
+    elapsed = time.perf_counter() - start
+    if first_token_at is not None:
+        annotate(time_to_first_token=round(first_token_at - start, 3))
+        generation_time = max(elapsed - (first_token_at - start), 1e-6)
+        completion_tokens = usage.completion_tokens if usage is not None else None
+        tokens = completion_tokens or chunks
+        approx = "" if completion_tokens else "~"
+        logger.info(
+            f"⏱️ First token after {first_token_at - start:.2f}s; "
+            f"{approx}{tokens} tokens in {elapsed:.2f}s "
+            f"({tokens / generation_time:.1f} tokens/s)"
         )
-    return cleaned
+    return "".join(raw_parts), cleaner.document, finished
+
+
+def _is_timeout(error: Exception) -> bool:
+    """True for a read timeout of the OpenAI client (raised by httpx mid-stream)."""
+    if isinstance(error, TimeoutError):
+        return True
+    # Only an already imported client can have raised these.
+    httpx = sys.modules.get("httpx")
+    openai = sys.modules.get("openai")
+    return (httpx is not None and isinstance(error, httpx.TimeoutException)) or (
+        openai is not None and isinstance(error, openai.APITimeoutError)
+    )
+
+
+def _record_usage(usage) -> None:
+    """Count the prompt and completion tokens reported by the API."""
+    if usage is None:
+        return
+    model = settings.ai.model
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    count("ai_prompt_tokens", prompt_tokens, model=model)
+    count("ai_completion_tokens", completion_tokens, model=model)
+    annotate(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def _complete(
+    prompt: str,
+    params: dict,
+    cache: Optional[AIResponseCache],
+    client: Optional["OpenAI"] = None,
+    stream: bool = False,
+) -> Optional[str]:
+    """
+    Run one chat completion, going through the response cache.
+
+    The client is only created on a cache miss when none is passed in. With
+    ``stream`` the completion is streamed and cleaned by ``HtmlSanitizer``
+    as it arrives (a cached answer is cleaned the same way); the cache always
+    keeps the raw output, and never a stream cut off by
+    ``AIConfig.stream_max_seconds``.
+
+    Returns:
+        The model output (with ``stream``, the cleaned HTML document), or
+        None if the request could not be made.
+    """
+    key = make_cache_key(settings.ai.model, prompt, params)
+    with span("ai.completion", model=settings.ai.model, stream=stream) as record:
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            record.attributes["cached"] = True
+            count("ai_cache_hits", model=settings.ai.model)
+            return clean_ai_html_response(cached) if stream else cached
+
+        client = client or get_openai_client()
+        if client is None:
+            return None
+
+        count("ai_requests", model=settings.ai.model)
+        complete = True
+        try:
+            if stream:
+                ai_content, streamed_html, complete = _stream_completion(
+                    client, prompt, params
+                )
+            else:
+                response = client.chat.completions.create(
+                    model=settings.ai.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **params,
+                )
+                _record_usage(getattr(response, "usage", None))
+                ai_content = streamed_html = response.choices[0].message.content
+        except Exception as e:  # pragma: no cover - network/API errors
+            logger.error(f"Error calling OpenAI: {e}")
+            record.error = str(e)
+            count("ai_errors", model=settings.ai.model)
+            return None
+        if not complete:
+            record.attributes["truncated"] = True
+            logger.warning("⚠️ The output is incomplete; not caching it")
 
+    if cache is not None and ai_content and complete:
+        cache.put(key, settings.ai.model, ai_content)
+    return streamed_html
 
-def get_ai_info(news: str) -> str:
+
+def get_ai_info(
+    news: str,
+    use_cache: bool = True,
+    prompt_template: str = NEWS_ANALYSIS_PROMPT,
+) -> str:
     """
     Send news to OpenAI and get formatted analysis.
 
+    Raw model outputs are cached on disk, keyed by the model, the rendered
+    prompt and the completion parameters. Pass ``use_cache=False`` (or set
+    ``AIConfig.cache_enabled``) to bypass the cache.
+
+    Args:
+        news: The formatted news text.
+        prompt_template: Analysis prompt with a ``{news}`` placeholder.
+
     Returns:
         AI analysis as an HTML string.
     """
-    if not AI_AVAILABLE:
-        print(
-            "Error: OpenAI library not installed. Install with: pip install openai"
+    prompt = prompt_template.format(news=news)
+    # gpt-5-mini does not support a temperature parameter; rely on model defaults.
+    params = {"max_completion_tokens": settings.ai.max_completion_tokens}
+
+    cache = _open_cache(use_cache)
+    try:
+        logger.info("🤖 Asking AI for analysis...")
+        ai_content = _complete(prompt, params, cache, stream=settings.ai.stream)
+        if ai_content is None:
+            return news
+        logger.info("✅ AI analysis received!")
+        # A streamed answer is already cleaned.
+        return ai_content if settings.ai.stream else clean_ai_html_response(ai_content)
+    finally:
+        _close_cache(cache)
+
+
+def _parse_batch_scores(raw_output: Optional[str]) -> list[dict]:
+    """Parse the JSON returned for one scoring batch; malformed output scores nothing."""
+    if not raw_output:
+        return []
+    content = raw_output.strip()
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if not match:
+        return []
+    try:
+        items = json.loads(match.group(0)).get("items", [])
+    except (ValueError, AttributeError):
+        return []
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def _score_batch(
+    batch: list[tuple[int, Article]],
+    cache: Optional[AIResponseCache],
+    client: "OpenAI",
+) -> list[dict]:
+    """
+    Map step: score one batch of articles for fake-news risk.
+
+    Returns:
+        Candidate dicts (score, description, context, reasons) with the
+        ``Article`` they refer to under "article".
+    """
+    lines = [
+        f"{article_id}. [{article.source}] {article.title}\n"
+        f"   {article.link}"
+        for article_id, article in batch
+    ]
+    prompt = NEWS_BATCH_SCORING_PROMPT.format(
+        min_score=settings.ai.map_reduce_min_score, articles="\n".join(lines)
+    )
+    params = {
+        "max_completion_tokens": settings.ai.batch_max_completion_tokens,
+        "response_format": {"type": "json_object"},
+    }
+    by_id = dict(batch)
+
+    candidates: list[dict] = []
+    for item in _parse_batch_scores(_complete(prompt, params, cache, client)):
+        try:
+            article = by_id[int(item.get("id"))]
+            score = int(item.get("score", 0))
+        except (KeyError, TypeError, ValueError):
+            continue
+        candidates.append({**item, "article": article, "score": score})
+    return candidates
+
+
+def _build_reduce_input(
+    articles: list[Article],
+    candidates: list[dict],
+) -> str:
+    """Compact news text for the reduce call: scored candidates, then all headlines."""
+    lines = ["EVALUĂRI PRELIMINARE (scoruri Fake News calculate pe loturi):", ""]
+    if not candidates:
+        lines.append("Nicio știre cu semnale de Fake News în evaluarea pe loturi.")
+    for i, candidate in enumerate(candidates, 1):
+        reasons = "; ".join(str(reason) for reason in candidate.get("reasons", []))
+        article = candidate["article"]
+        lines.append(
+            f"{i}. [Scor {candidate['score']}/10] {article.title} — "
+            f"{candidate.get('description', '')}. {candidate.get('context', '')}"
         )
-        return news
+        if reasons:
+            lines.append(f"   Motive: {reasons}")
+        lines.append(f"   {article.link}")
 
-    api_key: Optional[str] = settings.openai_api_key
-    if not api_key:
-        print("Error: OPENAI_API_KEY not set in environment variables")
-        return news
+    lines += ["", "TOATE TITLURILE ZILEI (pentru concluzie):", ""]
+    lines += [
+        f"- [{article.source}] {article.title}" for article in articles
+    ]
+    return "\n".join(lines)
+
+
+def score_candidates(
+    articles: list[Article],
+    use_cache: bool = True,
+    client: Optional["OpenAI"] = None,
+) -> list[dict]:
+    """
+    Map step of ``get_ai_info_map_reduce``: score articles for fake-news risk.
+
+    Articles are split into batches of ``AIConfig.batch_size`` and each batch
+    is scored in a concurrent call (at most ``AIConfig.map_reduce_workers``
+    at once). The result does not depend on the final prompt, so digests
+    with the same articles can share it.
 
+    Returns:
+        The ``AIConfig.map_reduce_candidates`` highest scored candidates.
+    """
+    client = client or get_openai_client()
+    if client is None:
+        return []
+
+    batch_size = max(settings.ai.batch_size, 1)
+    numbered = list(enumerate(articles, 1))
+    batches = [
+        numbered[i : i + batch_size] for i in range(0, len(numbered), batch_size)
+    ]
+
+    cache = _open_cache(use_cache)
     try:
-        print("🤖 Asking AI for analysis...")
-        client = OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=settings.ai.model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": NEWS_ANALYSIS_PROMPT.format(news=news),
-                }
-            ],
-            # gpt-5-mini does not support a temperature parameter; rely on model defaults.
-            max_completion_tokens=settings.ai.max_completion_tokens,
+        logger.info(
+            f"🤖 Scoring {len(articles)} articles in {len(batches)} batches "
+            f"({settings.ai.map_reduce_workers} parallel calls)..."
         )
-        ai_content = response.choices[0].message.content
-        print("✅ AI analysis received!")
-        cleaned_html = clean_ai_html_response(ai_content)
-        return cleaned_html
-    except Exception as e:  # pragma: no cover - network/API errors
-        print(f"Error calling OpenAI: {e}")
-        return news
+        with ThreadPoolExecutor(max_workers=settings.ai.map_reduce_workers) as pool:
+            scored = pool.map(
+                bind_context(lambda batch: _score_batch(batch, cache, client)), batches
+            )
+            candidates = [candidate for batch in scored for candidate in batch]
+    finally:
+        _close_cache(cache)
+
+    candidates.sort(key=lambda candidate: candidate["score"], reverse=True)
+    candidates = candidates[: settings.ai.map_reduce_candidates]
+    logger.info(f"✅ {len(candidates)} fake-news candidates selected for the final analysis")
+    return candidates
+
 
+def headline_list(articles: list[Article]) -> str:
+    """The bare headline list ``get_ai_info_map_reduce`` returns without a model answer."""
+    return "\n".join(f"{a.title}\n   {a.link}" for a in articles)
 
 
+def get_ai_info_map_reduce(
+    articles: list[Article],
+    use_cache: bool = True,
+    prompt_template: str = NEWS_ANALYSIS_PROMPT,
+    candidates: Optional[list[dict]] = None,
+) -> str:
+    """
+    Analyze news with parallel batch scoring followed by one reduce call.
+
+    Map: the articles are scored in batches (``score_candidates``). Reduce:
+    the highest scored candidates plus the bare list of headlines go through
+    ``prompt_template`` (by default ``NEWS_ANALYSIS_PROMPT``, which produces
+    the top-5 section and the daily conclusion) from a much shorter input.
+
+    Args:
+        articles: Articles of every source, in prompt order.
+        prompt_template: Final prompt with a ``{news}`` placeholder.
+        candidates: Result of ``score_candidates`` for these articles, to
+            skip the map step.
+
+    Returns:
+        AI analysis as an HTML string.
+    """
+    fallback = headline_list(articles)
+    client = get_openai_client()
+    if client is None:
+        return fallback
+
+    if candidates is None:
+        candidates = score_candidates(articles, use_cache, client)
+
+    cache = _open_cache(use_cache)
+    try:
+        logger.info("🤖 Asking AI for the final analysis...")
+        prompt = prompt_template.format(
+            news=_build_reduce_input(articles, candidates)
+        )
+        params = {"max_completion_tokens": settings.ai.max_completion_tokens}
+        ai_content = _complete(prompt, params, cache, client, stream=settings.ai.stream)
+        if ai_content is None:
+            return fallback
+        logger.info("✅ AI analysis received!")
+        return ai_content if settings.ai.stream else clean_ai_html_response(ai_content)
+    finally:
+        _close_cache(cache)
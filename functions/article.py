@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+
+@dataclass(slots=True)
+class Article:
+    """
+    One scraped headline, as passed between scraping, dedupe and the AI layer.
+
+    Slotted, so thousands of articles cost a fraction of the equivalent dicts
+    (no per-instance ``__dict__``). Equality ignores ``scraped_at``: the same
+    headline scraped twice is the same article.
+    """
+
+    title: str
+    link: str
+    # Registry name of the source it was scraped from.
+    source: str = ""
+    # Unix time of the scrape.
+    scraped_at: float = field(default=0.0, compare=False)
+    # Near-duplicate cluster this article represents (None without duplicates).
+    cluster_id: Optional[int] = None
+    # Links of every article of the cluster, this one's first.
+    links: tuple[str, ...] = ()
+
+    def as_dict(self) -> dict:
+        """The article as a JSON-serializable dict."""
+        return {
+            "title": self.title,
+            "link": self.link,
+            "source": self.source,
+            "scraped_at": self.scraped_at,
+            "cluster_id": self.cluster_id,
+            "links": list(self.links),
+        }
+
+
+def iter_formatted(header: str, articles: Iterable[Article]) -> Iterator[str]:
+    """
+    Yield the numbered prompt text of one source, piece by piece.
+
+    Near-duplicate clusters list the links of every merged article.
+    """
+    yield f"{header}\n\n"
+    for i, article in enumerate(articles, 1):
+        if len(article.links) > 1:
+            merged = "".join(f"   {link}\n" for link in article.links[1:])
+            yield f"{i}. {article.title}\n   {article.link}\n{merged}\n"
+        else:
+            yield f"{i}. {article.title}\n   {article.link}\n\n"
+
+
+def write_formatted(
+    sections: Iterable[tuple[str, Iterable[Article]]],
+    buffer: Optional[io.StringIO] = None,
+) -> io.StringIO:
+    """
+    Write (header, articles) sections into one text buffer.
+
+    Sections are separated by a blank line. Only the buffer grows with the
+    number of articles, so formatting is linear in the output size.
+
+    Returns:
+        The buffer (a new ``StringIO`` unless one is given).
+    """
+    buffer = io.StringIO() if buffer is None else buffer
+    for index, (header, articles) in enumerate(sections):
+        if index:
+            buffer.write("\n\n")
+        buffer.writelines(iter_formatted(header, articles))
+    return buffer
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import NewsConfig, settings
+from functions.article import Article
+
+
+def normalize_link(link: str) -> str:
+    """
+    Normalize an article URL so cosmetic differences map to one key.
+
+    Lowercases scheme and host, drops ``www.``, the fragment, ``utm_*``
+    tracking parameters and the trailing slash.
+    """
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(
+        [
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_")
+        ]
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, query, ""))
+
+
+def title_hash(title: str) -> str:
+    """Hash a title after case-folding and collapsing whitespace."""
+    normalized = unicodedata.normalize("NFC", title).casefold()
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class ArticleStore:
+    """
+    Persistent record of every article already scraped.
+
+    Articles are keyed by their normalized link plus a hash of the title, so a
+    Biziday item without its own link (which falls back to the homepage URL)
+    is still told apart by its text. The store lets a run keep only the
+    articles that were not seen in any previous run.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                link_key TEXT NOT NULL,
+                title_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                link TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (link_key, title_hash)
+            )
+            """
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Optional[NewsConfig] = None) -> "ArticleStore":
+        """Open the store at ``NewsConfig.article_store_path``."""
+        config = config or settings.news
+        return cls(config.article_store_path)
+
+    @staticmethod
+    def _key(article: Article) -> tuple[str, str]:
+        return normalize_link(article.link), title_hash(article.title)
+
+    def filter_new(self, articles: list[Article]) -> list[Article]:
+        """Return the articles that are not in the store yet, in input order."""
+        if not articles:
+            return []
+        keys = [self._key(article) for article in articles]
+        with self._lock:
+            seen: set[tuple[str, str]] = set()
+            for link_key, hashed in keys:
+                row = self._db.execute(
+                    "SELECT 1 FROM articles WHERE link_key = ? AND title_hash = ?",
+                    (link_key, hashed),
+                ).fetchone()
+                if row is not None:
+                    seen.add((link_key, hashed))
+        return [
+            article for article, key in zip(articles, keys) if key not in seen
+        ]
+
+    def record(self, articles: list[Article], source: str) -> int:
+        """
+        Mark articles as seen.
+
+        Returns:
+            Number of articles that were not in the store before.
+        """
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO articles "
+                "(link_key, title_hash, source, title, link, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*self._key(article), source, article.title, article.link, now, now)
+                    for article in articles
+                ],
+            )
+            inserted = self._db.total_changes - before
+            self._db.executemany(
+                "UPDATE articles SET last_seen = ? WHERE link_key = ? AND title_hash = ?",
+                [(now, *self._key(article)) for article in articles],
+            )
+            self._db.commit()
+        return inserted
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._db.close()
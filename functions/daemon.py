@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from config import DaemonConfig, settings
+
+logger = logging.getLogger(__name__)
+
+# (name, lowest, highest) of the five cron fields; day of week 7 is Sunday too.
+CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+# Give up looking for a matching time after this long (e.g. "0 0 30 2 *").
+_MAX_LOOKAHEAD = timedelta(days=5 * 366)
+
+
+def _parse_cron_field(text: str, name: str, low: int, high: int) -> frozenset[int]:
+    """
+    Parse one cron field: ``*``, numbers, ranges and steps, comma separated.
+
+    Raises:
+        ValueError: If the field is malformed or out of range.
+    """
+    values: set[int] = set()
+    for part in text.split(","):
+        body, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if body == "*":
+                start, end = low, high
+            elif "-" in body:
+                first, last = body.split("-", 1)
+                start, end = int(first), int(last)
+            else:
+                start = int(body)
+                # "5/15" means every 15 starting at 5.
+                end = high if step_text else start
+        except ValueError:
+            raise ValueError(f"Invalid cron {name} field {text!r}") from None
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron {name} field {text!r} (allowed {low}-{high})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    A five-field cron expression (minute hour day-of-month month day-of-week).
+
+    Supports ``*``, lists, ranges and steps (``*/15``, ``1-5``, ``7,12,18``)
+    with the usual cron rule that a time matches either day field when both
+    are restricted. Times are naive local datetimes.
+
+    Raises:
+        ValueError: If the expression is malformed.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(
+                f"Cron expression {expression!r} must have 5 fields "
+                "(minute hour day-of-month month day-of-week)"
+            )
+        parsed = [
+            _parse_cron_field(text, name, low, high)
+            for text, (name, low, high) in zip(fields, CRON_FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Cron counts weekdays from Sunday (0 or 7).
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # "*/2" is unrestricted for cron's either-day rule, like "*".
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        The first matching minute strictly after ``moment``.
+
+        Raises:
+            ValueError: If the expression never matches (e.g. February 30).
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + _MAX_LOOKAHEAD
+        while candidate < limit:
+            if candidate.month not in self.months:
+                first = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (first + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+
+@dataclass
+class RunRecord:
+    """One run started by the daemon."""
+
+    # "scheduled" or "trigger" (the HTTP endpoint).
+    reason: str
+    only_new: bool
+    started_at: float
+    duration: float = 0.0
+    status: str = "running"
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "reason": self.reason,
+            "only_new": self.only_new,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 3),
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class NewsDaemon:
+    """
+    Long-running process that runs a job on a cron schedule and on demand.
+
+    ``job(reason, only_new)`` is one full digest run; whatever it keeps in
+    the process (clients, connection pools, caches, settings) stays warm
+    between runs. Scheduled runs start a random ``0..jitter_seconds`` after
+    their time, so several daemons do not hit the news sites at once. Runs
+    never overlap: a run due while the previous one is still going is
+    skipped and logged.
+
+    With ``DaemonConfig.port`` set, a local HTTP endpoint answers
+    ``GET /health`` (state of the daemon and of the last run, as JSON) and
+    ``POST /run[?only_new=1]``, which starts a run at once (202) or reports
+    the run in progress (409).
+    """
+
+    def __init__(
+        self,
+        job: Callable[[str, bool], None],
+        config: Optional[DaemonConfig] = None,
+    ) -> None:
+        self.job = job
+        self.config = config or settings.daemon
+        self.schedule = CronSchedule(self.config.schedule)
+        self.started_at = time.time()
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[RunRecord] = None
+        self.runs = 0
+        self.skipped = 0
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    @property
+    def address(self) -> Optional[tuple[str, int]]:
+        """(host, port) of the endpoint once it listens."""
+        return self._server.server_address[:2] if self._server is not None else None
+
+    def trigger(self, reason: str = "trigger", only_new: Optional[bool] = None) -> bool:
+        """
+        Start a run in the background unless one is in progress.
+
+        Returns:
+            True if the run was started.
+        """
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            logger.warning(f"⏭️ Skipping {reason} run: the previous run is still in progress")
+            return False
+        record = RunRecord(
+            reason,
+            self.config.only_new if only_new is None else only_new,
+            time.time(),
+        )
+        self.last_run = record
+        self._worker = threading.Thread(
+            target=self._run, args=(record,), name="digest-run"
+        )
+        self._worker.start()
+        return True
+
+    def _run(self, record: RunRecord) -> None:
+        start = time.perf_counter()
+        try:
+            logger.info(f"▶️ Starting {record.reason} run")
+            self.job(record.reason, record.only_new)
+            record.status = "ok"
+        except Exception as e:
+            record.status = "error"
+            record.error = f"{type(e).__name__}: {e}"
+            logger.exception(f"❌ The {record.reason} run failed")
+        finally:
+            record.duration = time.perf_counter() - start
+            self.runs += 1
+            self._running.release()
+
+    def health(self) -> dict[str, Any]:
+        """The state reported by ``GET /health``."""
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started_at, 3),
+            "running": self.running,
+            "schedule": self.schedule.expression,
+            "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "last_run": self.last_run.as_dict() if self.last_run else None,
+        }
+
+    def start(self) -> None:
+        """Start the endpoint and the scheduler threads."""
+        if self.config.port is not None:
+            handler = type("Handler", (_EndpointHandler,), {"daemon": self})
+            self._server = ThreadingHTTPServer((self.config.host, self.config.port), handler)
+            self._server.daemon_threads = True
+            threading.Thread(
+                target=self._server.serve_forever, name="daemon-endpoint", daemon=True
+            ).start()
+            host, port = self.address
+            logger.info(f"🩺 Listening on http://{host}:{port} (GET /health, POST /run)")
+        threading.Thread(target=self._schedule_loop, name="daemon-scheduler", daemon=True).start()
+
+    def _schedule_loop(self) -> None:
+        slot = datetime.now()
+        while not self._stop.is_set():
+            # Never before the last slot: a wait that ends a little early
+            # must not schedule the same slot twice.
+            slot = self.schedule.next_after(max(datetime.now(), slot))
+            self.next_run = slot + timedelta(
+                seconds=random.uniform(0, max(self.config.jitter_seconds, 0))
+            )
+            logger.info(f"🕒 Next run at {self.next_run:%Y-%m-%d %H:%M:%S}")
+            delay = (self.next_run - datetime.now()).total_seconds()
+            if self._stop.wait(max(delay, 0)):
+                return
+            self.trigger("scheduled")
+
+    def stop(self) -> None:
+        """Ask ``serve`` to return (after the run in progress)."""
+        self._stop.set()
+
+    def serve(self) -> None:
+        """
+        Run until ``stop``, SIGTERM or Ctrl+C, then wait for the run in progress.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        self.start()
+        try:
+            self._stop.wait()
+        except KeyboardInterrupt:
+            self.stop()
+        logger.info("🛑 Stopping the daemon...")
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._worker is not None and self._worker.is_alive():
+            logger.info("⏳ Waiting for the current run to finish")
+            self._worker.join()
+
+
+class _EndpointHandler(BaseHTTPRequestHandler):
+    """Local trigger / health endpoint of a ``NewsDaemon``."""
+
+    daemon: NewsDaemon
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path == "/health":
+            self._reply(200, self.daemon.health())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/run":
+            self._reply(404, {"error": "not found"})
+            return
+        flag = parse_qs(url.query).get("only_new", [""])[-1].lower()
+        only_new = flag in ("1", "true", "yes") if flag else None
+        if self.daemon.trigger("trigger", only_new):
+            self._reply(202, {"started": True, "run": self.daemon.last_run.as_dict()})
+        else:
+            self._reply(409, {"started": False, "error": "a run is in progress"})
+
+    def _reply(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"🩺 {self.address_string()} {format % args}")
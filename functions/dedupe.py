@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import re
+import unicodedata
+from dataclasses import replace
+from typing import Optional
+
+from config import NewsConfig, settings
+from functions.article import Article
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a Romanian headline for similarity comparison.
+
+    Case-folds, decomposes and drops every combining mark, so the comma-below
+    (ș, ț) and cedilla (ş, ţ) spellings, as well as ă/â/î, all fold to their
+    base letters. Punctuation is removed and whitespace collapsed.
+    """
+    decomposed = unicodedata.normalize("NFKD", title.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_WORD_RE.findall(stripped))
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def shingles(text: str, size: int) -> frozenset[int]:
+    """Hashed character ``size``-grams of ``text``."""
+    if len(text) <= size:
+        return frozenset({_hash64(text)})
+    return frozenset(_hash64(text[i : i + size]) for i in range(len(text) - size + 1))
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    """Exact Jaccard similarity of two shingle sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """
+    MinHash signatures with banded locality-sensitive hashing.
+
+    Each of the ``bands * rows`` hash functions is a random 64-bit XOR mask
+    applied to the shingle hashes, so a signature is computed with C-level
+    ``min(map(...))`` calls. Items that agree on all rows of at least one band
+    become candidate pairs; only candidates are compared exactly, which keeps
+    clustering close to linear in the number of items.
+    """
+
+    def __init__(self, bands: int = 24, rows: int = 4, seed: int = 1) -> None:
+        self.bands = bands
+        self.rows = rows
+        generator = random.Random(seed)
+        self.masks = [generator.getrandbits(64) for _ in range(bands * rows)]
+
+    def signature(self, shingle_set: frozenset[int]) -> tuple[int, ...]:
+        """MinHash signature of one shingle set."""
+        return tuple(min(map(mask.__xor__, shingle_set)) for mask in self.masks)
+
+    def candidate_pairs(self, signatures: list[tuple[int, ...]]) -> set[tuple[int, int]]:
+        """Pairs of item indices sharing at least one LSH band bucket."""
+        pairs: set[tuple[int, int]] = set()
+        for band in range(self.bands):
+            start = band * self.rows
+            buckets: dict[tuple[int, ...], list[int]] = {}
+            for index, signature in enumerate(signatures):
+                buckets.setdefault(signature[start : start + self.rows], []).append(index)
+            for members in buckets.values():
+                for i, first in enumerate(members):
+                    for second in members[i + 1 :]:
+                        pairs.add((first, second))
+        return pairs
+
+
+def cluster_near_duplicates(
+    titles: list[str],
+    threshold: float = 0.6,
+    shingle_size: int = 5,
+    lsh: Optional[MinHashLSH] = None,
+    min_length: int = 10,
+) -> list[list[int]]:
+    """
+    Group near-duplicate titles.
+
+    Titles shorter than ``min_length`` characters once normalized (empty
+    ones included) all look alike and are left as singletons.
+
+    Returns:
+        Clusters as lists of indices into ``titles``, each in ascending order,
+        ordered by their first index. Singletons are included.
+    """
+    lsh = lsh or MinHashLSH()
+    normalized = [normalize_title(title) for title in titles]
+    eligible = [index for index, text in enumerate(normalized) if len(text) >= min_length]
+    shingle_sets = [shingles(normalized[index], shingle_size) for index in eligible]
+    signatures = [lsh.signature(shingle_set) for shingle_set in shingle_sets]
+
+    parent = list(range(len(titles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for first, second in lsh.candidate_pairs(signatures):
+        if jaccard(shingle_sets[first], shingle_sets[second]) >= threshold:
+            root_a, root_b = find(eligible[first]), find(eligible[second])
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters: dict[int, list[int]] = {}
+    for index in range(len(titles)):
+        clusters.setdefault(find(index), []).append(index)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def dedupe_articles(
+    results: dict[str, list[Article]],
+    config: Optional[NewsConfig] = None,
+) -> dict[str, list[Article]]:
+    """
+    Collapse near-duplicate articles across all sources.
+
+    The first article of each cluster (in source order) is kept as its
+    representative; a copy of it with the cluster's ``cluster_id`` and the
+    ``links`` of every article in the cluster replaces it, and the other
+    members are dropped. Input articles are not modified.
+
+    Returns:
+        Per-source article lists in the same shape as the input.
+    """
+    config = config or settings.news
+    flat = [
+        (source, article) for source, items in results.items() for article in items
+    ]
+    clusters = cluster_near_duplicates(
+        [article.title for _, article in flat],
+        threshold=config.dedupe_threshold,
+        shingle_size=config.dedupe_shingle_size,
+        min_length=config.dedupe_min_title_length,
+    )
+
+    keep: dict[int, Article] = {}
+    for cluster_id, members in enumerate(clusters):
+        representative = flat[members[0]][1]
+        if len(members) > 1:
+            links = tuple(dict.fromkeys(flat[member][1].link for member in members))
+            representative = replace(representative, cluster_id=cluster_id, links=links)
+        keep[members[0]] = representative
+
+    deduped: dict[str, list[Article]] = {source: [] for source in results}
+    for index, (source, _) in enumerate(flat):
+        if index in keep:
+            deduped[source].append(keep[index])
+
+    removed = len(flat) - len(keep)
+    if removed:
+        merged = sum(1 for members in clusters if len(members) > 1)
+        logger.info(f"🧹 Collapsed {removed} near-duplicate articles into {merged} clusters")
+    return deduped
@@ -1,70 +1,63 @@
 from __future__ import annotations
 
 import base64
+import logging
 import os
-import re
+import random
+import queue
+import secrets
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Optional, Union
+from email.utils import formataddr, formatdate, parseaddr
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Optional, Union
+
+# The Google API client stack is slow to import; it is loaded when a
+# GmailSender first authenticates.
+GMAIL_AVAILABLE = all(
+    find_spec(name) is not None for name in ("googleapiclient", "google_auth_oauthlib")
+)
+
+if TYPE_CHECKING:
+    import smtplib
 
-try:
-    from google.auth.transport.requests import Request
     from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
 
-    GMAIL_AVAILABLE = True
-except ImportError:  # pragma: no cover - optional dependency
-    GMAIL_AVAILABLE = False
+from config import SmtpConfig, settings
+from functions.html_sanitizer import extract_body
+from functions.html_text import html_to_text
+from functions.metrics import bind_context, count, span
 
-from config import settings
+logger = logging.getLogger(__name__)
 
 
 def prepare_html_for_email(html_content: str) -> str:
     """
     Convert a full HTML document to email-compatible HTML.
 
-    Email clients typically expect only the `<body>` contents.
+    Email clients typically expect only the `<body>` contents; DOCTYPE, html
+    and head are dropped in a single pass and the content is left as is
+    (model output is cleaned earlier, by ``clean_ai_html_response``).
     """
-    # Extract body content using regex (works even without BeautifulSoup)
-    body_pattern = r"<body[^>]*>(.*?)</body>"
-    body_match = re.search(body_pattern, html_content, re.DOTALL | re.IGNORECASE)
-    if body_match:
-        body_content = body_match.group(1).strip()
-        if (
-            body_content
-            and "<!DOCTYPE" not in body_content
-            and not body_content.strip().startswith("<html")
-        ):
-            return body_content
-
-    # If BeautifulSoup is available, use it for more robust parsing
-    try:
-        from bs4 import BeautifulSoup  # type: ignore
-
-        soup = BeautifulSoup(html_content, "html.parser")
-        if soup.find("html"):
-            body_tag = soup.find("body")
-            if body_tag:
-                body_html = body_tag.decode_contents().strip()
-                if (
-                    "<!DOCTYPE" not in body_html
-                    and not body_html.strip().startswith("<html")
-                ):
-                    return body_html
-        return str(soup).strip()
-    except Exception:
-        pass
-
-    # If no body tag found, check if it's already body content
-    if not html_content.strip().startswith("<!DOCTYPE") and not html_content.strip().startswith(
-        "<html"
-    ):
-        return html_content
-
-    return html_content
+    return extract_body(html_content)
+
+
+def html_to_plain_text(html_body: str, width: Optional[int] = None) -> str:
+    """
+    Build the text/plain alternative of an HTML email body.
+
+    Rendered by ``PlainTextRenderer``: bullets, headings and link URLs are
+    kept and lines are wrapped to ``width`` (default
+    ``GmailConfig.plain_text_width``).
+    """
+    return html_to_text(html_body, width)
 
 
 def plain_text_to_html(text: str) -> str:
@@ -218,178 +211,823 @@ def plain_text_to_html(text: str) -> str:
     return html
 
 
-def send_email_with_gmail(
+# Gmail API scopes
+SCOPES = [
+    "https://www.googleapis.com/auth/gmail.send",
+    "https://www.googleapis.com/auth/gmail.readonly",
+]
+
+
+def render_email_parts(body: str, is_html: bool = True) -> tuple[str, Optional[str]]:
+    """
+    Prepare the text/plain and text/html parts of an email body.
+
+    Plain text bodies sent as HTML are converted with ``plain_text_to_html``;
+    full HTML documents are reduced to their ``<body>`` contents.
+
+    Returns:
+        (plain text, email HTML), the HTML being None when ``is_html`` is False.
+    """
+    if not is_html:
+        return body, None
+
+    # Check if it's already HTML
+    if not body.startswith("<!DOCTYPE") and not body.startswith("<html") and not body.strip().startswith("<"):
+        # Convert plain text to HTML
+        body = plain_text_to_html(body)
+
+    # Extract only the body content (email clients don't like full HTML documents)
+    html_body = prepare_html_for_email(body)
+
+    # Create plain text version from HTML
+    return html_to_plain_text(html_body), html_body
+
+
+def _build_multipart(
+    subject: str,
+    body: str,
+    from_header: str,
+    is_html: bool,
+) -> MIMEMultipart:
+    """Build the recipient-independent part of the message."""
+    message = MIMEMultipart("alternative")
+    message["from"] = from_header
+    message["subject"] = subject
+
+    plain_text, html_body = render_email_parts(body, is_html)
+    message.attach(MIMEText(plain_text, "plain", "utf-8"))
+    if html_body is not None:
+        message.attach(MIMEText(html_body, "html", "utf-8"))
+    return message
+
+
+def build_email_message(
     to_email: Union[str, list[str]],
     subject: str,
     body: str,
-    credentials_file: Optional[str] = None,
-    token_file: Optional[str] = None,
-    from_email: Optional[str] = None,
-    from_name: Optional[str] = None,
+    from_header: str,
     is_html: bool = True,
-) -> bool:
+) -> MIMEMultipart:
     """
-    Send an email using the Gmail API with OAuth2 authentication.
-    
+    Build the multipart (plain + HTML) message for one recipient.
+
     Args:
-        from_name: Display name for sender (e.g., "AI News"). If provided,
-                   the From header will show as "AI News <email@example.com>"
+        from_header: Complete From header, e.g. "AI News <email@example.com>".
+    """
+    message = _build_multipart(subject, body, from_header, is_html)
+    message["to"] = ", ".join(to_email) if isinstance(to_email, list) else to_email
+    return message
+
+
+def _addresses(to_email: Union[str, list[str]]) -> list[str]:
+    """One address or a list of them, as a list."""
+    return [to_email] if isinstance(to_email, str) else list(to_email)
+
+
+class RenderedEmail:
+    """
+    A message rendered and serialized once, stamped per recipient.
+
+    The body parts, the shared headers and the MIME serialization are produced
+    a single time; ``for_recipient`` only prepends the ``To``,
+    ``Message-ID`` and ``Date`` headers. The stamped header block is padded
+    to a multiple of 3 bytes (with whitespace after ``To:``), so the base64url
+    form of the shared payload is also computed once and ``encode_for`` just
+    concatenates two strings.
     """
-    if not GMAIL_AVAILABLE:
-        print(
-            "Error: Google API libraries not installed. Install with: "
-            "pip install google-auth google-auth-oauthlib "
-            "google-auth-httplib2 google-api-python-client"
+
+    def __init__(
+        self,
+        subject: str,
+        body: str,
+        from_header: str,
+        is_html: bool = True,
+    ) -> None:
+        message = _build_multipart(subject, body, from_header, is_html)
+        self.payload = message.as_bytes()
+        self.encoded_payload = base64.urlsafe_b64encode(self.payload).decode("ascii")
+        # SMTP needs CRLF line endings; smtplib only converts str messages.
+        self.smtp_payload = self.payload.replace(b"\n", b"\r\n")
+        self.from_address = parseaddr(from_header)[1]
+        self.domain = self.from_address.rpartition("@")[2] or "localhost"
+
+    def message_id(self, idempotency_key: Optional[str] = None) -> str:
+        """Message-ID for a delivery; derived from ``idempotency_key`` if given."""
+        token = idempotency_key[:32] if idempotency_key else secrets.token_hex(16)
+        return f"<{token}@{self.domain}>"
+
+    def stamp(
+        self,
+        to_email: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[bytes, str]:
+        """
+        Build the per-recipient header block.
+
+        Returns:
+            (``To``, ``Message-ID`` and ``Date`` headers, the Message-ID)
+        """
+        addresses = _addresses(to_email)
+        # formataddr RFC 2047-encodes non-ASCII display names.
+        to_value = ", ".join(
+            address if address.isascii() else formataddr(parseaddr(address))
+            for address in addresses
         )
+        message_id = self.message_id(idempotency_key)
+        headers = (
+            f"To: {to_value}\nMessage-ID: {message_id}\n"
+            f"Date: {formatdate(localtime=True)}\n"
+        ).encode("utf-8")
+        # Extra folding whitespace after "To:" pads the block to a multiple of 3 bytes.
+        padding = -len(headers) % 3
+        if padding:
+            headers = b"To:" + b" " * padding + headers[3:]
+        return headers, message_id
+
+    def for_recipient(
+        self,
+        to_email: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> bytes:
+        """Return the complete RFC 5322 message for ``to_email``."""
+        return self.stamp(to_email, idempotency_key)[0] + self.payload
+
+    def encode_for(
+        self,
+        to_email: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Return the base64url message for ``to_email``, as the Gmail API expects."""
+        headers = self.stamp(to_email, idempotency_key)[0]
+        return base64.urlsafe_b64encode(headers).decode("ascii") + self.encoded_payload
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Allows bursts of up to ``capacity`` calls and a sustained ``rate`` calls
+    per second; ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until the bucket has refilled enough."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class SendResult:
+    """Outcome of sending to one recipient."""
+
+    recipient: str
+    ok: bool
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+@dataclass
+class BulkSendReport:
+    """Per-recipient results and throughput of a bulk send."""
+
+    results: list[SendResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> list[SendResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+def _is_retryable(error: Exception) -> bool:
+    """True for Gmail rate-limit answers (429 / 403 rateLimitExceeded) and 5xx."""
+    # Only an already imported Google client can have raised an HttpError.
+    errors = sys.modules.get("googleapiclient.errors")
+    if errors is None or not isinstance(error, errors.HttpError):
+        return False
+    status = error.resp.status
+    if status == 429 or status >= 500:
+        return True
+    if status == 403:
+        content = error.content.decode("utf-8", "replace") if error.content else ""
+        return "rateLimitExceeded" in content or "userRateLimitExceeded" in content
+    return False
+
+
+class DeliveryBackend(ABC):
+    """
+    Base class of the transports that deliver digests.
+
+    Subclasses implement ``authenticate`` and ``deliver`` (and ``close`` if
+    they hold connections); rendering, single sends and concurrent bulk sends
+    are shared.
+    """
+
+    # Backend name, used as the ``backend`` metrics label.
+    name = "email"
+    from_email: Optional[str] = None
+    from_name: Optional[str] = None
+
+    @property
+    def workers(self) -> int:
+        """Default number of concurrent deliveries for ``send_bulk``."""
+        return 1
+
+    @abstractmethod
+    def authenticate(self) -> bool:
+        """Prepare the transport; False if it cannot send."""
+
+    @abstractmethod
+    def deliver(
+        self,
+        rendered: RenderedEmail,
+        recipient: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[str, int]:
+        """
+        Deliver a rendered message to one recipient (or one list of them,
+        all in the same ``To`` header).
+
+        ``idempotency_key`` fixes the Message-ID, so a retried delivery
+        carries the same Message-ID as the earlier attempt.
+
+        Returns:
+            (message ID, number of attempts)
+        """
+
+    def deliver_timed(
+        self,
+        rendered: RenderedEmail,
+        recipient: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[str, int]:
+        """
+        ``deliver`` inside an ``email.deliver`` span, counting sent and failed
+        emails and delivery attempts per backend.
+
+        Returns:
+            (message ID, number of attempts)
+        """
+        with span("email.deliver", backend=self.name) as record:
+            try:
+                message_id, attempts = self.deliver(rendered, recipient, idempotency_key)
+            except Exception:
+                count("emails_failed", backend=self.name)
+                raise
+            record.attributes["attempts"] = attempts
+        count("emails_sent", backend=self.name)
+        count("email_attempts", attempts, backend=self.name)
+        return message_id, attempts
+
+    def was_delivered(self, message_id: str) -> bool:
+        """
+        Check whether a message with ``message_id`` was already sent.
+
+        Transports that cannot tell return False, so the message is resent.
+        """
         return False
 
-    # Gmail API scopes
-    SCOPES = [
-        "https://www.googleapis.com/auth/gmail.send",
-        "https://www.googleapis.com/auth/gmail.readonly",
-    ]
+    def close(self) -> None:
+        """Release any connections held by the transport."""
 
-    creds = None
+    @property
+    def from_header(self) -> str:
+        """From header, with the display name if one was given."""
+        # Format "From" with display name if provided (e.g., "AI News <email@example.com>")
+        if self.from_name:
+            return formataddr((self.from_name, self.from_email))
+        return self.from_email or ""
+
+    def send(
+        self,
+        to_email: Union[str, list[str]],
+        subject: str,
+        body: str,
+        is_html: bool = True,
+    ) -> bool:
+        """Send one message through the transport."""
+        if not self.authenticate():
+            return False
+
+        try:
+            rendered = RenderedEmail(subject, body, self.from_header, is_html=is_html)
+            message_id, _ = self.deliver_timed(rendered, to_email)
+
+            logger.info(f"✅ Email sent successfully! Message ID: {message_id}")
+            return True
 
-    credentials_file = credentials_file or settings.gmail.credentials_file
-    token_file = token_file or settings.gmail.token_file
+        except Exception as e:  # pragma: no cover - unexpected errors
+            logger.error(f"Unexpected error: {e}")
+            return False
 
-    # Load existing token if available
-    if os.path.exists(token_file):
+    def send_rendered(self, recipient: str, rendered: RenderedEmail) -> SendResult:
+        """Stamp and send a rendered message to one recipient, capturing any error."""
         try:
-            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
-        except Exception as e:
-            print(f"Error loading token: {e}")
-            creds = None
-
-    # If there are no (valid) credentials available, let the user log in
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+            message_id, attempts = self.deliver_timed(rendered, recipient)
+            return SendResult(recipient, True, message_id=message_id, attempts=attempts)
+        except Exception as e:  # pragma: no cover - network/API errors
+            return SendResult(recipient, False, error=str(e))
+
+    def send_bulk(
+        self,
+        recipients: list[str],
+        subject: str,
+        body: str,
+        is_html: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> BulkSendReport:
+        """
+        Send the same message to many recipients concurrently.
+
+        The message is rendered once (see ``RenderedEmail``) and delivered on
+        a pool of ``workers`` threads.
+
+        Returns:
+            A report with one ``SendResult`` per recipient, in input order.
+        """
+        report = BulkSendReport()
+        if not self.authenticate():
+            report.results = [
+                SendResult(recipient, False, error="authentication failed")
+                for recipient in recipients
+            ]
+            return report
+
+        start = time.perf_counter()
+        workers = max_workers or self.workers
+        with span("email.send_bulk", backend=self.name, recipients=len(recipients)):
+            rendered = RenderedEmail(subject, body, self.from_header, is_html=is_html)
+            send_one = bind_context(lambda recipient: self.send_rendered(recipient, rendered))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                report.results = list(pool.map(send_one, recipients))
+        report.elapsed = time.perf_counter() - start
+
+        logger.info(
+            f"✅ Sent {report.sent}/{len(recipients)} emails in {report.elapsed:.2f}s "
+            f"({report.messages_per_second:.1f} messages/s)"
+        )
+        for result in report.failed:
+            logger.error(f"❌ {result.recipient}: {result.error}")
+        return report
+
+
+class GmailSender(DeliveryBackend):
+    """
+    Authenticated Gmail API session that sends any number of messages.
+
+    Credentials are loaded (and refreshed or obtained through the OAuth flow)
+    once, ``token.json`` is rewritten only when the token actually changed,
+    and the Gmail service and sender address are cached for every send.
+
+    Every send goes through a token-bucket limiter sized for Gmail's per-user
+    quota and is retried with exponential backoff on 429/``rateLimitExceeded``
+    and 5xx answers. ``send_bulk`` spreads sends over a bounded thread pool,
+    with one Gmail service per worker thread (service objects are not
+    thread-safe).
+    """
+
+    name = "gmail"
+
+    def __init__(
+        self,
+        credentials_file: Optional[str] = None,
+        token_file: Optional[str] = None,
+        from_email: Optional[str] = None,
+        from_name: Optional[str] = None,
+        credentials: Optional["Credentials"] = None,
+        api_endpoint: Optional[str] = None,
+    ) -> None:
+        self.credentials_file = credentials_file or settings.gmail.credentials_file
+        self.token_file = token_file or settings.gmail.token_file
+        self.from_email = from_email
+        self.from_name = from_name
+        # Endpoint override, e.g. a local fake of the Gmail API for testing.
+        self.api_endpoint = api_endpoint or settings.gmail.api_endpoint
+        self.service = None
+        self._creds = credentials
+        self._authenticated = False
+        self._local = threading.local()
+        self._limiter = TokenBucket(
+            settings.gmail.send_rate_per_second, settings.gmail.send_burst
+        )
+
+    @property
+    def workers(self) -> int:
+        return settings.gmail.send_workers
+
+    def _load_credentials(self) -> Optional["Credentials"]:
+        """Load, refresh or obtain OAuth credentials, persisting them if changed."""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        creds = None
+        stored_token: Optional[str] = None
+
+        # Load existing token if available
+        if os.path.exists(self.token_file):
             try:
-                creds.refresh(Request())
+                with open(self.token_file, encoding="utf-8") as token:
+                    stored_token = token.read()
+                creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
             except Exception as e:
-                print(f"Error refreshing token: {e}")
+                logger.error(f"Error loading token: {e}")
                 creds = None
 
-        if not creds:
-            if not os.path.exists(credentials_file):
-                print(
-                    f"Error: {credentials_file} not found. Please download OAuth2 "
-                    "credentials from Google Cloud Console."
-                )
-                return False
+        # If there are no (valid) credentials available, let the user log in
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                except Exception as e:
+                    logger.error(f"Error refreshing token: {e}")
+                    creds = None
+
+            if not creds:
+                if not os.path.exists(self.credentials_file):
+                    logger.error(
+                        f"Error: {self.credentials_file} not found. Please download OAuth2 "
+                        "credentials from Google Cloud Console."
+                    )
+                    return None
+
+                try:
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        self.credentials_file, SCOPES
+                    )
+                    creds = flow.run_local_server(port=0)
+                except Exception as e:
+                    logger.error(f"Error during authentication: {e}")
+                    return None
 
+        # Save the credentials for the next run, only if they changed
+        token_json = creds.to_json()
+        if token_json != stored_token:
             try:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    credentials_file, SCOPES
-                )
-                creds = flow.run_local_server(port=0)
+                with open(self.token_file, "w", encoding="utf-8") as token:
+                    token.write(token_json)
             except Exception as e:
-                print(f"Error during authentication: {e}")
-                return False
+                logger.warning(f"Warning: Could not save token: {e}")
 
-    # Save the credentials for the next run
-    try:
-        with open(token_file, "w", encoding="utf-8") as token:
-            token.write(creds.to_json())
-    except Exception as e:
-        print(f"Warning: Could not save token: {e}")
+        return creds
 
-    try:
-        # Build the Gmail service
-        service = build("gmail", "v1", credentials=creds)
+    def authenticate(self) -> bool:
+        """
+        Authenticate once and cache the Gmail service and sender address.
 
-        # Get user's email if not provided
-        if not from_email:
-            profile = service.users().getProfile(userId="me").execute()
-            from_email = profile["emailAddress"]
+        Returns:
+            True if the session is ready to send.
+        """
+        if self._authenticated:
+            return True
 
-        # Create the email message
-        message = MIMEMultipart("alternative")
-        message["to"] = ", ".join(to_email) if isinstance(to_email, list) else to_email
-        # Format "From" with display name if provided (e.g., "AI News <email@example.com>")
-        if from_name:
-            from email.utils import formataddr
-            message["from"] = formataddr((from_name, from_email))
-        else:
-            message["from"] = from_email
-        message["subject"] = subject
-        message["MIME-Version"] = "1.0"
-
-        # Add body to email
-        if is_html:
-            # Check if it's already HTML
-            if not body.startswith("<!DOCTYPE") and not body.startswith("<html") and not body.strip().startswith("<"):
-                # Convert plain text to HTML
-                body = plain_text_to_html(body)
-
-            # Extract only the body content (email clients don't like full HTML documents)
-            if (
-                body.startswith("<!DOCTYPE")
-                or body.startswith("<html")
-                or "<body" in body
-            ):
-                html_body = prepare_html_for_email(body)
-            else:
-                html_body = body
+        if not GMAIL_AVAILABLE:
+            logger.error(
+                "Error: Google API libraries not installed. Install with: "
+                "pip install google-auth google-auth-oauthlib "
+                "google-auth-httplib2 google-api-python-client"
+            )
+            return False
 
-            # Clean any remaining DOCTYPE/html tags
-            if "<!DOCTYPE" in html_body or html_body.strip().startswith("<html"):
-                html_body = re.sub(
-                    r"<!DOCTYPE[^>]*>", "", html_body, flags=re.IGNORECASE
-                )
-                html_body = re.sub(
-                    r"<html[^>]*>", "", html_body, flags=re.IGNORECASE
+        if self._creds is None:
+            self._creds = self._load_credentials()
+        if self._creds is None:
+            return False
+
+        try:
+            # Build the Gmail service
+            self.service = self._build_service()
+            self._local.service = self.service
+
+            # Get user's email if not provided
+            if not self.from_email:
+                profile = self.service.users().getProfile(userId="me").execute()
+                self.from_email = profile["emailAddress"]
+        except Exception as e:  # pragma: no cover - network/API errors
+            logger.error(f"Error connecting to Gmail: {e}")
+            return False
+
+        self._authenticated = True
+        return True
+
+    def _build_service(self):
+        """Build a Gmail API service object for the session credentials."""
+        from googleapiclient.discovery import build
+
+        client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+        return build(
+            "gmail", "v1", credentials=self._creds, client_options=client_options
+        )
+
+    def _thread_service(self):
+        """Gmail service owned by the calling thread."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._build_service()
+            self._local.service = service
+        return service
+
+    def _send_raw(self, raw_message: str) -> tuple[str, int]:
+        """
+        Send an encoded message, rate limited and retried on quota errors.
+
+        Returns:
+            (Gmail message ID, number of attempts)
+        """
+        service = self._thread_service()
+        max_retries = settings.gmail.send_max_retries
+        for attempt in range(1, max_retries + 2):
+            self._limiter.acquire()
+            try:
+                response = (
+                    service.users()
+                    .messages()
+                    .send(userId="me", body={"raw": raw_message})
+                    .execute()
                 )
-                html_body = re.sub(r"</html>", "", html_body, flags=re.IGNORECASE)
-                html_body = re.sub(
-                    r"<head[^>]*>.*?</head>",
-                    "",
-                    html_body,
-                    flags=re.DOTALL | re.IGNORECASE,
+                return response["id"], attempt
+            except Exception as error:
+                if attempt > max_retries or not _is_retryable(error):
+                    raise
+                count("email_retries", backend=self.name, status=error.resp.status)
+                retry_after = error.resp.get("retry-after")
+                delay = (
+                    float(retry_after)
+                    if retry_after and retry_after.isdigit()
+                    else min(settings.gmail.send_backoff_base * 2 ** (attempt - 1), 60.0)
+                    * random.uniform(0.5, 1.5)
                 )
-                html_body = html_body.strip()
+                time.sleep(delay)
+        raise RuntimeError("unreachable")  # pragma: no cover
 
-            # Create plain text version from HTML
-            try:
-                from bs4 import BeautifulSoup  # type: ignore
+    def deliver(
+        self,
+        rendered: RenderedEmail,
+        recipient: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[str, int]:
+        """Send ``rendered`` to ``recipient`` through the Gmail API."""
+        return self._send_raw(rendered.encode_for(recipient, idempotency_key))
 
-                soup = BeautifulSoup(html_body, "html.parser")
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                plain_text = soup.get_text(separator="\n", strip=True)
-            except Exception:
-                plain_text = re.sub(r"<[^>]+>", "", html_body)
-                plain_text = re.sub(r"\n\s*\n", "\n\n", plain_text).strip()
-
-            # Create and attach MIME parts
-            plain_part = MIMEText(plain_text, "plain", "utf-8")
-            html_part = MIMEText(html_body, "html", "utf-8")
-            message.attach(plain_part)
-            message.attach(html_part)
+    def was_delivered(self, message_id: str) -> bool:
+        """Look the Message-ID up in the mailbox (needs the gmail.readonly scope)."""
+        if not self.authenticate():
+            return False
+        try:
+            response = (
+                self._thread_service()
+                .users()
+                .messages()
+                .list(userId="me", q=f"rfc822msgid:{message_id}", maxResults=1)
+                .execute()
+            )
+        except Exception:  # pragma: no cover - network/API errors
+            return False
+        return bool(response.get("messages"))
+
+
+def _is_connection_lost(error: Exception) -> bool:
+    """True if an SMTP error means the connection is gone (421 = closing channel)."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # smtplib is loaded by the first SmtpSender connection.
+    smtplib = sys.modules.get("smtplib")
+    if smtplib is None:
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    return isinstance(error, smtplib.SMTPServerDisconnected)
+
+
+class SmtpSender(DeliveryBackend):
+    """
+    SMTP delivery over a pool of persistent, authenticated connections.
+
+    Connections are opened lazily (STARTTLS or implicit TLS, then LOGIN when
+    credentials are configured), reused for many messages and recycled after
+    ``SmtpConfig.messages_per_connection`` messages. When a connection was
+    dropped by the server, the message is retried once on a newly opened one.
+    """
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        from_email: Optional[str] = None,
+        from_name: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        config: Optional[SmtpConfig] = None,
+    ) -> None:
+        self.config = config or settings.smtp
+        self.host = host or self.config.host
+        self.port = port or self.config.port
+        self.username = username or self.config.username
+        self.password = password or self.config.password
+        self.from_email = from_email or self.config.from_email or self.username
+        self.from_name = from_name
+        self.pool_size = pool_size or self.config.pool_size
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._sent_on: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    @property
+    def workers(self) -> int:
+        return self.pool_size
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection."""
+        import smtplib
+        import ssl
+
+        if self.config.use_ssl:
+            connection = smtplib.SMTP_SSL(
+                self.host, self.port, timeout=self.config.timeout,
+                context=ssl.create_default_context(),
+            )
         else:
-            message.attach(MIMEText(body, "plain", "utf-8"))
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.config.timeout)
+        try:
+            if self.config.starttls and not self.config.use_ssl:
+                connection.starttls(context=ssl.create_default_context())
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+            self._sent_on[id(connection)] = 0
+        count("smtp_connections_opened", host=self.host)
+        return connection
 
-        # Encode the message
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    def _checkout(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
 
-        # Send the message
-        send_message = (
-            service.users()
-            .messages()
-            .send(userId="me", body={"raw": raw_message})
-            .execute()
-        )
+    def _checkin(self, connection: smtplib.SMTP) -> None:
+        with self._lock:
+            self._sent_on[id(connection)] += 1
+            recycle = (
+                self._sent_on[id(connection)] >= self.config.messages_per_connection
+                # Never keep more than ``pool_size`` connections idle.
+                or self._idle.qsize() >= self.pool_size
+            )
+        if recycle:
+            self._discard(connection, graceful=True)
+        else:
+            self._idle.put(connection)
+
+    def _discard(self, connection: smtplib.SMTP, graceful: bool = False) -> None:
+        with self._lock:
+            self._sent_on.pop(id(connection), None)
+        try:
+            if graceful:
+                connection.quit()
+            else:
+                connection.close()
+        except Exception:
+            pass
 
-        print(f"✅ Email sent successfully! Message ID: {send_message['id']}")
+    def authenticate(self) -> bool:
+        """Open (and keep) one connection to check the server and credentials."""
+        if not self.from_email:
+            logger.error("Error: no sender address; set SMTP_FROM or SMTP_USERNAME.")
+            return False
+        if not self._idle.empty():
+            return True
+        try:
+            self._idle.put(self._connect())
+        except Exception as e:  # pragma: no cover - network errors
+            logger.error(f"Error connecting to SMTP server {self.host}:{self.port}: {e}")
+            return False
         return True
 
-    except HttpError as error:  # pragma: no cover - network/API errors
-        print(f"An error occurred while sending email: {error}")
-        return False
-    except Exception as e:  # pragma: no cover - unexpected errors
-        print(f"Unexpected error: {e}")
-        return False
+    def deliver(
+        self,
+        rendered: RenderedEmail,
+        recipient: Union[str, list[str]],
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[str, int]:
+        """
+        Send ``rendered`` to ``recipient`` on a pooled connection.
+
+        When the connection turns out to be dead, the message is retried once
+        on a newly opened one (other idle connections may be stale too).
+        """
+        recipients = _addresses(recipient)
+        headers, message_id = rendered.stamp(recipients, idempotency_key)
+        message = headers.replace(b"\n", b"\r\n") + rendered.smtp_payload
+        sender = self.from_email or rendered.from_address
+        for attempt in (1, 2):
+            connection = self._checkout() if attempt == 1 else self._connect()
+            try:
+                connection.sendmail(sender, recipients, message)
+            except Exception as error:
+                if not _is_connection_lost(error):
+                    # Refused recipient or message: the session is still usable.
+                    self._checkin(connection)
+                    raise
+                self._discard(connection)
+                count("email_retries", backend=self.name, status="disconnected")
+                if attempt == 2:
+                    raise
+                continue
+            self._checkin(connection)
+            return message_id, attempt
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+    def close(self) -> None:
+        """QUIT every idle connection."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection, graceful=True)
+
+
+DELIVERY_BACKENDS: dict[str, type[DeliveryBackend]] = {
+    "gmail": GmailSender,
+    "smtp": SmtpSender,
+}
+
 
+def get_delivery_backend(name: Optional[str] = None, **kwargs) -> DeliveryBackend:
+    """
+    Create the configured delivery backend.
+
+    ``name`` defaults to ``settings.email_backend`` (``EMAIL_BACKEND``); extra
+    keyword arguments go to the backend constructor.
+
+    Raises:
+        ValueError: If ``name`` is not a known backend.
+    """
+    name = (name or settings.email_backend).lower()
+    try:
+        backend = DELIVERY_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown email backend {name!r}; expected one of {', '.join(DELIVERY_BACKENDS)}"
+        ) from None
+    return backend(**kwargs)
+
+
+def send_email_with_gmail(
+    to_email: Union[str, list[str]],
+    subject: str,
+    body: str,
+    credentials_file: Optional[str] = None,
+    token_file: Optional[str] = None,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+    is_html: bool = True,
+) -> bool:
+    """
+    Send an email using the Gmail API with OAuth2 authentication.
 
+    Opens a one-off ``GmailSender`` session; to send several messages, create
+    a ``GmailSender`` once and call ``send`` for each recipient instead.
 
+    Args:
+        from_name: Display name for sender (e.g., "AI News"). If provided,
+                   the From header will show as "AI News <email@example.com>"
+    """
+    sender = GmailSender(
+        credentials_file=credentials_file,
+        token_file=token_file,
+        from_email=from_email,
+        from_name=from_name,
+    )
+    return sender.send(to_email, subject, body, is_html=is_html)
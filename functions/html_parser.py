@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Optional, Union
+
+# BeautifulSoup (and lxml through it) is imported on the first parse.
+BS4_AVAILABLE = find_spec("bs4") is not None
+LXML_AVAILABLE = find_spec("lxml") is not None
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+from config import settings
+
+# Backends understood by ``parse_html``, fastest first. ``html.parser`` ships
+# with Python and is always available as the fallback.
+PARSER_BACKENDS = ("lxml", "html.parser")
+FALLBACK_BACKEND = "html.parser"
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Pick the parser backend to use.
+
+    Falls back to ``html.parser`` when the requested backend is not installed.
+
+    Raises:
+        ValueError: if ``backend`` is not one of ``PARSER_BACKENDS``.
+    """
+    backend = backend or settings.news.html_parser
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(
+            f"Unknown HTML parser backend {backend!r}; "
+            f"choose one of {', '.join(PARSER_BACKENDS)}"
+        )
+    if backend == "lxml" and not LXML_AVAILABLE:
+        return FALLBACK_BACKEND
+    return backend
+
+
+def available_backends() -> list[str]:
+    """Return the parser backends usable in this environment."""
+    return [name for name in PARSER_BACKENDS if resolve_backend(name) == name]
+
+
+def parse_html(
+    markup: Union[str, bytes],
+    backend: Optional[str] = None,
+) -> "BeautifulSoup":
+    """Parse ``markup`` into a BeautifulSoup tree with the configured backend."""
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, resolve_backend(backend))
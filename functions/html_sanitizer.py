@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import re
+from html import unescape
+
+# Paragraph with the generic stiripesurse.ro reliability disclaimer the model
+# tends to add; removed from every output.
+_DISCLAIMER_TEXT = "Site-ul stiripesurse.ro"
+_DISCLAIMER = re.compile(
+    r"<p\b[^>]*>[^<]*Site-ul stiripesurse\.ro[^<]*</p>", re.IGNORECASE
+)
+
+_START = re.compile(r"<!DOCTYPE|<html\b|&lt;!DOCTYPE|&lt;html\b", re.IGNORECASE)
+_FENCE = re.compile(r"```(?:html|HTML)?[ \t]*\n?")
+_END = re.compile(r"</html\s*>|```", re.IGNORECASE)
+_DOCUMENT_START = re.compile(r"<!DOCTYPE|<html\b", re.IGNORECASE)
+# End of an output that was not opened by a code fence: a ``` inside it is
+# content.
+_HTML_END = re.compile(r"</html\s*>", re.IGNORECASE)
+# Structural tags; the leading "<" is factored out so the scan jumps between
+# "<" characters instead of trying every alternative at every position.
+_TOKEN = re.compile(
+    r"<(?:!DOCTYPE[^>]*|(?P<close>/?)(?P<tag>html|head|body)\b[^>]*)>",
+    re.IGNORECASE,
+)
+# A start tag that cannot be in <head>: it ends a head whose </head> is
+# missing (as does <body>).
+_BODY_CONTENT = re.compile(
+    r"<(?!(?:base|link|meta|noscript|script|style|template|title)\b)[a-z]",
+    re.IGNORECASE,
+)
+# An unterminated paragraph or entity at the end of the buffer that a later
+# chunk may complete.
+_OPEN_PARAGRAPH = re.compile(r"<p\b[^>]*>[^<]*\Z", re.IGNORECASE)
+_PARTIAL_ENTITY = re.compile(r"&[#\w]*\Z")
+# Longest end marker ("</html>") minus one.
+_END_HOLD_BACK = 6
+
+
+class _Output:
+    """Accumulates one output, trimming leading and trailing whitespace."""
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self._pending_space = ""
+
+    def write(self, text: str) -> str:
+        if not text:
+            return ""
+        stripped = text.rstrip()
+        if not stripped:
+            if self.parts:
+                self._pending_space += text
+            return ""
+        if not self.parts:
+            stripped = stripped.lstrip()
+            released = stripped
+        else:
+            released = self._pending_space + stripped
+        self._pending_space = text[len(text.rstrip()) :]
+        self.parts.append(released)
+        return released
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class HtmlSanitizer:
+    """
+    Single-pass, streaming cleaner for model HTML output.
+
+    Chunks go through ``feed`` as they arrive (or the whole text at once) and
+    are handled in one pass:
+
+    - text before the first ``<!DOCTYPE`` / ``<html`` (including an opening
+      code fence) is dropped;
+    - the stream ends at ``</html>`` or, when a code fence was opened before
+      the document, at the closing fence; ``done`` is then set so a
+      streaming caller can stop reading;
+    - an HTML-escaped document (``&lt;!DOCTYPE ...``) is unescaped;
+    - the stiripesurse.ro disclaimer paragraph is removed;
+    - both outputs are whitespace-trimmed.
+
+    Two outputs are built together: ``document`` is the cleaned HTML page
+    and ``body`` is the email-ready ``<body>`` contents (no DOCTYPE, html or
+    head, and nothing after ``</body>``). A head without ``</head>`` ends at
+    ``<body>`` or at the first element that belongs in the body, as in a
+    browser. Markers split across chunks are
+    held back until they are complete. Output without any HTML start is
+    cleaned as a fragment, after removing code fences.
+
+    With ``clean=False`` only the structure is handled: ``body`` is the
+    ``<body>`` contents of an HTML page (or the whole fragment) and nothing
+    is unescaped, unfenced or removed; see ``extract_body``.
+    """
+
+    def __init__(self, clean: bool = True) -> None:
+        self.clean = clean
+        self._raw = ""
+        self._pending = ""
+        self._pending_escaped = ""
+        self.started = not clean
+        self.done = False
+        self._escaped = False
+        self._fenced = False
+        self._in_head = False
+        self._after_body = False
+        self._document = _Output()
+        self._body = _Output()
+
+    def feed(self, chunk: str) -> str:
+        """Consume one chunk and return the document text it releases."""
+        if self.done or not chunk:
+            return ""
+
+        if not self.started:
+            self._raw += chunk
+            match = _START.search(self._raw)
+            if not match:
+                return ""
+            self.started = True
+            self._escaped = match.group(0).startswith("&")
+            self._fenced = "```" in self._raw[: match.start()]
+            chunk, self._raw = self._raw[match.start() :], ""
+
+        return self._consume(chunk, final=False)
+
+    def finish(self) -> str:
+        """
+        Flush everything held back at the end of the stream.
+
+        If no HTML start was ever seen, the buffered output is cleaned as a
+        fragment (code fences removed, disclaimer stripped).
+        """
+        released = ""
+        if not self.started and self._raw:
+            self.started = True
+            released = self._consume(_strip_fences(self._raw), final=True)
+            self._raw = ""
+        elif not self.done:
+            released = self._consume("", final=True)
+        self.done = True
+        return released
+
+    def _consume(self, chunk: str, final: bool) -> str:
+        if self._escaped:
+            # Unescape once, holding back an entity split across chunks.
+            chunk, self._pending_escaped = self._pending_escaped + chunk, ""
+            partial = None if final else _PARTIAL_ENTITY.search(chunk)
+            if partial:
+                chunk, self._pending_escaped = chunk[: partial.start()], chunk[partial.start() :]
+            chunk = unescape(chunk)
+
+        text = self._pending + chunk
+        self._pending = ""
+
+        end = (_END if self._fenced else _HTML_END).search(text)
+        if end:
+            stop = end.start() if end.group(0) == "```" else end.end()
+            text, final = text[:stop], True
+            self.done = True
+        elif not final:
+            # Keep a possibly split end marker for the next chunk.
+            cut = max(len(text) - _END_HOLD_BACK, 0)
+            text, self._pending = text[:cut], text[cut:]
+
+        if not final:
+            # Do not split a tag, or a paragraph that may be the disclaimer.
+            last_tag = text.rfind("<")
+            if last_tag != -1 and ">" not in text[last_tag:]:
+                text, self._pending = text[:last_tag], text[last_tag:] + self._pending
+            paragraph = _OPEN_PARAGRAPH.search(text)
+            if paragraph:
+                text, self._pending = (
+                    text[: paragraph.start()],
+                    text[paragraph.start() :] + self._pending,
+                )
+
+        return self._emit(text)
+
+    def _emit(self, text: str) -> str:
+        """Tokenize released text into the document and body outputs."""
+        if self.clean and _DISCLAIMER_TEXT in text:
+            text = _DISCLAIMER.sub("", text)
+        released: list[str] = []
+        position = 0
+        for match in _TOKEN.finditer(text):
+            self._write_text(text[position : match.start()], released)
+            position = match.end()
+
+            token = match.group(0)
+            released.append(self._document.write(token))
+            tag = (match.group("tag") or "").lower()
+            closing = bool(match.group("close"))
+            if tag == "head":
+                self._in_head = not closing
+            elif tag == "body" and not closing:
+                self._in_head = False
+            elif tag == "body" and closing:
+                self._after_body = True
+        self._write_text(text[position:], released)
+        return "".join(released)
+
+    def _write_text(self, text: str, released: list[str]) -> None:
+        if not text:
+            return
+        released.append(self._document.write(text))
+        if self._in_head:
+            start = _BODY_CONTENT.search(text)
+            if start is None:
+                return
+            self._in_head = False
+            text = text[start.start() :]
+        if not self._after_body:
+            self._body.write(text)
+
+    @property
+    def document(self) -> str:
+        """The cleaned HTML document released so far."""
+        return self._document.text
+
+    @property
+    def body(self) -> str:
+        """The email-ready body contents released so far."""
+        return self._body.text
+
+
+def _strip_fences(text: str) -> str:
+    """
+    Contents of the fenced code block that opens the output, or the text as
+    is (a fence after the first tag is content).
+    """
+    opening = _FENCE.search(text)
+    if not opening or "<" in text[: opening.start()]:
+        return text
+    closing = text.find("```", opening.end())
+    if closing == -1:
+        return text[opening.end() :]
+    return text[opening.end() : closing]
+
+
+def sanitize_html(text: str) -> HtmlSanitizer:
+    """Run a complete model output through ``HtmlSanitizer`` in one pass."""
+    sanitizer = HtmlSanitizer()
+    sanitizer.feed(text)
+    sanitizer.finish()
+    return sanitizer
+
+
+def extract_body(html: str) -> str:
+    """
+    The ``<body>`` contents of an HTML page, or the whole fragment, trimmed.
+
+    Only the DOCTYPE, html and head (and anything after ``</body>``) are
+    dropped; the content itself is not cleaned.
+    """
+    start = _DOCUMENT_START.search(html)
+    sanitizer = HtmlSanitizer(clean=False)
+    sanitizer.feed(html[start.start() :] if start else html)
+    sanitizer.finish()
+    return sanitizer.body
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import re
+from html.parser import HTMLParser
+from typing import Optional
+
+from config import settings
+
+# Elements whose content never reaches the text output.
+_SKIPPED = frozenset({"script", "style", "template", "noscript", "title"})
+# Elements that belong in <head>; any other start tag ends a head whose
+# </head> is missing, as does <body>.
+_HEAD_ELEMENTS = frozenset(
+    {"base", "link", "meta", "noscript", "script", "style", "template", "title"}
+)
+# Elements that start and end a block of text.
+_BLOCKS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt",
+        "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+        "h6", "header", "li", "main", "nav", "ol", "p", "pre", "section",
+        "table", "tr", "ul",
+    }
+)
+_HEADINGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+# Heading levels that get an underline, and its character.
+_UNDERLINES = {"h1": "=", "h2": "-"}
+_CELLS = frozenset({"td", "th"})
+_WHITESPACE = re.compile(r"\s+")
+# Marks a <br> inside the inline buffer (text nodes keep their raw newlines
+# until the block is flushed).
+_LINE_BREAK = "\x00"
+
+
+def wrap_line(text: str, width: int, first: str = "", rest: str = "") -> list[str]:
+    """
+    Greedily wrap one line of text to ``width`` columns.
+
+    ``first`` prefixes the first output line and ``rest`` every other one.
+    Words longer than the width (typically URLs) are never broken.
+    """
+    if width <= 0:
+        return [first + text]
+    lines: list[str] = []
+    current = first
+    current_empty = True
+    for word in text.split(" "):
+        if not word:
+            continue
+        if current_empty:
+            current += word
+            current_empty = False
+        elif len(current) + 1 + len(word) <= width:
+            current += " " + word
+        else:
+            lines.append(current)
+            current = rest + word
+    if not current_empty or not lines:
+        lines.append(current)
+    return lines
+
+
+class PlainTextRenderer(HTMLParser):
+    """
+    Streaming HTML to plain text converter for the text/plain email part.
+
+    Built on the standard library tokenizer: markup goes through ``feed`` in
+    chunks of any size and only the text block being assembled is kept in
+    memory, so conversion is linear in the input. The output keeps the
+    structure of the digest:
+
+    - paragraphs and other blocks are separated by blank lines;
+    - headings are kept, ``h1``/``h2`` underlined with ``=``/``-``;
+    - list items get ``-`` bullets (``1.`` in ordered lists), nested lists
+      are indented and wrapped lines hang under the item text;
+    - links are rendered as ``text (url)``;
+    - ``<pre>`` text is kept verbatim; head, script and style are dropped.
+
+    Lines are wrapped to ``width`` columns (no wrapping when 0).
+    """
+
+    def __init__(self, width: int = 78) -> None:
+        super().__init__(convert_charrefs=True)
+        self.width = width
+        self._lines: list[str] = []
+        self._inline: list[str] = []
+        # Newlines owed before the next block (1 = line break, 2 = blank line).
+        self._gap = 0
+        self._skip_depth = 0
+        self._in_head = False
+        self._pre_depth = 0
+        # One [marker or None, next number, blocks written, item indent] per
+        # open list.
+        self._lists: list[list] = []
+        # Bullet waiting for the first block of the current list item.
+        self._bullet: Optional[str] = None
+        self._heading: Optional[str] = None
+        # (href, index in ``_inline`` where the link text starts)
+        self._links: list[tuple[str, int]] = []
+
+    # -- tokenizer callbacks -------------------------------------------------
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if self._in_head and tag not in _HEAD_ELEMENTS:
+            self._in_head = False
+        if tag == "head":
+            self._in_head = True
+            return
+        if tag in _SKIPPED:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        if tag == "br":
+            self._inline.append(_LINE_BREAK)
+        elif tag == "hr":
+            self._flush()
+            self._write_lines(["-" * min(self.width or 40, 40)], gap=2)
+            self._gap = 2
+        elif tag == "a":
+            href = (dict(attrs).get("href") or "").strip()
+            self._links.append((href, len(self._inline)))
+        elif tag in _CELLS:
+            if self._inline:
+                self._inline.append(" ")
+        elif tag in _BLOCKS:
+            self._flush()
+            if tag in ("ul", "ol"):
+                self._lists.append(["-" if tag == "ul" else None, 1, 0, self._indent()])
+                self._gap = max(self._gap, 1 if len(self._lists) > 1 else 2)
+            elif tag == "li":
+                self._start_item()
+            elif tag in _HEADINGS:
+                self._heading = tag
+                self._gap = 2
+            elif tag == "pre":
+                self._pre_depth += 1
+                self._gap = 2
+            elif tag == "p" and not self._lists:
+                self._gap = 2
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self._in_head = False
+            return
+        if tag in _SKIPPED:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if self._skip_depth:
+            return
+
+        if tag == "a":
+            self._end_link()
+        elif tag in _BLOCKS:
+            self._flush()
+            if tag in ("ul", "ol"):
+                if self._lists:
+                    self._lists.pop()
+                self._gap = max(self._gap, 2 if not self._lists else 1)
+            elif tag == "li":
+                self._bullet = None
+            elif tag in _HEADINGS:
+                self._heading = None
+                self._gap = 2
+            elif tag == "pre":
+                self._pre_depth = max(self._pre_depth - 1, 0)
+                self._gap = 2
+            elif tag == "p" and not self._lists:
+                self._gap = 2
+
+    def handle_data(self, data: str) -> None:
+        # Whitespace is collapsed once per block, in ``_flush``.
+        if not self._skip_depth and not self._in_head and data:
+            self._inline.append(data)
+
+    # -- block assembly ------------------------------------------------------
+
+    def _start_item(self) -> None:
+        if not self._lists:
+            self._lists.append(["-", 1, 0, ""])
+        current = self._lists[-1]
+        marker = current[0] or f"{current[1]}."
+        current[1] += 1
+        # A previous item with several blocks is followed by a blank line.
+        self._gap = max(self._gap, 2 if current[2] > 1 else 1)
+        current[2] = 0
+        self._bullet = marker + " "
+        parent = self._lists[-2][3] if len(self._lists) > 1 else ""
+        current[3] = parent + " " * len(self._bullet)
+
+    def _indent(self) -> str:
+        """Continuation indent of text inside the open lists."""
+        return self._lists[-1][3] if self._lists else ""
+
+    def _end_link(self) -> None:
+        if not self._links:
+            return
+        href, start = self._links.pop()
+        if not href or href.startswith(("#", "javascript:")):
+            return
+        text = _WHITESPACE.sub(" ", "".join(self._inline[start:])).strip()
+        shown = href[len("mailto:"):] if href.startswith("mailto:") else href
+        if not text:
+            self._inline.append(shown)
+        elif text != shown:
+            self._inline.append(f" ({shown})")
+
+    def _flush(self) -> None:
+        """Wrap and write the inline text collected since the last block."""
+        if not self._inline:
+            return
+        raw = "".join(self._inline)
+        self._inline = []
+        self._links = [(href, 0) for href, _ in self._links]
+
+        if self._pre_depth:
+            lines = raw.replace(_LINE_BREAK, "\n").strip("\n").split("\n")
+            if not any(line.strip() for line in lines):
+                return
+            indent = self._indent()
+            self._write_lines([indent + line for line in lines], gap=2)
+            return
+
+        pieces = [_WHITESPACE.sub(" ", piece).strip() for piece in raw.split(_LINE_BREAK)]
+        if not any(pieces):
+            return
+        while pieces and not pieces[-1]:
+            pieces.pop()
+
+        indent = self._indent()
+        first = indent
+        if self._bullet is not None:
+            first = indent[: -len(self._bullet)] + self._bullet
+            self._bullet = None
+        if self._lists:
+            self._lists[-1][2] += 1
+
+        lines: list[str] = []
+        for piece in pieces:
+            lines.extend(wrap_line(piece, self.width, first, indent))
+            first = indent
+        if self._heading in _UNDERLINES:
+            length = max(len(line) for line in lines) - len(indent)
+            lines.append(indent + _UNDERLINES[self._heading] * length)
+        self._write_lines(lines, gap=self._gap)
+
+    def _write_lines(self, lines: list[str], gap: int) -> None:
+        if self._lines and gap:
+            self._lines.extend([""] * (gap - 1))
+        self._lines.extend(line.rstrip() for line in lines)
+        self._gap = 1
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    @property
+    def text(self) -> str:
+        """The plain text rendered so far."""
+        return "\n".join(self._lines)
+
+
+def html_to_text(html: str, width: Optional[int] = None) -> str:
+    """
+    Render HTML as wrapped plain text in one streaming pass.
+
+    ``width`` defaults to ``GmailConfig.plain_text_width``.
+    """
+    renderer = PlainTextRenderer(settings.gmail.plain_text_width if width is None else width)
+    renderer.feed(html)
+    renderer.close()
+    return renderer.text
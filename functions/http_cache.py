@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from config import NewsConfig, settings
+
+
+@dataclass
+class CacheEntry:
+    """Metadata stored for one cached URL."""
+
+    url: str
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    size: int
+    stored_at: float
+
+
+class HttpCache:
+    """
+    Content-addressed on-disk cache for HTTP GET responses.
+
+    Response bodies are stored zlib-compressed under their SHA-256 digest, so
+    identical pages served from different URLs share one file. A small SQLite
+    index maps each URL to its body and validators (``ETag`` and
+    ``Last-Modified``), which the HTTP client sends back as ``If-None-Match`` /
+    ``If-Modified-Since``. Entries expire after ``ttl`` seconds and the least
+    recently used ones are evicted once the compressed bodies exceed
+    ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 86400.0,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False
+        )
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Optional[NewsConfig] = None) -> "HttpCache":
+        """Build a cache from the HTTP cache fields of ``NewsConfig``."""
+        config = config or settings.news
+        return cls(
+            directory=config.http_cache_dir,
+            ttl=config.http_cache_ttl,
+            max_bytes=config.http_cache_max_bytes,
+        )
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the entry cached for ``url``, or None if missing or expired."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, digest, etag, last_modified, size, stored_at "
+                "FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(*row)
+            if time.time() - entry.stored_at > self.ttl:
+                self._delete_locked(entry.url, entry.digest)
+                self._db.commit()
+                return None
+            return entry
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> dict[str, str]:
+        """Validators to send so the server can answer 304 Not Modified."""
+        headers: dict[str, str] = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def load(self, entry: CacheEntry) -> Optional[bytes]:
+        """
+        Read the body of a revalidated entry and mark it as recently used.
+
+        The server confirmed the body is current, so the entry's TTL starts
+        over; otherwise an unchanged page would be downloaded in full on
+        every run once its TTL ran out.
+
+        Returns:
+            The decompressed body, or None if the stored object is missing.
+        """
+        try:
+            with open(self._object_path(entry.digest), "rb") as handle:
+                body = zlib.decompress(handle.read())
+        except (OSError, zlib.error):
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, entry.url),
+            )
+            self._db.commit()
+            self.hits += 1
+        return body
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store a freshly downloaded body and its validators."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        compressed = zlib.compress(body, 6)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(compressed)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, digest, etag, last_modified, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, etag, last_modified, len(compressed), now, now),
+            )
+            if previous and previous[0] != digest:
+                self._remove_object_if_unused_locked(previous[0])
+            self.misses += 1
+            self._evict_locked()
+            self._db.commit()
+
+    def _delete_locked(self, url: str, digest: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+        self._remove_object_if_unused_locked(digest)
+
+    def _remove_object_if_unused_locked(self, digest: str) -> None:
+        (users,) = self._db.execute(
+            "SELECT COUNT(*) FROM entries WHERE digest = ?", (digest,)
+        ).fetchone()
+        if users == 0:
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+
+    def _total_bytes_locked(self) -> int:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return total
+
+    def _evict_locked(self) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        total = self._total_bytes_locked()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT url, digest FROM entries ORDER BY accessed_at ASC"
+        ).fetchall()
+        for url, digest in rows:
+            if total <= self.max_bytes:
+                break
+            self._delete_locked(url, digest)
+            self.evictions += 1
+            total = self._total_bytes_locked()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current cache size."""
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+            size = self._total_bytes_locked()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite index."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import threading
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlsplit
+
+# requests is imported when the first client is created.
+HTTP_AVAILABLE = find_spec("requests") is not None
+
+if TYPE_CHECKING:
+    import requests
+
+from config import NewsConfig, settings
+from functions.http_cache import HttpCache
+from functions.metrics import count, span
+
+
+def _default_headers() -> dict:
+    """Common HTTP headers for scraping requests."""
+    return {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        )
+    }
+
+
+class HttpClient:
+    """
+    Pooled, keep-alive HTTP client shared by every scraper.
+
+    Wraps a single ``requests.Session`` whose adapters keep a connection pool
+    per host and retry idempotent requests with exponential backoff on 5xx
+    responses and connection resets. The session is safe to use from the
+    worker threads of the async scraping engine.
+
+    When an ``HttpCache`` is attached, ``fetch`` performs conditional GETs and
+    serves ``304 Not Modified`` answers from the cache.
+    """
+
+    def __init__(
+        self,
+        config: Optional[NewsConfig] = None,
+        cache: Optional[HttpCache] = None,
+    ) -> None:
+        self.config = config or settings.news
+        self.cache = cache
+        self.timeout = (self.config.connect_timeout, self.config.read_timeout)
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.config.http_retries,
+            connect=self.config.http_retries,
+            read=self.config.http_retries,
+            status=self.config.http_retries,
+            backoff_factor=self.config.http_backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=self.config.http_pool_hosts,
+            pool_maxsize=self.config.http_pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update(_default_headers())
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        """Send a GET request through the shared session."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Download ``url`` and return its body, revalidating against the cache.
+
+        Each call is timed as an ``http.fetch`` span; bytes received and
+        requests per host and status are counted.
+
+        Raises:
+            requests.HTTPError: if the server answers with an error status.
+        """
+        host = urlsplit(url).netloc
+        with span("http.fetch", url=url, host=host) as record:
+            if self.cache is None:
+                response = self._get_counted(url, host)
+                response.raise_for_status()
+                record.attributes.update(
+                    status=response.status_code, bytes=len(response.content)
+                )
+                return response.content
+
+            entry = self.cache.lookup(url)
+            headers = self.cache.conditional_headers(entry) if entry else {}
+            response = self._get_counted(url, host, headers=headers)
+            if response.status_code == 304 and entry is not None:
+                body = self.cache.load(entry)
+                if body is not None:
+                    count("http_cache_hits", host=host)
+                    record.attributes.update(status=304, bytes=len(body), cache="hit")
+                    return body
+                # The cached object disappeared; fall back to a full download.
+                response = self._get_counted(url, host)
+
+            response.raise_for_status()
+            self.cache.store(
+                url,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            record.attributes.update(
+                status=response.status_code, bytes=len(response.content), cache="miss"
+            )
+            return response.content
+
+    def _get_counted(self, url: str, host: str, **kwargs) -> "requests.Response":
+        """``get`` that counts the request and the bytes downloaded."""
+        response = self.get(url, **kwargs)
+        count("http_requests", host=host, status=response.status_code)
+        count("http_bytes_downloaded", len(response.content), host=host)
+        return response
+
+    def stats(self) -> dict[str, int]:
+        """
+        Report connection usage across all host pools.
+
+        Returns:
+            dict with the number of requests sent, connections opened and
+            requests that reused an already open (keep-alive) connection.
+        """
+        pools = self._adapter.poolmanager.pools
+        requests_sent = 0
+        connections = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": max(requests_sent - connections, 0),
+        }
+
+    def close(self) -> None:
+        """Close every pooled connection and the cache index."""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide shared HTTP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            cache = (
+                HttpCache.from_config(settings.news)
+                if settings.news.http_cache_enabled
+                else None
+            )
+            _client = HttpClient(cache=cache)
+        return _client
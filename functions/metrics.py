@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from importlib.util import find_spec
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from config import MetricsConfig, settings
+
+logger = logging.getLogger(__name__)
+
+# The OpenTelemetry API is only imported when ``MetricsConfig.otel_enabled``.
+OTEL_AVAILABLE = find_spec("opentelemetry") is not None
+
+PROMETHEUS_PREFIX = "news_ai_emailer"
+
+T = TypeVar("T")
+
+
+@dataclass
+class SpanRecord:
+    """One timed operation of a run."""
+
+    id: int
+    name: str
+    parent: Optional[int]
+    # Seconds since the start of the run.
+    start: float
+    duration: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "parent": self.parent,
+            "start": round(self.start, 6),
+            "duration": round(self.duration, 6),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# Innermost open span of the running thread or task.
+_current_span: contextvars.ContextVar[Optional[SpanRecord]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class RunMetrics:
+    """
+    Timed spans and counters of one run, with JSON and Prometheus export.
+
+    ``span`` times a block and nests under the span open in the calling
+    context (asyncio tasks and ``asyncio.to_thread`` inherit it; thread
+    pools need ``bind_context``). ``count`` adds to a counter identified by
+    its name and labels. Both are thread-safe and cheap enough to wrap every
+    HTTP request and email delivery. With ``MetricsConfig.otel_enabled``,
+    spans and counters are mirrored to the OpenTelemetry API, whose
+    exporters are configured by the OTel SDK.
+    """
+
+    def __init__(self, config: Optional[MetricsConfig] = None) -> None:
+        self.config = config or settings.metrics
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.status = "running"
+        self.duration = 0.0
+        self.spans: list[SpanRecord] = []
+        self.counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tracer = None
+        self._meter = None
+        self._otel_counters: dict[str, Any] = {}
+        if self.config.otel_enabled:
+            self._init_otel()
+
+    def _init_otel(self) -> None:
+        if not OTEL_AVAILABLE:
+            logger.warning(
+                "⚠️ OpenTelemetry requested but not installed. "
+                "Install with: pip install opentelemetry-api"
+            )
+            return
+        from opentelemetry import metrics as otel_metrics
+        from opentelemetry import trace
+
+        self._tracer = trace.get_tracer(PROMETHEUS_PREFIX)
+        self._meter = otel_metrics.get_meter(PROMETHEUS_PREFIX)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[SpanRecord]:
+        """
+        Time the enclosed block as span ``name``.
+
+        Attributes can be added to the yielded record until the block ends;
+        an exception is recorded on the span and re-raised.
+        """
+        parent = _current_span.get()
+        record = SpanRecord(
+            next(self._ids),
+            name,
+            parent.id if parent is not None else None,
+            time.perf_counter() - self._origin,
+            attributes=attributes,
+        )
+        token = _current_span.set(record)
+        otel = (
+            self._tracer.start_as_current_span(name)
+            if self._tracer is not None
+            else nullcontext()
+        )
+        start = time.perf_counter()
+        with otel as otel_span:
+            try:
+                yield record
+            except BaseException as error:
+                record.error = f"{type(error).__name__}: {error}"
+                raise
+            finally:
+                record.duration = time.perf_counter() - start
+                _current_span.reset(token)
+                if otel_span is not None:
+                    otel_span.set_attributes(_otel_attributes(record.attributes))
+                with self._lock:
+                    self.spans.append(record)
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add ``value`` to counter ``name`` with the given labels."""
+        key = (name, tuple(sorted((label, str(v)) for label, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        if self._meter is not None:
+            counter = self._otel_counters.get(name)
+            if counter is None:
+                counter = self._otel_counters.setdefault(
+                    name, self._meter.create_counter(f"{PROMETHEUS_PREFIX}.{name}")
+                )
+            counter.add(value, attributes=dict(key[1]))
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Current value of one counter (summed over labels not given)."""
+        wanted = {(label, str(value)) for label, value in labels.items()}
+        with self._lock:
+            return sum(
+                value
+                for (counter_name, counter_labels), value in self.counters.items()
+                if counter_name == name and wanted <= set(counter_labels)
+            )
+
+    def finish(self, status: str = "ok") -> None:
+        """Close the run, write the configured reports and log a summary."""
+        self.duration = time.perf_counter() - self._origin
+        self.status = status
+        if self.config.report_path:
+            self._write(self.config.report_path, self.to_json())
+        if self.config.prometheus_path:
+            self._write(self.config.prometheus_path, self.to_prometheus())
+        self.log_summary()
+
+    def report(self) -> dict[str, Any]:
+        """The run as a JSON-serializable dict (spans in start order)."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record.start)
+            counters = sorted(self.counters.items())
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "status": self.status,
+            "spans": [record.as_dict() for record in spans],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.report(), ensure_ascii=False, indent=2, default=str)
+
+    def to_prometheus(self) -> str:
+        """
+        The run in the Prometheus text format (for the node_exporter textfile
+        collector): every counter, span durations summed per span name, and
+        the run status, duration and timestamp.
+        """
+        lines: list[str] = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            spans = list(self.spans)
+
+        declared: set[str] = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}_{_metric_name(name)}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+
+        totals: dict[str, list[float]] = {}
+        for record in spans:
+            total = totals.setdefault(record.name, [0.0, 0, 0.0, 0])
+            total[0] += record.duration
+            total[1] += 1
+            total[2] = max(total[2], record.duration)
+            total[3] += record.error is not None
+        if totals:
+            metric = f"{PROMETHEUS_PREFIX}_span_duration_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for name, (seconds, calls, _, _) in sorted(totals.items()):
+                lines.append(f"{metric}_sum{_labels([('span', name)])} {_number(seconds)}")
+                lines.append(f"{metric}_count{_labels([('span', name)])} {calls}")
+            for suffix, index in (("max_seconds", 2), ("errors", 3)):
+                metric = f"{PROMETHEUS_PREFIX}_span_{suffix}"
+                lines.append(f"# TYPE {metric} gauge")
+                for name, total in sorted(totals.items()):
+                    lines.append(f"{metric}{_labels([('span', name)])} {_number(total[index])}")
+
+        for name, value in (
+            ("run_duration_seconds", self.duration),
+            ("run_success", int(self.status == "ok")),
+            ("run_timestamp_seconds", self.started_at),
+        ):
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self) -> None:
+        """Log the duration of every top-level stage and the slowest spans."""
+        with self._lock:
+            spans = list(self.spans)
+        roots = {record.id for record in spans if record.parent is None}
+        stages = sorted(
+            (record for record in spans if record.parent in roots),
+            key=lambda record: record.start,
+        )
+        if stages:
+            logger.info(
+                "⏱️ Stages: "
+                + ", ".join(f"{record.name} {record.duration:.2f}s" for record in stages)
+            )
+        leaves = [record for record in spans if record.parent not in roots | {None}]
+        for record in sorted(leaves, key=lambda record: record.duration, reverse=True)[:3]:
+            detail = record.attributes.get("url") or record.attributes.get("source") or ""
+            logger.debug(f"   slowest: {record.name} {detail} {record.duration:.2f}s")
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        """Write ``content`` atomically, so collectors never read half a file."""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write metrics to {path}: {e}")
+
+
+def _metric_name(name: str) -> str:
+    return "".join(char if char.isalnum() else "_" for char in name).lower()
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{_metric_name(label)}="'
+        + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for label, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _otel_attributes(attributes: dict[str, Any]) -> dict[str, Any]:
+    """OTel accepts only primitive attribute values."""
+    return {
+        key: value if isinstance(value, (bool, int, float, str)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
+
+
+_run: Optional[RunMetrics] = None
+_run_lock = threading.Lock()
+
+
+def current_run() -> RunMetrics:
+    """The metrics of the current run, started on first use."""
+    global _run
+    if _run is None:
+        with _run_lock:
+            if _run is None:
+                _run = RunMetrics()
+    return _run
+
+
+def start_run(config: Optional[MetricsConfig] = None) -> RunMetrics:
+    """Start collecting a new run; later spans and counters go to it."""
+    global _run
+    with _run_lock:
+        _run = RunMetrics(config)
+    return _run
+
+
+@contextmanager
+def record_run(name: str = "run", **attributes: Any) -> Iterator[RunMetrics]:
+    """
+    Collect one run inside a root span ``name`` and finish it on exit.
+
+    The reports are written even when the run fails (with status "error").
+    """
+    run = start_run()
+    status = "error"
+    try:
+        with run.span(name, **attributes):
+            yield run
+        status = "ok"
+    finally:
+        run.finish(status)
+
+
+def span(name: str, **attributes: Any):
+    """Time a block in the current run; see ``RunMetrics.span``."""
+    return current_run().span(name, **attributes)
+
+
+def count(name: str, value: float = 1, **labels: Any) -> None:
+    """Add to a counter of the current run; see ``RunMetrics.count``."""
+    current_run().count(name, value, **labels)
+
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the innermost open span, if any."""
+    record = _current_span.get()
+    if record is not None:
+        record.attributes.update(attributes)
+
+
+def bind_context(function: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap ``function`` to run in a copy of the caller's context.
+
+    Work submitted to a thread pool then nests under the span open where it
+    was submitted.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
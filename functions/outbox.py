@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from config import GmailConfig, settings
+from functions.metrics import bind_context, span
+
+if TYPE_CHECKING:
+    from functions.email_service import (
+        BulkSendReport,
+        DeliveryBackend,
+        RenderedEmail,
+        SendResult,
+    )
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+
+def digest_key(subject: str, body: str, is_html: bool = True, run_id: str = "") -> str:
+    """
+    Idempotency key of a digest: the same content of the same run (e.g. the
+    run date) always maps to one digest.
+    """
+    payload = f"{run_id}\0{int(is_html)}\0{subject}\0{body}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def delivery_key(digest_id: str, recipient: str) -> str:
+    """Idempotency key of one delivery, also used to derive its Message-ID."""
+    payload = f"{digest_id}\0{recipient.strip().casefold()}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+@dataclass
+class Digest:
+    """A stored digest, ready to render."""
+
+    id: str
+    subject: str
+    body: str
+    is_html: bool
+    from_header: Optional[str]
+
+
+class Outbox:
+    """
+    Durable SQLite outbox of digests and their per-recipient deliveries.
+
+    A digest is stored once per run (keyed by ``digest_key``) with one row
+    per recipient. Each row moves from pending to sending and then to sent or
+    failed, and is written before and after every delivery attempt, so a run
+    that dies mid-way can be finished with ``deliver`` without scraping or
+    calling the model again. Enqueuing the same digest twice for the same
+    ``run_id`` adds nothing.
+    A delivery's Message-ID is derived from its ``delivery_key``, so a
+    resent message carries the same Message-ID as the lost attempt. Rows
+    left in "sending" are first checked with the backend's
+    ``was_delivered`` where it can tell.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps every status change durable across a process crash while
+        # avoiding a full fsync per update.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS digests (
+                id TEXT PRIMARY KEY,
+                subject TEXT NOT NULL,
+                body BLOB NOT NULL,
+                is_html INTEGER NOT NULL,
+                from_header TEXT,
+                created_at REAL NOT NULL,
+                run_id TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS deliveries (
+                digest_id TEXT NOT NULL REFERENCES digests(id),
+                recipient TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                message_id TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (digest_id, recipient)
+            );
+            CREATE INDEX IF NOT EXISTS deliveries_status ON deliveries (status);
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(digests)")}
+        if "run_id" not in columns:
+            # Outboxes created before digests were keyed by run.
+            self._db.execute("ALTER TABLE digests ADD COLUMN run_id TEXT NOT NULL DEFAULT ''")
+        self._db.commit()
+
+    @classmethod
+    def from_config(cls, config: Optional[GmailConfig] = None) -> "Outbox":
+        """Open the outbox at ``GmailConfig.outbox_path``."""
+        config = config or settings.gmail
+        return cls(config.outbox_path)
+
+    def enqueue(
+        self,
+        subject: str,
+        body: str,
+        recipients: list[str],
+        is_html: bool = True,
+        from_header: Optional[str] = None,
+        run_id: str = "",
+    ) -> str:
+        """
+        Store a digest and a pending delivery for every recipient.
+
+        ``run_id`` (e.g. the run date) is part of the digest key: the same
+        content enqueued by a later run is a new digest and is sent again.
+
+        Returns:
+            The digest ID.
+        """
+        digest_id = digest_key(subject, body, is_html, run_id)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO digests "
+                "(id, subject, body, is_html, from_header, created_at, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    digest_id,
+                    subject,
+                    zlib.compress(body.encode("utf-8"), 6),
+                    int(is_html),
+                    from_header,
+                    now,
+                    run_id,
+                ),
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO deliveries "
+                "(digest_id, recipient, idempotency_key, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (digest_id, recipient, delivery_key(digest_id, recipient), PENDING, now)
+                    for recipient in dict.fromkeys(recipients)
+                    if recipient
+                ],
+            )
+            self._db.commit()
+        return digest_id
+
+    def digest(self, digest_id: str) -> Digest:
+        """Load a stored digest."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT subject, body, is_html, from_header FROM digests WHERE id = ?",
+                (digest_id,),
+            ).fetchone()
+        if row is None:
+            raise KeyError(digest_id)
+        subject, body, is_html, from_header = row
+        return Digest(
+            digest_id, subject, zlib.decompress(body).decode("utf-8"), bool(is_html), from_header
+        )
+
+    def latest_run(self) -> Optional[str]:
+        """The ``run_id`` of the most recently enqueued digest (None if empty)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT run_id FROM digests ORDER BY created_at DESC, rowid DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def unfinished(
+        self,
+        digest_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ) -> list[tuple[str, str, str, str]]:
+        """
+        Deliveries that still need sending (pending, sending or failed),
+        optionally of one digest or of the digests of one run only.
+
+        Returns:
+            (digest ID, recipient, idempotency key, status) rows in insertion order.
+        """
+        query = (
+            "SELECT digest_id, recipient, idempotency_key, status FROM deliveries "
+            "WHERE status != ?"
+        )
+        params: tuple = (SENT,)
+        if digest_id is not None:
+            query += " AND digest_id = ?"
+            params += (digest_id,)
+        if run_id is not None:
+            query += " AND digest_id IN (SELECT id FROM digests WHERE run_id = ?)"
+            params += (run_id,)
+        with self._lock:
+            return self._db.execute(query + " ORDER BY rowid", params).fetchall()
+
+    def _mark(self, key: str, status: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        extra = f", {assignments}" if assignments else ""
+        increment = ", attempts = attempts + 1" if status == SENDING else ""
+        with self._lock:
+            self._db.execute(
+                f"UPDATE deliveries SET status = ?, updated_at = ?{increment}{extra} "
+                "WHERE idempotency_key = ?",
+                (status, time.time(), *fields.values(), key),
+            )
+            self._db.commit()
+
+    def counts(self, digest_id: Optional[str] = None) -> dict[str, int]:
+        """Number of deliveries per status."""
+        query = "SELECT status, COUNT(*) FROM deliveries"
+        params: tuple = ()
+        if digest_id is not None:
+            query += " WHERE digest_id = ?"
+            params = (digest_id,)
+        with self._lock:
+            rows = self._db.execute(query + " GROUP BY status", params).fetchall()
+        return dict(rows)
+
+    def render(
+        self,
+        backend: "DeliveryBackend",
+        rows: list[tuple[str, str, str, str]],
+    ) -> dict[str, "RenderedEmail"]:
+        """
+        Render every digest referenced by ``rows`` once.
+
+        Returns:
+            {digest ID: rendered message}
+        """
+        from functions.email_service import RenderedEmail
+
+        rendered: dict[str, RenderedEmail] = {}
+        for row_digest, _, _, _ in rows:
+            if row_digest not in rendered:
+                stored = self.digest(row_digest)
+                rendered[row_digest] = RenderedEmail(
+                    stored.subject,
+                    stored.body,
+                    stored.from_header or backend.from_header,
+                    is_html=stored.is_html,
+                )
+        return rendered
+
+    def deliver_row(
+        self,
+        backend: "DeliveryBackend",
+        row: tuple[str, str, str, str],
+        message: "RenderedEmail",
+    ) -> "SendResult":
+        """
+        Deliver one ``unfinished`` row, recording its status before and after.
+
+        A row left in "sending" by a run that died is first checked with the
+        backend's ``was_delivered``.
+        """
+        from functions.email_service import SendResult
+
+        _, recipient, key, status = row
+        if status == SENDING:
+            # The previous run died during this delivery; ask the backend.
+            message_id = message.message_id(key)
+            if backend.was_delivered(message_id):
+                self._mark(key, SENT, message_id=message_id, error=None)
+                return SendResult(recipient, True, message_id=message_id)
+        self._mark(key, SENDING)
+        try:
+            message_id, attempts = backend.deliver_timed(message, recipient, idempotency_key=key)
+        except Exception as e:  # pragma: no cover - network/API errors
+            self._mark(key, FAILED, error=str(e))
+            return SendResult(recipient, False, error=str(e))
+        self._mark(key, SENT, message_id=message_id, error=None)
+        return SendResult(recipient, True, message_id=message_id, attempts=attempts)
+
+    def deliver(
+        self,
+        backend: "DeliveryBackend",
+        digest_id: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        run_id: Optional[str] = None,
+    ) -> "BulkSendReport":
+        """
+        Send every unfinished delivery (optionally of one digest or one run only).
+
+        Returns:
+            The bulk send report of this pass.
+        """
+        from functions.email_service import BulkSendReport, SendResult
+
+        report = BulkSendReport()
+        rows = self.unfinished(digest_id, run_id)
+        if not rows:
+            return report
+        if not backend.authenticate():
+            report.results = [
+                SendResult(recipient, False, error="authentication failed")
+                for _, recipient, _, _ in rows
+            ]
+            return report
+
+        rendered = self.render(backend, rows)
+        start = time.perf_counter()
+        workers = max_workers or backend.workers
+        with span("outbox.deliver", backend=backend.name, deliveries=len(rows)):
+            send = bind_context(
+                lambda row: self.deliver_row(backend, row, rendered[row[0]])
+            )
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                report.results = list(pool.map(send, rows))
+        report.elapsed = time.perf_counter() - start
+
+        logger.info(
+            f"📬 Outbox: delivered {report.sent}/{len(rows)} pending emails "
+            f"in {report.elapsed:.2f}s"
+        )
+        for result in report.failed:
+            logger.error(f"❌ {result.recipient}: {result.error}")
+        return report
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,557 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Optional, TypeVar
+from urllib.parse import urlsplit
+
+from config import DigestConfig, PipelineConfig, settings
+from functions.ai_client import (
+    get_ai_info,
+    get_ai_info_map_reduce,
+    headline_list,
+    score_candidates,
+)
+from functions.article import Article
+from functions.article_store import ArticleStore
+from functions.dedupe import dedupe_articles
+from functions.email_service import BulkSendReport, RenderedEmail, SendResult
+from functions.http_client import HttpClient, get_http_client
+from functions.metrics import annotate, bind_context, count, span
+from functions.outbox import Outbox, digest_key
+from functions.prompt_packer import pack_articles, restore_links
+from functions.scraping import SourceScrape, format_news, log_http_stats
+from functions.sources import SOURCES, get_source
+
+if TYPE_CHECKING:
+    from functions.email_service import DeliveryBackend
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Emits one item to the next stage, waiting while its queue is full.
+Emit = Callable[[Any], Awaitable[None]]
+
+# Name of the single digest of a run without digest definitions.
+DEFAULT_DIGEST = "default"
+
+# Marks the end of a stage's input.
+_END = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a ``Pipeline``.
+
+    ``handler(item, emit)`` is awaited for every input item, by ``workers``
+    concurrent workers, and passes any number of results on with ``emit``.
+    A ``batch`` stage instead waits for its whole input and is awaited once
+    with the list of items (for steps that need everything, like dedupe).
+    Blocking work belongs on threads, so the event loop keeps feeding the
+    other stages.
+    """
+
+    name: str
+    handler: Callable[[Any, Emit], Awaitable[None]]
+    workers: int = 1
+    batch: bool = False
+
+
+class Pipeline:
+    """
+    Stages connected by bounded asyncio queues.
+
+    Every stage runs as soon as its first input arrives, so a stage works on
+    early items while the stages before it are still producing later ones;
+    a full queue makes the stage in front of it wait (backpressure). Each
+    stage is timed as a span from its first input (batch stages: its last
+    input) to its last output; a stage that receives no input is skipped.
+    An exception in any handler cancels the whole pipeline and is re-raised
+    by ``run``.
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 16) -> None:
+        self.stages = stages
+        self.queue_size = queue_size
+
+    async def run(self, inputs: Iterable[Any]) -> list[Any]:
+        """
+        Feed ``inputs`` to the first stage and wait until every stage is done.
+
+        Returns:
+            The items emitted by the last stage, in emit order.
+        """
+        inboxes = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # The last stage never waits on its output.
+        results: asyncio.Queue = asyncio.Queue()
+        outboxes = inboxes[1:] + [results]
+
+        async def feed() -> None:
+            for item in inputs:
+                await inboxes[0].put(item)
+            await inboxes[0].put(_END)
+
+        tasks = [asyncio.create_task(feed())] + [
+            asyncio.create_task(self._run_stage(stage, inbox, outbox))
+            for stage, inbox, outbox in zip(self.stages, inboxes, outboxes)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        outputs = []
+        while (item := results.get_nowait()) is not _END:
+            outputs.append(item)
+        return outputs
+
+    @staticmethod
+    async def _run_stage(stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue) -> None:
+        first = await inbox.get()
+        if first is _END:
+            await outbox.put(_END)
+            return
+
+        if stage.batch:
+            items = [first]
+            while (item := await inbox.get()) is not _END:
+                items.append(item)
+
+        processed = 0
+        with span(stage.name, workers=stage.workers) as record:
+            if stage.batch:
+                processed = len(items)
+                await stage.handler(items, outbox.put)
+            else:
+                waiting = [first]
+
+                async def worker() -> None:
+                    nonlocal processed
+                    while True:
+                        item = waiting.pop() if waiting else await inbox.get()
+                        if item is _END:
+                            # Let the other workers see the end as well.
+                            await inbox.put(_END)
+                            return
+                        await stage.handler(item, outbox.put)
+                        processed += 1
+
+                await asyncio.gather(*(worker() for _ in range(max(stage.workers, 1))))
+            record.attributes["items"] = processed
+        await outbox.put(_END)
+
+
+@dataclass
+class DigestResult:
+    """Outcome of one digest of a pipeline run."""
+
+    name: str
+    # Analyzed articles per source (after dedupe).
+    articles: dict[str, list[Article]] = field(default_factory=dict)
+    # The analysis; None when there was nothing to analyze.
+    html: Optional[str] = None
+    # Delivery results when the digest was sent.
+    report: Optional[BulkSendReport] = None
+
+
+class NewsDigestPipeline:
+    """
+    The daily digests as a staged pipeline.
+
+    fetch → extract → dedupe → pack → analyze → render → deliver
+
+    - fetch: downloads every listing page of every source at once, at most
+      ``NewsConfig.max_concurrent_per_host`` per host;
+    - extract: parses each page as soon as the pages before it are in
+      (``SourceScrape``), so stiripesurse.ro is extracted while Biziday pages
+      are still downloading;
+    - dedupe (batch): collects every source and clusters near duplicates;
+    - pack: builds the model input (full text, packed prompt or map-reduce
+      article list, as configured in ``AIConfig``);
+    - analyze: asks the model;
+    - render: renders the digest once (through the outbox when enabled) and
+      emits one delivery per recipient;
+    - deliver: sends while later deliveries are still being queued.
+
+    One run serves any number of digests (``DigestConfig``). Every source
+    is scraped once; dedupe and packing run once per distinct source set,
+    and the model is asked once per distinct (source set, prompt) pair, with
+    the prompts of a source set running concurrently. Without ``digests``,
+    the run is a single digest of ``sources`` sent to ``recipients``.
+
+    With the article store enabled, the scraped articles are recorded as seen
+    at the end of the run, and only for sources whose every analysis got a
+    model answer: articles of a failed analysis stay new for the next
+    ``only_new`` run.
+
+    Outbox digests are keyed by ``run_id`` (default: today's date) as well as
+    their content, so a digest already delivered in the same run (e.g. an
+    earlier run of the day that produced identical content) is skipped with
+    a warning, while the same content on a later day is sent again.
+
+    The delivery backend authenticates in the background from the start of
+    the run. Worker counts and queue sizes come from ``PipelineConfig``;
+    blocking calls run on a thread pool sized for them.
+
+    Raises:
+        ValueError: If a digest names an unknown source or prompt template.
+    """
+
+    def __init__(
+        self,
+        send_email: bool = False,
+        recipients: Optional[list[str]] = None,
+        only_new: bool = False,
+        sources: Optional[list[str]] = None,
+        backend: Optional["DeliveryBackend"] = None,
+        client: Optional[HttpClient] = None,
+        config: Optional[PipelineConfig] = None,
+        digests: Optional[list[DigestConfig]] = None,
+        run_id: Optional[str] = None,
+    ) -> None:
+        if digests is None:
+            digests = [
+                DigestConfig(DEFAULT_DIGEST, sources=sources or [], recipients=recipients or [])
+            ]
+        elif not digests:
+            raise ValueError("No digests to run")
+        self.digests = digests
+        # Resolved up front, so a bad definition fails before any scraping.
+        self._templates = {digest.name: digest.prompt_template() for digest in digests}
+        self._sources = {
+            digest.name: tuple(dict.fromkeys(digest.sources or SOURCES)) for digest in digests
+        }
+        self._recipients = {
+            digest.name: [recipient for recipient in digest.recipients if recipient]
+            for digest in digests
+        }
+        self.source_names = list(
+            dict.fromkeys(name for names in self._sources.values() for name in names)
+        )
+        for name in self.source_names:
+            get_source(name)
+
+        self.send_email = send_email and backend is not None and any(self._recipients.values())
+        self.only_new = only_new
+        self.backend = backend
+        self.client = client
+        self.config = config or settings.pipeline
+        self.run_id = run_id or date.today().isoformat()
+        self.results = {digest.name: DigestResult(digest.name) for digest in digests}
+
+        self._store: Optional[ArticleStore] = None
+        self._scrapes: dict[str, SourceScrape] = {}
+        # Sources of the source sets whose analyses were (not) all answered.
+        self._analyzed: set[str] = set()
+        self._unanalyzed: set[str] = set()
+        self._outbox: Optional[Outbox] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # Sources with an extraction running on a worker thread.
+        self._extracting: set[str] = set()
+        # Notified after every extraction (see ``_fetch``).
+        self._extracted: Optional[asyncio.Condition] = None
+        self._authenticated: Optional[asyncio.Future] = None
+        self._send_started: dict[str, float] = {}
+        # (digest ID, recipient) pairs already handed to deliver: digests
+        # with the same content and audience are mailed once.
+        self._queued: set[tuple[str, str]] = set()
+
+    def stages(self) -> list[Stage]:
+        """The stage definitions of this run."""
+        stages = [
+            Stage("fetch", self._fetch, workers=self.config.fetch_workers),
+            Stage("extract", self._extract, workers=self.config.extract_workers),
+            Stage("dedupe", self._dedupe, batch=True),
+            Stage("pack", self._pack),
+            Stage("analyze", self._analyze, workers=self.config.analyze_workers),
+        ]
+        if self.send_email:
+            stages += [
+                Stage("render", self._render),
+                Stage(
+                    "deliver",
+                    self._deliver,
+                    workers=self.config.deliver_workers or self.backend.workers,
+                ),
+            ]
+        return stages
+
+    def run(self) -> dict[str, DigestResult]:
+        """
+        Run the pipeline to completion in a new event loop.
+
+        Returns:
+            The result of every digest, by digest name.
+        """
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> dict[str, DigestResult]:
+        """Run the pipeline in the current event loop; see ``run``."""
+        config = self.config
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.fetch_workers
+            + config.extract_workers
+            + config.analyze_workers
+            + len(self.digests)
+            + (config.deliver_workers or (self.backend.workers if self.backend else 0))
+            + 2,
+            thread_name_prefix="pipeline",
+        )
+        self.client = self.client or get_http_client()
+        if settings.news.article_store_enabled:
+            self._store = ArticleStore.from_config()
+        elif self.only_new:
+            logger.warning("⚠️ only_new requires the article store; analyzing all articles.")
+
+        try:
+            requests = []
+            for name in self.source_names:
+                scrape = SourceScrape(get_source(name), self._store, self.only_new)
+                self._scrapes[name] = scrape
+                requests += [(scrape, page, url) for page, url in enumerate(scrape.urls, 1)]
+            hosts = ", ".join(
+                dict.fromkeys(
+                    urlsplit(url).netloc or scrape.source.name for scrape, _, url in requests
+                )
+            )
+            if len(self.digests) > 1:
+                analyses = set(zip(self._sources.values(), self._templates.values()))
+                logger.info(
+                    f"🗂️ {len(self.digests)} digests: {len(self.source_names)} sources, "
+                    f"{len(set(self._sources.values()))} source sets, {len(analyses)} analyses"
+                )
+            logger.info(f"📰 Scraping news from {hosts}...")
+
+            if self.send_email:
+                self._authenticated = asyncio.ensure_future(self._call(self.backend.authenticate))
+                for name, recipients in self._recipients.items():
+                    if recipients:
+                        self.results[name].report = BulkSendReport()
+
+            self._extracted = asyncio.Condition()
+            pipeline = Pipeline(self.stages(), queue_size=config.queue_size)
+            await pipeline.run(requests)
+            if self._store is not None:
+                await self._call(self._commit_seen)
+        finally:
+            if self._store is not None:
+                self._store.close()
+            if self._outbox is not None:
+                self._outbox.close()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        for name, result in self.results.items():
+            report = result.report
+            if report is None or not report.results:
+                continue
+            report.elapsed = time.perf_counter() - self._send_started[name]
+            label = f"{name}: " if len(self.digests) > 1 else ""
+            logger.info(
+                f"📬 {label}Delivered {report.sent}/{len(report.results)} emails "
+                f"in {report.elapsed:.2f}s"
+            )
+            for failed in report.failed:
+                logger.error(f"❌ {failed.recipient}: {failed.error}")
+        return self.results
+
+    async def _call(self, function: Callable[..., T], *args: Any) -> T:
+        """Run a blocking call on the pipeline threads, inside the current span."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, bind_context(function), *args)
+
+    def _commit_seen(self) -> None:
+        """Record the articles of every fully analyzed source as seen."""
+        for name in self._analyzed - self._unanalyzed:
+            self._scrapes[name].commit()
+        if self._unanalyzed:
+            logger.warning(
+                f"⚠️ Analysis failed; {', '.join(sorted(self._unanalyzed))} articles "
+                "stay new for the next run"
+            )
+
+    def _digests_of(self, names: tuple[str, ...]) -> list[DigestConfig]:
+        """The digests built from source set ``names``."""
+        return [digest for digest in self.digests if self._sources[digest.name] == names]
+
+    # -- stages ----------------------------------------------------------------
+
+    async def _fetch(self, request: tuple[SourceScrape, int, str], emit: Emit) -> None:
+        scrape, page, url = request
+        limit = settings.news.max_concurrent_per_host
+        if scrape.stop_at_seen:
+            # Pagination may stop at any page: fetch at most ``limit`` pages
+            # ahead of extraction, like the waves of ``scrape_source_async``.
+            async with self._extracted:
+                await self._extracted.wait_for(
+                    lambda: scrape.done or page < scrape.next_page + limit
+                )
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(limit))
+        async with semaphore:
+            # Pages after a stop (only_new, errors, article limit) are skipped.
+            if scrape.done:
+                return
+            try:
+                content = await self._call(self.client.fetch, url)
+            except Exception as e:  # pragma: no cover - network errors
+                content = e
+        await emit((scrape, page, content))
+
+    async def _extract(self, fetched: tuple[SourceScrape, int, Any], emit: Emit) -> None:
+        scrape, page, content = fetched
+        name = scrape.source.name
+        scrape.add(page, content)
+        # One extraction per source at a time; pages that arrive meanwhile
+        # are picked up by the running one or by the next loop iteration.
+        while scrape.ready and name not in self._extracting:
+            self._extracting.add(name)
+            try:
+                done = await self._call(scrape.extract_ready)
+            finally:
+                self._extracting.discard(name)
+                async with self._extracted:
+                    self._extracted.notify_all()
+            if done:
+                await emit((name, await self._call(scrape.finish)))
+
+    async def _dedupe(self, finished: list[tuple[str, list[Article]]], emit: Emit) -> None:
+        log_http_stats(self.client)
+        by_source = dict(finished)
+        for names in dict.fromkeys(self._sources.values()):
+            digests = self._digests_of(names)
+            results = {name: by_source.get(name, []) for name in names}
+            if self.only_new and not any(results.values()):
+                suffix = (
+                    f" for {', '.join(digest.name for digest in digests)}"
+                    if len(self.digests) > 1
+                    else ""
+                )
+                logger.info(f"No new articles since the last run. Nothing to analyze{suffix}.")
+                continue
+            if settings.news.dedupe_enabled:
+                results = await self._call(dedupe_articles, results)
+            for digest in digests:
+                self.results[digest.name].articles = results
+            await emit((names, results))
+
+    async def _pack(
+        self, request: tuple[tuple[str, ...], dict[str, list[Article]]], emit: Emit
+    ) -> None:
+        names, results = request
+        if settings.ai.map_reduce_enabled:
+            mode = "map_reduce"
+            payload: Any = [article for items in results.values() for article in items]
+        elif settings.ai.prompt_packing_enabled:
+            mode = "packed"
+            payload = await self._call(pack_articles, results)
+        else:
+            mode = "full"
+            payload = await self._call(format_news, results)
+        annotate(mode=mode)
+        await emit((names, mode, payload))
+
+    async def _analyze(self, request: tuple[tuple[str, ...], str, Any], emit: Emit) -> None:
+        names, mode, payload = request
+        digests = self._digests_of(names)
+        # Identical requests (same source set and prompt) are asked once.
+        prompts = {}
+        for digest in digests:
+            prompts.setdefault(self._templates[digest.name], digest.prompt)
+        if len(prompts) < len(digests):
+            count("digest_analyses_shared", len(digests) - len(prompts))
+
+        candidates = None
+        if mode == "map_reduce" and len(prompts) > 1:
+            # The scoring does not depend on the prompt: share it as well.
+            candidates = await self._call(score_candidates, payload)
+
+        async def analysis(template: str, prompt: str) -> tuple[str, bool]:
+            """The analysis and whether the model answered (not the fallback)."""
+            with span("digest.analysis", prompt=prompt, sources=",".join(names)):
+                if mode == "map_reduce":
+                    html = await self._call(
+                        get_ai_info_map_reduce, payload, True, template, candidates
+                    )
+                    return html, html != headline_list(payload)
+                if mode == "packed":
+                    html = await self._call(get_ai_info, payload.text, True, template)
+                    return restore_links(html, payload.links), html != payload.text
+                html = await self._call(get_ai_info, payload, True, template)
+                return html, html != payload
+
+        answers = await asyncio.gather(*(analysis(*item) for item in prompts.items()))
+        htmls = [html for html, _ in answers]
+        if all(answered for _, answered in answers):
+            self._analyzed.update(names)
+        else:
+            self._unanalyzed.update(names)
+        by_template = dict(zip(prompts, htmls))
+        for digest in digests:
+            html = by_template[self._templates[digest.name]]
+            self.results[digest.name].html = html
+            await emit((digest, html))
+
+    async def _render(self, analyzed: tuple[DigestConfig, str], emit: Emit) -> None:
+        digest, html = analyzed
+        recipients = self._recipients[digest.name]
+        if not recipients:
+            return
+        self._send_started[digest.name] = time.perf_counter()
+        backend = self.backend
+        report = self.results[digest.name].report
+        if not await self._authenticated:
+            report.results = [
+                SendResult(recipient, False, error="authentication failed")
+                for recipient in recipients
+            ]
+            return
+
+        subject = digest.subject or settings.gmail.default_subject
+        if settings.gmail.outbox_enabled:
+            if self._outbox is None:
+                self._outbox = Outbox.from_config()
+            digest_id = self._outbox.enqueue(subject, html, recipients, run_id=self.run_id)
+            wanted = set(recipients)
+            unfinished = [row for row in self._outbox.unfinished(digest_id) if row[1] in wanted]
+            rows = [row for row in unfinished if (row[0], row[1]) not in self._queued]
+            delivered = wanted - {row[1] for row in unfinished} - {
+                recipient for queued_id, recipient in self._queued if queued_id == digest_id
+            }
+            if delivered:
+                logger.warning(
+                    f"⚠️ Digest '{digest.name}' was already delivered to {len(delivered)} "
+                    f"recipient(s) in run {self.run_id}; skipping them"
+                )
+            rendered = await self._call(self._outbox.render, backend, rows)
+            for row in rows:
+                self._queued.add((row[0], row[1]))
+                await emit((digest.name, row[1], rendered[row[0]], row))
+        else:
+            digest_id = digest_key(subject, html, True, self.run_id)
+            message = await self._call(RenderedEmail, subject, html, backend.from_header)
+            for recipient in recipients:
+                if (digest_id, recipient) in self._queued:
+                    continue
+                self._queued.add((digest_id, recipient))
+                await emit((digest.name, recipient, message, None))
+
+    async def _deliver(
+        self, job: tuple[str, str, RenderedEmail, Optional[tuple]], emit: Emit
+    ) -> None:
+        name, recipient, message, row = job
+        if row is not None:
+            result = await self._call(self._outbox.deliver_row, self.backend, row, message)
+        else:
+            result = await self._call(self.backend.send_rendered, recipient, message)
+        self.results[name].report.results.append(result)
+        await emit(result)
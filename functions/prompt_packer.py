@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Optional
+
+# tiktoken is imported when the first tokenizer is loaded.
+TIKTOKEN_AVAILABLE = find_spec("tiktoken") is not None
+
+from config import AIConfig, settings
+from functions.article import Article
+from functions.scraping import SOURCE_HEADERS, format_news
+
+logger = logging.getLogger(__name__)
+
+# Tells the model how to use the short article IDs instead of full URLs.
+LINK_ID_NOTE = (
+    "NOTĂ: Fiecare știre are un ID scurt între paranteze drepte (ex. [a12]) în "
+    'locul link-ului. Pentru link-ul unei știri folosește href="#a12" (ID-ul '
+    "știrii); link-urile vor fi completate automat."
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_LINK_ID_RE = re.compile(r"""href=(["'])#(a\d+)\1""")
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Load the tokenizer for ``model``; None if tiktoken or its data is unavailable."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count prompt tokens with the model's local tokenizer.
+
+    Falls back to a 4-characters-per-token estimate when tiktoken (or its
+    encoding data) is not available.
+    """
+    encoding = _get_encoding(model or settings.ai.model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class PackedPrompt:
+    """Result of packing articles into the input token budget."""
+
+    text: str
+    # Short article ID (e.g. "a12") -> original URL, restored after generation.
+    links: dict[str, str] = field(default_factory=dict)
+    selected: int = 0
+    total: int = 0
+    tokens: int = 0
+    original_tokens: int = 0
+
+    @property
+    def saved_tokens(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+
+
+def _priorities(
+    articles: list[tuple[str, int, Article]],
+    source_sizes: dict[str, int],
+    config: AIConfig,
+) -> list[float]:
+    """
+    Score every article by recency, source weight and novelty.
+
+    Recency comes from the position in its source listing (newest first).
+    Novelty is one minus the highest word overlap (Jaccard) with any article
+    ranked above it, found through an inverted word index.
+    """
+    base = [
+        config.source_weights.get(source, 1.0)
+        * (1.0 - position / max(source_sizes[source], 1))
+        for source, position, _ in articles
+    ]
+    order = sorted(range(len(articles)), key=lambda i: base[i], reverse=True)
+
+    word_sets = [
+        frozenset(_WORD_RE.findall(article.title.casefold()))
+        for _, _, article in articles
+    ]
+    index: dict[str, list[int]] = {}
+    priorities = [0.0] * len(articles)
+    for i in order:
+        words = word_sets[i]
+        shared: dict[int, int] = {}
+        for word in words:
+            for other in index.get(word, ()):
+                shared[other] = shared.get(other, 0) + 1
+        overlap = max(
+            (
+                count / len(words | word_sets[other])
+                for other, count in shared.items()
+            ),
+            default=0.0,
+        )
+        priorities[i] = base[i] * (1.0 - config.novelty_weight * overlap)
+        for word in words:
+            index.setdefault(word, []).append(i)
+    return priorities
+
+
+def pack_articles(
+    results: dict[str, list[Article]],
+    budget: Optional[int] = None,
+    config: Optional[AIConfig] = None,
+) -> PackedPrompt:
+    """
+    Fill the input token budget with the highest priority articles.
+
+    Articles are ranked by ``_priorities`` and added until
+    ``AIConfig.input_token_budget`` is reached. The selected ones are written
+    back in source order with short IDs instead of URLs; the ID -> URL table
+    is returned so ``restore_links`` can put the URLs back after generation.
+    """
+    config = config or settings.ai
+    budget = budget or config.input_token_budget
+    articles = [
+        (source, position, article)
+        for source, items in results.items()
+        for position, article in enumerate(items)
+    ]
+    source_sizes = {source: len(items) for source, items in results.items()}
+
+    priorities = _priorities(articles, source_sizes, config)
+    ranked = sorted(range(len(articles)), key=lambda i: priorities[i], reverse=True)
+
+    used = count_tokens(LINK_ID_NOTE) + sum(
+        count_tokens(SOURCE_HEADERS.get(source, source)) for source in results
+    )
+    selected: set[int] = set()
+    for i in ranked:
+        cost = count_tokens(f"[a{i + 1}] {articles[i][2].title}\n")
+        if used + cost > budget:
+            continue
+        selected.add(i)
+        used += cost
+
+    sections: list[str] = [LINK_ID_NOTE]
+    links: dict[str, str] = {}
+    short_id = 0
+    current_source: Optional[str] = None
+    for i, (source, _, article) in enumerate(articles):
+        if i not in selected:
+            continue
+        if source != current_source:
+            sections.append(f"\n{SOURCE_HEADERS.get(source, source)}")
+            current_source = source
+        short_id += 1
+        links[f"a{short_id}"] = article.link
+        sections.append(f"[a{short_id}] {article.title}")
+
+    text = "\n".join(sections)
+    packed = PackedPrompt(
+        text=text,
+        links=links,
+        selected=len(selected),
+        total=len(articles),
+        tokens=count_tokens(text),
+        original_tokens=count_tokens(format_news(results)),
+    )
+    logger.info(
+        f"🧮 Prompt packing: {packed.selected}/{packed.total} articles, "
+        f"{packed.tokens} tokens (saved {packed.saved_tokens} of "
+        f"{packed.original_tokens})"
+    )
+    return packed
+
+
+def restore_links(html: str, links: dict[str, str]) -> str:
+    """Replace ``href="#aN"`` article IDs written by the model with the original URLs."""
+
+    def replace(match: re.Match) -> str:
+        url = links.get(match.group(2))
+        if url is None:
+            return match.group(0)
+        quote = match.group(1)
+        return f"href={quote}{url}{quote}"
+
+    return _LINK_ID_RE.sub(replace, html)
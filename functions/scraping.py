@@ -1,209 +1,396 @@
 from __future__ import annotations
 
-import re
-from typing import Union
+import asyncio
+import logging
+from typing import Optional, Union
+from urllib.parse import urlsplit
 
-try:
-    import requests
-    from bs4 import BeautifulSoup
+from config import settings
+from functions.article import Article, write_formatted
+from functions.article_store import ArticleStore
+from functions.html_parser import BS4_AVAILABLE, parse_html
+from functions.http_client import HTTP_AVAILABLE, HttpClient, get_http_client
+from functions.metrics import count, span
+from functions.sources import SOURCE_HEADERS, SOURCES, CompiledSource, get_source
 
-    SCRAPING_AVAILABLE = True
-except ImportError:  # pragma: no cover - optional dependency
-    SCRAPING_AVAILABLE = False
+SCRAPING_AVAILABLE = HTTP_AVAILABLE and BS4_AVAILABLE
 
-from config import settings
+logger = logging.getLogger(__name__)
 
 
-def _default_headers() -> dict:
-    """Common HTTP headers for scraping requests."""
-    return {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0 Safari/537.36"
-        )
-    }
+def _fetch_page(url: str, client: HttpClient) -> bytes:
+    """Fetch a single page synchronously and return its raw body."""
+    return client.fetch(url)
 
 
-def scrape_stiripesurse(return_formatted: bool = False) -> Union[list, str]:
+async def fetch_pages(
+    urls: list[str],
+    max_per_host: Optional[int] = None,
+    client: Optional[HttpClient] = None,
+) -> list[Union[bytes, Exception]]:
     """
-    Scrape news from stiripesurse.ro and optionally format it.
+    Fetch several pages concurrently.
+
+    Requests run on worker threads and are throttled with one semaphore per
+    host, so a single site never sees more than ``max_per_host`` open requests.
 
     Returns:
-        Either a list of article dicts or a formatted string.
+        One entry per URL, in input order: the page body, or the exception
+        raised while fetching it.
     """
-    if not SCRAPING_AVAILABLE:
-        print(
-            "Error: requests and BeautifulSoup not installed. "
-            "Install with: pip install requests beautifulsoup4"
-        )
-        return [] if not return_formatted else ""
+    client = client or get_http_client()
+    limit = max_per_host or settings.news.max_concurrent_per_host
+    semaphores: dict[str, asyncio.Semaphore] = {}
 
-    url = settings.news.stiripesurse_url
+    async def fetch(url: str) -> bytes:
+        host = urlsplit(url).netloc
+        semaphore = semaphores.setdefault(host, asyncio.Semaphore(limit))
+        async with semaphore:
+            return await asyncio.to_thread(_fetch_page, url, client)
 
-    try:
-        print("📰 Scraping news from stiripesurse.ro...")
-        response = requests.get(url, headers=_default_headers(), timeout=10)
-        response.raise_for_status()
+    return await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
 
-        soup = BeautifulSoup(response.content, "html.parser")
 
-        # Find articles
-        articles: list[dict[str, str]] = []
-        for article in soup.find_all("article")[: settings.news.max_articles]:
-            title_elem = article.find(["h2", "h3", "a"])
-            link_elem = article.find("a", href=True)
+def _format_articles(header: str, articles: list[Article]) -> str:
+    """Format scraped articles as a numbered list for the AI prompt."""
+    return write_formatted([(header, articles)]).getvalue()
 
-            if title_elem and link_elem:
-                title = title_elem.get_text(strip=True)
-                link = link_elem.get("href", "")
-                if not link.startswith("http"):
-                    link = "https://www.stiripesurse.ro" + link
 
-                articles.append({"title": title, "link": link})
+def format_news(results: dict[str, list[Article]]) -> str:
+    """Combine per-source article lists into the news text sent to the AI."""
+    return write_formatted(
+        (SOURCE_HEADERS[source], articles) for source, articles in results.items()
+    ).getvalue()
 
-        print(f"✅ Found {len(articles)} articles")
-        if return_formatted:
-            formatted = "Știri din stiripesurse.ro:\n\n"
-            for i, article in enumerate(articles, 1):
-                formatted += f"{i}. {article['title']}\n   {article['link']}\n\n"
-            return formatted
 
+def _apply_store(
+    articles: list[Article],
+    source: str,
+    store: Optional[ArticleStore],
+    only_new: bool,
+) -> list[Article]:
+    """With a store and ``only_new``, keep only the articles it has not seen."""
+    if store is None or not only_new:
         return articles
 
-    except Exception as e:  # pragma: no cover - network errors
-        print(f"Error: {e}")
-        return [] if not return_formatted else ""
+    new_articles = store.filter_new(articles)
+    logger.info(f"🆕 {len(new_articles)} of {len(articles)} {source} items are new")
+    return new_articles
+
 
+class SourceScrape:
+    """
+    Extraction state of one source while its listing pages arrive.
+
+    Pages are handed over with ``add`` in any order and extracted strictly in
+    page order by ``extract_ready``, so results do not depend on which
+    download finishes first. The scrape is done after the last page, at
+    ``NewsConfig.max_articles``, after a page that failed to download and,
+    with a store and ``only_new``, after the first page that contains an
+    already seen item (everything older was covered by a previous run).
+
+    Nothing is marked as seen while scraping: ``commit`` records the
+    extracted articles once they were processed, so a run that fails later
+    leaves them new for the next one.
+    """
 
-def scrape_biziday(return_formatted: bool = False) -> Union[list, str]:
+    def __init__(
+        self,
+        source: CompiledSource,
+        store: Optional[ArticleStore] = None,
+        only_new: bool = False,
+    ) -> None:
+        self.source = source
+        self.urls = source.page_urls()
+        self.store = store
+        self.only_new = only_new
+        self.stop_at_seen = store is not None and only_new and len(self.urls) > 1
+        self.articles: list[Article] = []
+        self.done = False
+        self._seen_keys: set[tuple[str, str]] = set()
+        # Downloaded pages waiting for the pages before them, by page number.
+        self._pending: dict[int, Union[bytes, Exception]] = {}
+        self._next_page = 1
+
+    def add(self, page: int, content: Union[bytes, Exception]) -> None:
+        """Hand over listing page ``page`` (1-based), or the error raised fetching it."""
+        if not self.done:
+            self._pending[page] = content
+
+    @property
+    def next_page(self) -> int:
+        """The first page that has not been extracted yet."""
+        return self._next_page
+
+    @property
+    def ready(self) -> bool:
+        """Whether the next page in order is waiting to be extracted."""
+        return not self.done and self._next_page in self._pending
+
+    def extract_ready(self) -> bool:
+        """
+        Extract the waiting pages that continue the page sequence.
+
+        Returns:
+            True once the scrape is done.
+        """
+        while self.ready:
+            page = self._next_page
+            self._extract(page, self._pending.pop(page))
+            self._next_page += 1
+            if self._next_page > len(self.urls):
+                self.done = True
+        if self.done:
+            self._pending.clear()
+        return self.done
+
+    def _extract(self, page: int, content: Union[bytes, Exception]) -> None:
+        name = self.source.name
+        if len(self.articles) >= settings.news.max_articles:
+            self.done = True
+            return
+        if isinstance(content, Exception):
+            logger.error(f"Error fetching {name} page {page}: {content}")
+            count("scrape_page_errors", source=name)
+            self.done = True
+            return
+
+        with span("scrape.parse", source=name, page=page):
+            soup = parse_html(content)
+            before = len(self.articles)
+            self.source.extract(soup, self.articles, self._seen_keys)
+        count("scrape_pages", source=name)
+
+        page_items = self.articles[before:]
+        if self.stop_at_seen and len(self.store.filter_new(page_items)) < len(page_items):
+            logger.info(f"⏹️ Reached already seen {name} items on page {page}")
+            self.done = True
+
+    def finish(self) -> list[Article]:
+        """
+        Count and log the extracted articles and filter them through the store.
+
+        Returns:
+            The articles in page order (only the new ones with ``only_new``).
+        """
+        count("articles_extracted", len(self.articles), source=self.source.name)
+        logger.info(f"✅ Found {len(self.articles)} {self.source.spec.label}")
+        return _apply_store(self.articles, self.source.name, self.store, self.only_new)
+
+    def commit(self) -> int:
+        """
+        Record every extracted article in the store as seen.
+
+        Returns:
+            Number of articles that were not in the store before.
+        """
+        if self.store is None:
+            return 0
+        return self.store.record(self.articles, self.source.name)
+
+
+async def scrape_source_async(
+    source: Union[str, CompiledSource],
+    client: Optional[HttpClient] = None,
+    max_per_host: Optional[int] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+) -> list[Article]:
     """
-    Scrape headlines from biziday.ro and optionally format them.
+    Scrape one registered source with the async engine.
 
-    The homepage groups multiple short, verified news items. We extract
-    each bullet-like item as a separate "article" with title and link.
+    Listing pages are fetched concurrently and parsed strictly in page order.
+    With a store and ``only_new``, pages are fetched in waves of
+    ``max_per_host`` and pagination stops after the first page that contains
+    an already seen item (see ``SourceScrape``). The articles are not
+    recorded in the store; call ``ArticleStore.record`` once they were
+    processed.
 
     Returns:
-        Either a list of {"title": ..., "link": ...} dicts
-        or a formatted string suitable for sending to the AI.
+        List of ``Article`` records in page order.
+    """
+    if isinstance(source, str):
+        source = get_source(source)
+    scrape = SourceScrape(source, store, only_new)
+    urls = scrape.urls
+    wave = (
+        max_per_host or settings.news.max_concurrent_per_host
+        if scrape.stop_at_seen
+        else len(urls)
+    )
+
+    with span("scrape.source", source=source.name) as record:
+        try:
+            for offset in range(0, len(urls), wave):
+                pages = await fetch_pages(
+                    urls[offset : offset + wave], max_per_host=max_per_host, client=client
+                )
+                for page, content in enumerate(pages, offset + 1):
+                    scrape.add(page, content)
+                if scrape.extract_ready():
+                    break
+
+        except Exception as e:  # pragma: no cover - network errors
+            logger.error(f"Error scraping {source.name}: {e}")
+
+        record.attributes["articles"] = len(scrape.articles)
+        return scrape.finish()
+
+
+def log_http_stats(client: HttpClient) -> None:
+    """Log connection reuse and HTTP cache hits of ``client``."""
+    stats = client.stats()
+    logger.info(
+        f"🔌 HTTP: {stats['requests']} requests over {stats['connections']} "
+        f"connections ({stats['reused']} reused)"
+    )
+    if client.cache is not None:
+        cache_stats = client.cache.stats()
+        logger.info(
+            f"🗄️ HTTP cache: {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses"
+        )
+
+
+async def scrape_all_async(
+    max_per_host: Optional[int] = None,
+    client: Optional[HttpClient] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+    sources: Optional[list[str]] = None,
+) -> dict[str, list[Article]]:
+    """
+    Scrape every registered source (or only ``sources``) concurrently.
+
+    All sources are downloaded at the same time; extraction runs in page
+    order so the result is identical to a sequential scrape.
+
+    Returns:
+        {source name: [Article, ...]} in registry order.
+    """
+    selected = [get_source(name) for name in (sources or list(SOURCES))]
+    hosts = ", ".join(
+        dict.fromkeys(urlsplit(source.url()).netloc or source.name for source in selected)
+    )
+    logger.info(f"📰 Scraping news from {hosts}...")
+    client = client or get_http_client()
+    results = await asyncio.gather(
+        *(
+            scrape_source_async(
+                source,
+                client=client,
+                max_per_host=max_per_host,
+                store=store,
+                only_new=only_new,
+            )
+            for source in selected
+        )
+    )
+
+    log_http_stats(client)
+    return {source.name: articles for source, articles in zip(selected, results)}
+
+
+def scrape_all(
+    return_formatted: bool = False,
+    client: Optional[HttpClient] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+    sources: Optional[list[str]] = None,
+) -> dict[str, Union[list, str]]:
+    """
+    Scrape every registered news source concurrently.
+
+    Args:
+        store: Optional article store for ``only_new``. Scraped articles are
+            not recorded in it; call ``ArticleStore.record`` once they were
+            processed.
+        only_new: With a store, keep only articles not seen in earlier runs.
+        sources: Names of the sources to scrape (default: all registered).
+
+    Returns:
+        {"stiripesurse": ..., "biziday": ..., ...} where each value is either
+        a list of ``Article`` records or a formatted string, like
+        ``scrape_source``.
     """
     if not SCRAPING_AVAILABLE:
-        print(
+        logger.error(
             "Error: requests and BeautifulSoup not installed. "
             "Install with: pip install requests beautifulsoup4"
         )
-        return [] if not return_formatted else ""
+        empty: Union[list, str] = "" if return_formatted else []
+        return {name: empty for name in (sources or SOURCES)}
 
-    base_url = settings.news.biziday_url.rstrip("/")
+    results = asyncio.run(
+        scrape_all_async(client=client, store=store, only_new=only_new, sources=sources)
+    )
+    if not return_formatted:
+        return dict(results)
 
-    try:
-        print("📰 Scraping news from biziday.ro...")
-
-        articles: list[dict[str, str]] = []
-        seen_keys: set[tuple[str, str]] = set()
-
-        def extract_from_soup(soup: "BeautifulSoup") -> None:
-            """Extract candidate items from a Biziday soup into the articles list."""
-            # Heuristic 1: try to find the main "Știri verificate" (verified news) section
-            verified_header = None
-            for tag in soup.find_all(["h1", "h2", "h3", "strong"]):
-                text = tag.get_text(strip=True)
-                if "Știri verificate" in text:
-                    verified_header = tag
-                    break
+    return {
+        source: _format_articles(SOURCE_HEADERS[source], articles)
+        for source, articles in results.items()
+    }
 
-            candidate_lis: list = []
-            if verified_header:
-                # Look for the first <ul> or container following the header
-                next_container = verified_header.find_next(
-                    ["ul", "div", "section"], recursive=False
-                )
-                if not next_container:
-                    next_container = verified_header.find_next(
-                        ["ul", "div", "section"]
-                    )
-                if next_container:
-                    candidate_lis = next_container.find_all("li", recursive=True)
-
-            # Fallback: if we didn't find a dedicated list, collect <li> items
-            if not candidate_lis:
-                candidate_lis = soup.find_all("li")
-
-            for li in candidate_lis:
-                # Skip menu / cookie / footer items heuristically
-                parent_id = li.parent.get("id", "") if li.parent else ""
-                parent_class = (
-                    " ".join(li.parent.get("class", [])) if li.parent else ""
-                )
-                if any(
-                    key in (parent_id + parent_class).lower()
-                    for key in ["menu", "cookie", "footer", "privacy"]
-                ):
-                    continue
-
-                text = li.get_text(" ", strip=True)
-                if not text:
-                    continue
-
-                # Many Biziday bullets end with "Biziday · [date]"
-                cleaned_text = re.sub(
-                    r"Biziday\s*·\s*\d{4}-\d{2}-\d{2}.*$", "", text
-                ).strip()
-                cleaned_text = cleaned_text or text
-
-                # Extract first link if present
-                link_tag = li.find("a", href=True)
-                link = link_tag["href"].strip() if link_tag else base_url
-                if link and not link.startswith("http"):
-                    # Make relative URLs absolute
-                    link = base_url + "/" + link.lstrip("/")
-
-                key = (cleaned_text, link)
-                if key in seen_keys:
-                    continue
-                seen_keys.add(key)
-                articles.append({"title": cleaned_text, "link": link})
-
-                if len(articles) >= settings.news.max_articles:
-                    return
-
-        # Biziday usually uses pagination like /page/2/, /page/3/ etc.
-        max_pages = 8  # roughly equivalent to 7–8 "More news" clicks
-        for page in range(1, max_pages + 1):
-            if len(articles) >= settings.news.max_articles:
-                break
-
-            if page == 1:
-                page_url = base_url
-            else:
-                page_url = f"{base_url}/page/{page}/"
-
-            try:
-                response = requests.get(page_url, headers=_default_headers(), timeout=10)
-                response.raise_for_status()
-            except Exception as e:  # pragma: no cover - network errors
-                print(f"Error fetching Biziday page {page}: {e}")
-                break
-
-            soup = BeautifulSoup(response.content, "html.parser")
-            extract_from_soup(soup)
-
-        print(f"✅ Found {len(articles)} Biziday items")
-
-        if return_formatted:
-            formatted = "Știri din biziday.ro (Știri verificate):\n\n"
-            for i, article in enumerate(articles, 1):
-                formatted += f"{i}. {article['title']}\n   {article['link']}\n\n"
-            return formatted
 
-        return articles
+def scrape_source(
+    name: str,
+    return_formatted: bool = False,
+    client: Optional[HttpClient] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+) -> Union[list, str]:
+    """
+    Scrape one registered source and optionally format it.
 
-    except Exception as e:  # pragma: no cover - network errors
-        print(f"Error scraping biziday.ro: {e}")
+    Returns:
+        Either a list of ``Article`` records (title, link, source, scrape
+        time) or a formatted string suitable for sending to the AI.
+    """
+    if not SCRAPING_AVAILABLE:
+        logger.error(
+            "Error: requests and BeautifulSoup not installed. "
+            "Install with: pip install requests beautifulsoup4"
+        )
         return [] if not return_formatted else ""
 
+    source = get_source(name)
+    logger.info(f"📰 Scraping news from {urlsplit(source.url()).netloc or name}...")
+    articles = asyncio.run(
+        scrape_source_async(source, client=client, store=store, only_new=only_new)
+    )
+    if return_formatted:
+        return _format_articles(source.header, articles)
+
+    return articles
+
+
+def scrape_stiripesurse(
+    return_formatted: bool = False,
+    client: Optional[HttpClient] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+) -> Union[list, str]:
+    """Scrape news from stiripesurse.ro; see ``scrape_source``."""
+    return scrape_source("stiripesurse", return_formatted, client, store, only_new)
+
+
+def scrape_biziday(
+    return_formatted: bool = False,
+    client: Optional[HttpClient] = None,
+    store: Optional[ArticleStore] = None,
+    only_new: bool = False,
+) -> Union[list, str]:
+    """
+    Scrape headlines from biziday.ro; see ``scrape_source``.
 
-def scrape_web(url: str) -> dict:
+    The homepage groups multiple short, verified news items; each bullet-like
+    item becomes a separate "article" with title and link.
+    """
+    return scrape_source("biziday", return_formatted, client, store, only_new)
+
+
+def scrape_web(url: str, client: Optional[HttpClient] = None) -> dict:
     """
     Scrape content from an arbitrary URL and extract basic information.
 
@@ -211,20 +398,14 @@ def scrape_web(url: str) -> dict:
         dict with title, text, and links.
     """
     if not SCRAPING_AVAILABLE:
-        print("Error: requests and BeautifulSoup not installed")
+        logger.error("Error: requests and BeautifulSoup not installed")
         return {"title": "", "text": "", "links": []}
 
     try:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36"
-            )
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        client = client or get_http_client()
+        content = client.fetch(url)
 
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = parse_html(content)
 
         # Remove script and style elements
         for script in soup(["script", "style"]):
@@ -247,20 +428,20 @@ def scrape_web(url: str) -> dict:
             if link_text:
                 links.append({"href": href[:50], "text": link_text[:60]})
 
-        print(f"Title: {title}")
-        print(f"Found {len(soup.find_all('h1'))} h1 tags")
-        print(f"Found {len(soup.find_all('h2'))} h2 tags")
-        print(f"Found {len(soup.find_all('h3'))} h3 tags")
-        print(f"Found {len(soup.find_all('a', href=True))} links")
+        logger.debug(f"Title: {title}")
+        logger.debug(f"Found {len(soup.find_all('h1'))} h1 tags")
+        logger.debug(f"Found {len(soup.find_all('h2'))} h2 tags")
+        logger.debug(f"Found {len(soup.find_all('h3'))} h3 tags")
+        logger.debug(f"Found {len(soup.find_all('a', href=True))} links")
 
-        print("\nFirst 10 links:")
+        logger.debug("First 10 links:")
         for link in links[:10]:
-            print(f" {link['href']:50} -> {link['text'][:60]}")
+            logger.debug(f" {link['href']:50} -> {link['text'][:60]}")
 
         return {"title": title, "text": text, "links": links}
 
     except Exception as e:  # pragma: no cover - network errors
-        print(f"Error: {e}")
+        logger.error(f"Error: {e}")
         return {"title": "", "text": "", "links": []}
 
 
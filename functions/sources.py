@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import re
+import time
+from typing import TYPE_CHECKING, Optional
+
+from config import settings
+from config.sources import DEFAULT_SOURCES, SourceSpec
+from functions.article import Article
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+class _NewsFields(dict):
+    """``str.format_map`` mapping that reads ``settings.news`` on demand."""
+
+    def __missing__(self, key: str):
+        return getattr(settings.news, key)
+
+
+def _join_link(base: str, link: str) -> str:
+    """Make a relative link absolute against ``base``."""
+    return base.rstrip("/") + "/" + link.lstrip("/")
+
+
+class CompiledSource:
+    """
+    Extractor compiled from a ``SourceSpec``.
+
+    The cleanup patterns are merged into one regex and the parent exclusion
+    words into another when the source is registered, so extraction is a
+    single pass over the item elements with no per-item setup.
+    """
+
+    def __init__(self, spec: SourceSpec) -> None:
+        self.spec = spec
+        self._cleanup = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in spec.title_cleanup))
+            if spec.title_cleanup
+            else None
+        )
+        self._exclude = (
+            re.compile("|".join(re.escape(word.lower()) for word in spec.exclude_parent))
+            if spec.exclude_parent
+            else None
+        )
+        self._title_tags = list(spec.title_tags)
+        self._anchor_tags = list(spec.anchor_tags)
+        self._container_tags = list(spec.container_tags)
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def header(self) -> str:
+        return self.spec.header
+
+    def url(self) -> str:
+        """First listing page, with settings references resolved."""
+        return self.spec.url.format_map(_NewsFields())
+
+    def page_urls(self) -> list[str]:
+        """All listing page URLs, in page order."""
+        first = self.url()
+        if not self.spec.page_url:
+            return [first]
+        max_pages = self.spec.max_pages
+        if isinstance(max_pages, str):
+            max_pages = getattr(settings.news, max_pages)
+        return [first] + [
+            self.spec.page_url.format_map(_NewsFields(url=first.rstrip("/"), page=page))
+            for page in range(2, max_pages + 1)
+        ]
+
+    def link_base(self) -> str:
+        """Base URL for relative links and for items without a link."""
+        base = self.spec.link_base or self.spec.url
+        return base.format_map(_NewsFields()).rstrip("/")
+
+    def _items(self, soup: "BeautifulSoup") -> list:
+        """Item elements of the anchored section, or of the whole page."""
+        items: list = []
+        if self.spec.anchor_text:
+            anchor = next(
+                (
+                    tag
+                    for tag in soup.find_all(self._anchor_tags)
+                    if self.spec.anchor_text in tag.get_text(strip=True)
+                ),
+                None,
+            )
+            container = anchor.find_next(self._container_tags) if anchor else None
+            if container:
+                items = container.find_all(self.spec.item_tag)
+        return items or soup.find_all(self.spec.item_tag)
+
+    def extract(
+        self,
+        soup: "BeautifulSoup",
+        articles: Optional[list[Article]] = None,
+        seen_keys: Optional[set[tuple[str, str]]] = None,
+    ) -> list[Article]:
+        """
+        Append the ``Article`` items of one page to ``articles``.
+
+        ``seen_keys`` carries the (title, link) pairs of earlier pages when the
+        source deduplicates. At most ``NewsConfig.max_articles`` are kept.
+
+        Returns:
+            The ``articles`` list.
+        """
+        articles = [] if articles is None else articles
+        seen_keys = set() if seen_keys is None else seen_keys
+        spec = self.spec
+        limit = settings.news.max_articles
+        base = self.link_base()
+        scraped_at = time.time()
+
+        items = self._items(soup)
+        if spec.limit_candidates:
+            items = items[:limit]
+
+        for item in items:
+            if len(articles) >= limit:
+                break
+
+            if self._exclude is not None and item.parent is not None:
+                parent = item.parent
+                marker = parent.get("id", "") + " ".join(parent.get("class", []))
+                if self._exclude.search(marker.lower()):
+                    continue
+
+            if self._title_tags:
+                title_elem = item.find(self._title_tags)
+                if title_elem is None:
+                    continue
+                title = title_elem.get_text(spec.title_separator, strip=True)
+            else:
+                title = item.get_text(spec.title_separator, strip=True)
+            if not title and spec.skip_empty_title:
+                continue
+            if self._cleanup is not None:
+                title = self._cleanup.sub("", title).strip() or title
+
+            link_tag = item.find("a", href=True)
+            if link_tag is None:
+                if spec.require_link:
+                    continue
+                link = base
+            else:
+                link = link_tag["href"].strip()
+                # An empty href links to the site itself.
+                if not link:
+                    link = base
+                elif not link.startswith("http"):
+                    link = _join_link(base, link)
+
+            if spec.dedupe:
+                key = (title, link)
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+            articles.append(Article(title, link, spec.name, scraped_at))
+
+        return articles
+
+
+# Registered sources by name, in scrape order.
+SOURCES: dict[str, CompiledSource] = {}
+# Section header of every registered source in the text sent to the AI.
+SOURCE_HEADERS: dict[str, str] = {}
+
+
+def register_source(spec: SourceSpec) -> CompiledSource:
+    """Compile ``spec`` and add (or replace) it in the registry."""
+    compiled = CompiledSource(spec)
+    SOURCES[spec.name] = compiled
+    SOURCE_HEADERS[spec.name] = spec.header
+    return compiled
+
+
+def get_source(name: str) -> CompiledSource:
+    """
+    Look up a registered source.
+
+    Raises:
+        ValueError: If no source is registered under ``name``.
+    """
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown news source {name!r}; registered: {', '.join(SOURCES)}"
+        ) from None
+
+
+for _spec in DEFAULT_SOURCES:
+    register_source(_spec)
@@ -7,62 +7,244 @@ This module delegates responsibilities to:
 - scraping.py        → scraping news and arbitrary web pages
 - ai_client.py       → talking to OpenAI and cleaning the HTML
 - email_service.py   → formatting and sending Gmail emails
+- outbox.py          → durable per-recipient delivery status (resumable sends)
+- pipeline.py        → staged async pipeline running the whole flow
+- daemon.py          → long-running mode: cron-like scheduler and local trigger/health endpoint
 - config.py          → centralised configuration and environment handling
 """
 
+import argparse
+import logging
+import time
 from typing import Optional
 
-from config import settings
-from functions.ai_client import get_ai_info
-from functions.email_service import send_email_with_gmail
-from functions.scraping import scrape_biziday, scrape_stiripesurse
+from config import DigestConfig, load_digests, settings
+from functions.ai_client import get_openai_client
+from functions.daemon import NewsDaemon
+from functions.email_service import DeliveryBackend, get_delivery_backend
+from functions.html_parser import parse_html
+from functions.http_client import get_http_client
+from functions.metrics import record_run, span
+from functions.outbox import Outbox
+from functions.pipeline import NewsDigestPipeline
+from functions.prompt_packer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging() -> None:
+    """
+    Send application logs to stderr as plain messages.
+
+    The application loggers use ``MetricsConfig.log_level``; third-party
+    libraries only report warnings. A handler configured by the caller is
+    kept.
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    for name in ("__main__", "main", "functions"):
+        logging.getLogger(name).setLevel(settings.metrics.log_level)
 
 
 def run_daily_news_flow(
     send_email: bool = False,
     recipients: Optional[list[str]] = None,
+    only_new: bool = False,
+    digests: Optional[list[DigestConfig]] = None,
 ) -> None:
     """
-    Orchestrate the full flow:
+    Orchestrate the full flow as the default ``NewsDigestPipeline``:
 
     1. Scrape news from stiripesurse.ro and biziday.ro
     2. Build the combined news text and send it to the AI for HTML analysis
     3. Optionally send the final AI result via Gmail
+
+    The stages overlap where they can (pages are extracted while others
+    download, emails go out as soon as the digest is rendered). With
+    ``only_new``, only articles not seen in a previous run are analyzed.
+    Every stage is timed; the run report is written as configured in
+    ``MetricsConfig``.
+
+    With ``digests`` (or ``DIGESTS_FILE`` and no explicit ``recipients``),
+    one run produces every digest, sharing the scraping and any identical
+    analysis between them.
     """
-    # 1. Scrape news from both sources
-    news_stiripesurse = scrape_stiripesurse(return_formatted=True)
-    news_biziday = scrape_biziday(return_formatted=True)
+    configure_logging()
+    with record_run(send_email=send_email, only_new=only_new):
+        _daily_news_flow(send_email, recipients, only_new, digests)
 
-    combined_news = f"{news_stiripesurse}\n\n{news_biziday}"
 
-    # 2. Get AI HTML analysis on combined news
-    info_html = get_ai_info(combined_news)
+def _daily_news_flow(
+    send_email: bool,
+    recipients: Optional[list[str]],
+    only_new: bool,
+    digests: Optional[list[DigestConfig]],
+    shared_backend: Optional[DeliveryBackend] = None,
+) -> None:
+    if digests is None and recipients is None and settings.digests:
+        digests = settings.digests
 
-    # 3. Optionally send email(s) with the final AI result only
+    backend = None
     if send_email:
-        recipients = recipients or settings.email_recipients
-        if not recipients:
-            print(
-                "\n⚠️ No email recipients configured. "
+        if digests is None:
+            recipients = [
+                recipient for recipient in recipients or settings.email_recipients if recipient
+            ]
+            has_recipients = bool(recipients)
+        else:
+            has_recipients = any(digest.recipients for digest in digests)
+        if has_recipients:
+            backend = shared_backend or get_delivery_backend(from_name="AI News")
+        else:
+            logger.warning(
+                "⚠️ No email recipients configured. "
                 "Set EMAIL_RECIPIENTS in .env or pass a list of recipients."
             )
-            return
-
-        for recipient in recipients:
-            if recipient:
-                send_email_with_gmail(
-                    to_email=recipient,
-                    subject=settings.gmail.default_subject,
-                    body=info_html,
-                    from_name="AI News",
-                    is_html=True,
-                )
+
+    try:
+        results = NewsDigestPipeline(
+            send_email=backend is not None,
+            recipients=recipients,
+            only_new=only_new,
+            backend=backend,
+            digests=digests,
+        ).run()
+    finally:
+        if backend is not None and backend is not shared_backend:
+            backend.close()
+
+    if any(result.html is not None for result in results.values()) and not send_email:
+        # If not sending email, just log a short message
+        logger.info("AI analysis generated (HTML). Email sending is disabled in this run.")
+
+
+def _warm_up(backend: Optional[DeliveryBackend]) -> None:
+    """Import the heavy libraries and open the long-lived clients once."""
+    start = time.perf_counter()
+    get_http_client()
+    get_openai_client()
+    parse_html("<p></p>")
+    if settings.ai.prompt_packing_enabled:
+        count_tokens("")
+    if backend is not None and not backend.authenticate():
+        logger.warning("⚠️ Email backend authentication failed; it is retried on every run.")
+    logger.info(f"🔥 Clients ready in {time.perf_counter() - start:.2f}s")
+
+
+def run_daemon(digests: Optional[list[DigestConfig]] = None) -> None:
+    """
+    Run as a long-lived daemon (``--daemon``).
+
+    Settings, the HTTP pool and cache, the OpenAI client and the delivery
+    backend (with its Gmail service or SMTP connections) are set up once and
+    reused by every run. Runs follow ``DaemonConfig.schedule`` and can be
+    started through the local endpoint (``POST /run``); see
+    ``functions.daemon.NewsDaemon``.
+    """
+    configure_logging()
+    config = settings.daemon
+    digests = digests or settings.digests or None
+    backend = None
+    if config.send_email and (
+        any(digest.recipients for digest in digests)
+        if digests
+        else settings.email_recipients
+    ):
+        backend = get_delivery_backend(from_name="AI News")
+    _warm_up(backend)
+
+    def job(reason: str, only_new: bool) -> None:
+        with record_run(send_email=config.send_email, only_new=only_new, trigger=reason):
+            _daily_news_flow(config.send_email, None, only_new, digests, backend)
+
+    try:
+        NewsDaemon(job, config).serve()
+    finally:
+        if backend is not None:
+            backend.close()
+
+
+def resume_pending_deliveries() -> None:
+    """
+    Finish interrupted sends from the outbox.
+
+    Only the deliveries of the most recent run that are not marked as sent
+    are retried (older runs, e.g. addresses rejected days ago, are left
+    alone); scraping and the AI analysis are not run again.
+    """
+    configure_logging()
+    with record_run("resume"):
+        outbox = Outbox.from_config()
+        sender = get_delivery_backend(from_name="AI News")
+        try:
+            run_id = outbox.latest_run()
+            pending = len(outbox.unfinished(run_id=run_id)) if run_id is not None else 0
+            older = len(outbox.unfinished()) - pending
+            if older:
+                logger.info(f"🗃️ Outbox: leaving {older} unfinished deliveries of older runs")
+            if not pending:
+                logger.info("📭 Outbox: nothing left to deliver.")
+                return
+            logger.info(f"📬 Outbox: resuming {pending} unfinished deliveries of run {run_id}")
+            with span("send", backend=sender.name):
+                outbox.deliver(sender, run_id=run_id)
+        finally:
+            sender.close()
+            outbox.close()
+
+
+def main(argv: Optional[list[str]] = None, send_email: bool = False) -> None:
+    """
+    Command line entry point (``news-ai-emailer`` and ``python main.py``).
+
+    ``send_email`` is the default when neither ``--send`` nor ``--no-email``
+    is given: ``python main.py`` sends, as the original script did, while
+    the ``news-ai-emailer`` console script only generates the analysis
+    unless asked to send.
+    """
+    parser = argparse.ArgumentParser(description="Scrape news, analyze it with AI and email the digest.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="only deliver the unfinished emails left in the outbox",
+    )
+    parser.add_argument(
+        "--digests",
+        metavar="FILE",
+        help="JSON file of digest definitions to produce in one run (overrides DIGESTS_FILE)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running: digests on DAEMON_SCHEDULE and on POST /run to the local endpoint",
+    )
+    sending = parser.add_mutually_exclusive_group()
+    sending.add_argument(
+        "--send",
+        action="store_true",
+        default=None,
+        dest="send_email",
+        help="email the digest" + (" (default)" if send_email else ""),
+    )
+    sending.add_argument(
+        "--no-email",
+        action="store_false",
+        dest="send_email",
+        help="only generate the analysis, do not send it" + ("" if send_email else " (default)"),
+    )
+    args = parser.parse_args(argv)
+    digests = load_digests(args.digests) if args.digests else None
+    send = send_email if args.send_email is None else args.send_email
+
+    if args.resume:
+        resume_pending_deliveries()
+    elif args.daemon:
+        settings.daemon.send_email = settings.daemon.send_email and send
+        run_daemon(digests)
     else:
-        # If not sending email, just print a short message
-        print("\nAI analysis generated (HTML). Email sending is disabled in this run.")
+        run_daily_news_flow(send_email=send, digests=digests)
 
 
 if __name__ == "__main__":
-    # By default, keep the same behaviour as the original script:
-    # generate the AI analysis and send it by email (since this is your workflow).
-    run_daily_news_flow(send_email=True)
+    # Keep the behaviour of the original script: generate the AI analysis
+    # and send it by email.
+    main(send_email=True)
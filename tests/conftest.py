@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import pytest
+
+# A route answers one request with (status, headers, body).
+Route = Callable[[BaseHTTPRequestHandler], tuple[int, dict[str, str], bytes]]
+
+
+@dataclass
+class LocalServer:
+    """A local HTTP stand-in: routes by path, every request recorded."""
+
+    url: str
+    routes: dict[str, Route] = field(default_factory=dict)
+    # (method, path, headers) of every request received.
+    requests: list[tuple[str, str, dict[str, str]]] = field(default_factory=list)
+
+    def hits(self, path: str) -> int:
+        return sum(
+            1 for _, request_path, _ in self.requests if request_path.split("?")[0] == path
+        )
+
+
+@pytest.fixture
+def local_server():
+    server_state = LocalServer(url="")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            self.body = self.rfile.read(length) if length else b""
+            server_state.requests.append((self.command, self.path, dict(self.headers)))
+            route = server_state.routes.get(self.path.split("?")[0])
+            if route is None:
+                status, headers, body = 404, {}, b"not found"
+            else:
+                status, headers, body = route(self)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        do_GET = do_POST = _handle
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server_state.url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        yield server_state
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from functions.ai_client import _parse_batch_scores
+
+
+def test_parses_items():
+    raw = 'Sure:\n{"items": [{"id": 1, "score": 7}, "noise", {"id": 2, "score": 4}]}'
+
+    assert _parse_batch_scores(raw) == [{"id": 1, "score": 7}, {"id": 2, "score": 4}]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        None,
+        "",
+        "no json here",
+        '{"items": [',
+        '["not", "an", "object"]',
+        '{"items": null}',
+        '{"items": "none"}',
+        '{"items": {"id": 1}}',
+        '{"items": 3}',
+    ],
+)
+def test_malformed_output_scores_nothing(raw):
+    assert _parse_batch_scores(raw) == []
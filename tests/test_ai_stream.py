@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config import settings
+from functions import ai_client
+from functions.ai_cache import AIResponseCache
+
+
+def chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(
+        usage=None, choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)]
+    )
+
+
+def keepalive():
+    return SimpleNamespace(usage=None, choices=[])
+
+
+class FakeStream:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for item in self.chunks:
+            time.sleep(self.delay)
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        self.closed = True
+
+
+def fake_client(stream: FakeStream, calls: list | None = None):
+    def create(**kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        return stream
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream_max_seconds", None)
+    response_cache = AIResponseCache(str(tmp_path / "ai.sqlite3"))
+    yield response_cache
+    response_cache.close()
+
+
+def test_complete_stream_is_cached(cache):
+    stream = FakeStream([chunk("<html><body><p>x</p>"), chunk("</body></html>")])
+
+    html = ai_client._complete("prompt", {}, cache, fake_client(stream), stream=True)
+
+    assert "<p>x</p>" in html
+    assert stream.closed
+    assert cache.get(ai_client.make_cache_key(settings.ai.model, "prompt", {})) is not None
+
+
+def test_finish_reason_completes_stream(cache):
+    stream = FakeStream([chunk("plain answer"), chunk(finish_reason="stop")])
+
+    ai_client._complete("prompt", {}, cache, fake_client(stream), stream=True)
+
+    assert cache.get(ai_client.make_cache_key(settings.ai.model, "prompt", {})) is not None
+
+
+def test_stream_cut_by_time_limit_is_not_cached(cache, monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream_max_seconds", 0.05)
+    parts = [chunk(f"<p>{i}</p>") for i in range(20)]
+    stream = FakeStream([chunk("<html><body>")] + parts, delay=0.01)
+
+    html = ai_client._complete("prompt", {}, cache, fake_client(stream), stream=True)
+
+    assert html  # the partial digest is still used for this run
+    assert cache.get(ai_client.make_cache_key(settings.ai.model, "prompt", {})) is None
+
+
+def test_stalled_stream_of_keepalives_is_cancelled(cache, monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream_max_seconds", 0.05)
+    stream = FakeStream([chunk("<html><body><p>x</p>")] + [keepalive()] * 1000, delay=0.01)
+    calls = []
+
+    start = time.perf_counter()
+    html = ai_client._complete("prompt", {}, cache, fake_client(stream, calls), stream=True)
+
+    assert time.perf_counter() - start < 1
+    assert "<p>x</p>" in html
+    assert stream.closed
+    # The limit is also the read timeout, for a stream that sends nothing at all.
+    assert calls[0]["timeout"] == 0.05
+    assert cache.get(ai_client.make_cache_key(settings.ai.model, "prompt", {})) is None
+
+
+def test_read_timeout_keeps_the_partial_output(cache, monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream_max_seconds", 30)
+    stream = FakeStream([chunk("<html><body><p>x</p>"), TimeoutError("read timed out")])
+
+    html = ai_client._complete("prompt", {}, cache, fake_client(stream), stream=True)
+
+    assert "<p>x</p>" in html
+    assert cache.get(ai_client.make_cache_key(settings.ai.model, "prompt", {})) is None
+
+
+def test_cached_answer_is_cleaned_once(cache, monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream", True)
+    raw = "```html\n<html><body><p>x</p></body></html>\n```"
+    cache.put(
+        ai_client.make_cache_key(settings.ai.model, "prompt", {}), settings.ai.model, raw
+    )
+    cleaned = []
+    monkeypatch.setattr(
+        ai_client,
+        "clean_ai_html_response",
+        lambda text: cleaned.append(text) or ai_client.sanitize_html(text).document,
+    )
+
+    html = ai_client._complete("prompt", {}, cache, fake_client(FakeStream([])), stream=True)
+
+    assert html == "<html><body><p>x</p></body></html>"
+    assert cleaned == [raw]
+
+
+def test_streamed_analysis_is_not_cleaned_again(monkeypatch):
+    monkeypatch.setattr(settings.ai, "stream", True)
+    monkeypatch.setattr(settings.ai, "stream_max_seconds", None)
+    stream = FakeStream([chunk("```html\n<html><body><p>x</p>"), chunk("</body></html>\n```")])
+    monkeypatch.setattr(ai_client, "get_openai_client", lambda: fake_client(stream))
+    cleaned = []
+    monkeypatch.setattr(ai_client, "clean_ai_html_response", cleaned.append)
+
+    html = ai_client.get_ai_info("news", use_cache=False)
+
+    assert html == "<html><body><p>x</p></body></html>"
+    assert cleaned == []
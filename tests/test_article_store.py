@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from config import NewsConfig, settings
+from functions import pipeline as pipeline_module
+from functions.article import Article
+from functions.article_store import ArticleStore, normalize_link
+from functions.http_client import HttpClient
+from functions.pipeline import NewsDigestPipeline
+from functions.scraping import scrape_source_async
+from functions.sources import get_source
+
+
+def article(title: str, link: str) -> Article:
+    return Article(title=title, link=link, source="biziday")
+
+
+def listing(*titles: str) -> bytes:
+    items = "".join(f'<li><a href="/{title}">{title}</a></li>' for title in titles)
+    page = f"<html><body><h2>Știri verificate</h2><ul>{items}</ul></body></html>"
+    return page.encode()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def biziday(local_server, monkeypatch):
+    """Five Biziday listing pages of two items each, served locally."""
+    monkeypatch.setattr(settings.news, "biziday_url", local_server.url)
+    monkeypatch.setattr(settings.news, "biziday_max_pages", 5)
+    for page in range(1, 6):
+        body = listing(f"item-{page}a", f"item-{page}b")
+        path = "/" if page == 1 else f"/page/{page}/"
+        local_server.routes[path] = lambda handler, body=body: (200, {}, body)
+    return local_server
+
+
+@pytest.mark.parametrize(
+    "link, expected",
+    [
+        ("https://www.biziday.ro/a/", "https://biziday.ro/a"),
+        ("HTTPS://WWW.Biziday.RO/a#comments", "https://biziday.ro/a"),
+        ("https://biziday.ro/a?utm_source=x&id=3&UTM_medium=y", "https://biziday.ro/a?id=3"),
+        ("  https://biziday.ro  ", "https://biziday.ro/"),
+        ("//biziday.ro/a", "https://biziday.ro/a"),
+    ],
+)
+def test_normalize_link(link, expected):
+    assert normalize_link(link) == expected
+
+
+def test_filter_new_and_record(store):
+    first = [
+        article("Guvernul anunță", "https://www.biziday.ro/a/"),
+        article("Alt titlu", "https://www.biziday.ro/"),
+    ]
+    assert store.filter_new(first) == first
+    assert store.record(first, "biziday") == 2
+    assert store.record(first, "biziday") == 0
+
+    later = [
+        # Same article: cosmetic link and title differences.
+        article("guvernul   ANUNȚĂ", "https://biziday.ro/a?utm_source=feed"),
+        # Same homepage fallback link, different text: a new item.
+        article("Încă un titlu", "https://www.biziday.ro/"),
+        article("Alt titlu", "https://www.biziday.ro/b"),
+    ]
+    assert store.filter_new(later) == later[1:]
+    assert store.filter_new([]) == []
+
+
+def test_records_persist_across_runs(tmp_path):
+    path = str(tmp_path / "articles.sqlite3")
+    items = [article("Titlu", "https://biziday.ro/a")]
+    store = ArticleStore(path)
+    store.record(items, "biziday")
+    store.close()
+
+    reopened = ArticleStore(path)
+    try:
+        assert reopened.filter_new(items) == []
+    finally:
+        reopened.close()
+
+
+def test_only_new_stops_at_the_first_page_with_a_seen_item(biziday, store):
+    store.record([article("item-2b", f"{biziday.url}/item-2b")], "biziday")
+    client = HttpClient(NewsConfig(http_retries=0))
+
+    articles = asyncio.run(
+        scrape_source_async(
+            get_source("biziday"), client=client, max_per_host=1, store=store, only_new=True
+        )
+    )
+
+    assert [a.title for a in articles] == ["item-1a", "item-1b", "item-2a"]
+    assert biziday.hits("/page/2/") == 1
+    assert biziday.hits("/page/3/") == 0
+    # Scraping does not mark anything as seen.
+    assert store.filter_new(articles) == articles
+
+
+def test_without_only_new_every_page_is_scraped(biziday, store):
+    store.record([article("item-2b", f"{biziday.url}/item-2b")], "biziday")
+    client = HttpClient(NewsConfig(http_retries=0))
+
+    articles = asyncio.run(scrape_source_async(get_source("biziday"), client=client, store=store))
+
+    assert len(articles) == 10
+    assert biziday.hits("/page/5/") == 1
+
+
+@pytest.mark.parametrize("answered", [True, False])
+def test_pipeline_records_articles_only_after_an_answer(
+    biziday, tmp_path, monkeypatch, answered
+):
+    monkeypatch.setattr(settings.news, "article_store_path", str(tmp_path / "articles.sqlite3"))
+    monkeypatch.setattr(settings.news, "article_store_enabled", True)
+    monkeypatch.setattr(settings.news, "dedupe_enabled", False)
+    monkeypatch.setattr(settings.ai, "map_reduce_enabled", False)
+    monkeypatch.setattr(settings.ai, "prompt_packing_enabled", False)
+    # A failed request returns the news text itself.
+    monkeypatch.setattr(
+        pipeline_module,
+        "get_ai_info",
+        lambda news, use_cache, template: "<p>analysis</p>" if answered else news,
+    )
+
+    def run():
+        pipeline = NewsDigestPipeline(
+            only_new=True,
+            sources=["biziday"],
+            client=HttpClient(NewsConfig(http_retries=0)),
+        )
+        return pipeline.run()["default"]
+
+    first = run()
+    scraped = first.articles["biziday"]
+    assert len(scraped) == 10
+
+    store = ArticleStore.from_config()
+    try:
+        assert store.filter_new(scraped) == ([] if answered else scraped)
+    finally:
+        store.close()
+
+    second = run()
+    if answered:
+        assert second.articles == {} and second.html is None
+    else:
+        assert second.articles["biziday"] == scraped
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from functions.daemon import CronSchedule
+
+# 2026-10-17 is a Saturday.
+NOW = datetime(2026, 10, 17, 8, 0)
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("0 7 * * *", datetime(2026, 10, 18, 7, 0)),
+        ("*/15 * * * *", datetime(2026, 10, 17, 8, 15)),
+        ("0 7 * * 1-5", datetime(2026, 10, 19, 7, 0)),
+        # Both days restricted: either one matches (the 20th or a Sunday).
+        ("0 7 20 * 0", datetime(2026, 10, 18, 7, 0)),
+        # A stepped "*" is unrestricted: both have to match.
+        ("0 7 */10 * 1", datetime(2026, 12, 21, 7, 0)),
+        ("0 7 20 * */3", datetime(2026, 12, 20, 7, 0)),
+    ],
+)
+def test_next_after(expression, expected):
+    assert CronSchedule(expression).next_after(NOW) == expected
+
+
+@pytest.mark.parametrize("expression", ["0 7 * *", "60 * * * *", "0 7 * * mon", "*/0 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_never_matching_expression():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 30 2 *").next_after(NOW)
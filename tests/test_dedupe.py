@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pytest
+
+from config import NewsConfig
+from functions.article import Article
+from functions.dedupe import (
+    cluster_near_duplicates,
+    dedupe_articles,
+    jaccard,
+    normalize_title,
+    shingles,
+)
+
+
+@pytest.mark.parametrize(
+    "title",
+    [
+        "Guvernul își asumă răspunderea",
+        "Guvernul îşi asumă răspunderea",  # cedilla ş
+        "GUVERNUL ISI ASUMA RASPUNDEREA!",
+        "  Guvernul, își   asumă — răspunderea. ",
+    ],
+)
+def test_normalize_title_folds_diacritics_case_and_punctuation(title):
+    assert normalize_title(title) == "guvernul isi asuma raspunderea"
+
+
+def test_cedilla_and_comma_below_spellings_cluster_together():
+    titles = ["Ședință de guvern la Palatul Victoria", "Şedinţă de guvern la Palatul Victoria"]
+
+    assert cluster_near_duplicates(titles) == [[0, 1]]
+
+
+def test_clusters_near_duplicates_only():
+    titles = [
+        "Cutremur de 5,2 grade în Vrancea, resimțit în București",
+        "Meteo: ploi torențiale în vestul țării",
+        "Cutremur de 5,2 grade în Vrancea, resimțit și în București",
+        "Cutremur de 5,2 grade in Vrancea resimtit in Bucuresti",
+    ]
+
+    assert cluster_near_duplicates(titles) == [[0, 2, 3], [1]]
+
+
+def test_similarity_threshold():
+    first = "Prețul benzinei crește de luni la toate benzinăriile"
+    second = "Prețul motorinei crește de luni la benzinăriile din țară"
+    similarity = jaccard(
+        shingles(normalize_title(first), 5), shingles(normalize_title(second), 5)
+    )
+    assert 0 < similarity < 1
+
+    assert cluster_near_duplicates([first, second], threshold=similarity) == [[0, 1]]
+    assert cluster_near_duplicates([first, second], threshold=similarity + 0.01) == [[0], [1]]
+
+
+def test_empty_and_short_titles_are_never_merged():
+    titles = ["", "", "Video", "Video", "   ", "Ultima oră: cutremur în Vrancea"]
+
+    assert cluster_near_duplicates(titles) == [[index] for index in range(len(titles))]
+
+
+def test_dedupe_articles_keeps_first_and_merges_links():
+    results = {
+        "stiripesurse": [
+            Article("Cutremur puternic în Vrancea în această dimineață", "https://a/1", "stiripesurse"),
+            Article("", "https://a/2", "stiripesurse"),
+            Article("", "https://a/3", "stiripesurse"),
+        ],
+        "biziday": [
+            Article("Cutremur puternic in Vrancea in aceasta dimineata", "https://b/1", "biziday"),
+        ],
+    }
+
+    deduped = dedupe_articles(results, NewsConfig())
+
+    assert [article.link for article in deduped["stiripesurse"]] == [
+        "https://a/1",
+        "https://a/2",
+        "https://a/3",
+    ]
+    assert deduped["biziday"] == []
+    assert deduped["stiripesurse"][0].links == ("https://a/1", "https://b/1")
+    assert deduped["stiripesurse"][0].cluster_id is not None
+    # The input is not modified.
+    assert results["stiripesurse"][0].links == ()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from functions.article import Article, write_formatted
+from functions.scraping import format_news
+from functions.sources import SOURCE_HEADERS
+
+
+def baseline_section(header: str, articles: list[Article]) -> str:
+    """The ``return_formatted`` text of the scrapers before ``Article`` (reference copy)."""
+    formatted = f"{header}\n\n"
+    for i, article in enumerate(articles, 1):
+        formatted += f"{i}. {article.title}\n   {article.link}\n\n"
+    return formatted
+
+
+def articles(source: str, count: int) -> list[Article]:
+    return [
+        Article(title=f"Știrea {i} din {source}", link=f"https://{source}.ro/{i}", source=source)
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("counts", [(3, 2), (0, 4), (1, 0), (150, 400)])
+def test_matches_the_baseline_combined_news(counts):
+    results = {
+        "stiripesurse": articles("stiripesurse", counts[0]),
+        "biziday": articles("biziday", counts[1]),
+    }
+
+    expected = "\n\n".join(
+        baseline_section(SOURCE_HEADERS[source], items) for source, items in results.items()
+    )
+
+    assert format_news(results) == expected
+
+
+def test_follows_the_order_of_the_results():
+    results = {"biziday": articles("biziday", 1), "stiripesurse": articles("stiripesurse", 1)}
+
+    text = format_news(results)
+
+    assert text.index(SOURCE_HEADERS["biziday"]) < text.index(SOURCE_HEADERS["stiripesurse"])
+
+
+def test_clusters_list_every_merged_link():
+    merged = Article(
+        title="Guvernul anunță",
+        link="https://stiripesurse.ro/a",
+        source="stiripesurse",
+        cluster_id=0,
+        links=("https://stiripesurse.ro/a", "https://biziday.ro/b", "https://biziday.ro/c"),
+    )
+    single = Article(title="Altceva", link="https://biziday.ro/d", links=("https://biziday.ro/d",))
+
+    assert format_news({"stiripesurse": [merged, single]}) == (
+        f"{SOURCE_HEADERS['stiripesurse']}\n\n"
+        "1. Guvernul anunță\n   https://stiripesurse.ro/a\n"
+        "   https://biziday.ro/b\n   https://biziday.ro/c\n\n"
+        "2. Altceva\n   https://biziday.ro/d\n\n"
+    )
+
+
+def test_write_formatted_appends_to_a_given_buffer():
+    buffer = io.StringIO()
+    buffer.write("Prefix\n")
+
+    returned = write_formatted([("H", articles("x", 1))], buffer)
+
+    assert returned is buffer
+    assert buffer.getvalue() == "Prefix\nH\n\n1. Știrea 1 din x\n   https://x.ro/1\n\n"
+    # Sections can be any iterable, consumed once.
+    assert write_formatted(iter([])).getvalue() == ""
+
+
+def test_article_record():
+    first = Article("Titlu", "https://x.ro/a", "biziday", scraped_at=1.0)
+    again = Article("Titlu", "https://x.ro/a", "biziday", scraped_at=2.0)
+
+    assert first == again
+    assert not hasattr(first, "__dict__")
+    assert json.loads(json.dumps(first.as_dict())) == {
+        "title": "Titlu",
+        "link": "https://x.ro/a",
+        "source": "biziday",
+        "scraped_at": 1.0,
+        "cluster_id": None,
+        "links": [],
+    }
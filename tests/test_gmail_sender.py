@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from google.oauth2.credentials import Credentials
+
+from config import settings
+from functions.email_service import GmailSender
+
+SEND_PATH = "/gmail/v1/users/me/messages/send"
+
+
+def sent(message_id: str = "abc123"):
+    return 200, {"Content-Type": "application/json"}, json.dumps({"id": message_id}).encode()
+
+
+def rate_limited(handler):
+    body = {"error": {"code": 429, "message": "rateLimitExceeded"}}
+    return 429, {"Content-Type": "application/json", "Retry-After": "0"}, json.dumps(body).encode()
+
+
+@pytest.fixture(autouse=True)
+def gmail_settings(monkeypatch):
+    monkeypatch.setattr(settings.gmail, "send_rate_per_second", 1000.0)
+    monkeypatch.setattr(settings.gmail, "send_burst", 100)
+    monkeypatch.setattr(settings.gmail, "send_backoff_base", 0.0)
+    monkeypatch.setattr(settings.gmail, "send_max_retries", 2)
+
+
+def make_sender(local_server) -> GmailSender:
+    return GmailSender(
+        from_email="news@example.com",
+        credentials=Credentials(token="fake"),
+        api_endpoint=local_server.url,
+    )
+
+
+def test_retries_429_then_sends(local_server):
+    answers = iter([rate_limited, rate_limited, lambda handler: sent("m1")])
+    local_server.routes[SEND_PATH] = lambda handler: next(answers)(handler)
+
+    report = make_sender(local_server).send_bulk(["reader@example.com"], "Subject", "<p>x</p>")
+
+    assert report.sent == 1
+    assert report.results[0].message_id == "m1"
+    assert report.results[0].attempts == 3
+    assert local_server.hits(SEND_PATH) == 3
+
+
+def test_gives_up_after_send_max_retries(local_server):
+    local_server.routes[SEND_PATH] = rate_limited
+
+    report = make_sender(local_server).send_bulk(["reader@example.com"], "Subject", "<p>x</p>")
+
+    assert report.sent == 0
+    assert "429" in report.failed[0].error
+    assert local_server.hits(SEND_PATH) == settings.gmail.send_max_retries + 1
+
+
+def test_client_errors_are_not_retried(local_server):
+    local_server.routes[SEND_PATH] = lambda handler: (
+        400, {"Content-Type": "application/json"}, b'{"error": {"code": 400}}'
+    )
+
+    report = make_sender(local_server).send_bulk(["reader@example.com"], "Subject", "<p>x</p>")
+
+    assert report.sent == 0
+    assert local_server.hits(SEND_PATH) == 1
+
+
+def test_sends_are_rate_limited(local_server, monkeypatch):
+    monkeypatch.setattr(settings.gmail, "send_rate_per_second", 20.0)
+    monkeypatch.setattr(settings.gmail, "send_burst", 1)
+    local_server.routes[SEND_PATH] = lambda handler: sent()
+    recipients = [f"reader{i}@example.com" for i in range(5)]
+    sender = make_sender(local_server)
+    assert sender.authenticate()
+
+    start = time.perf_counter()
+    report = sender.send_bulk(recipients, "Subject", "<p>x</p>", max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert report.sent == 5
+    # One token up front, then one every 1/20 s, however many workers send.
+    assert elapsed >= 4 / 20 * 0.9
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.html_sanitizer import EDGE_CASES, make_output, streamed
+from functions.email_service import prepare_html_for_email
+from functions.html_sanitizer import sanitize_html
+from functions.html_text import html_to_text
+
+DOCUMENTS = [raw for raw, _ in EDGE_CASES] + [make_output(3)]
+
+
+@pytest.mark.parametrize("raw", DOCUMENTS)
+@pytest.mark.parametrize("chunk", [1, 7, 20])
+def test_streamed_matches_whole(raw, chunk):
+    whole = sanitize_html(raw)
+    result = streamed(raw, chunk)
+
+    assert result.document == whole.document
+    assert result.body == whole.body
+
+
+@pytest.mark.parametrize("raw, expected_body", EDGE_CASES)
+def test_head_without_closing_tag(raw, expected_body):
+    assert sanitize_html(raw).body == expected_body
+
+
+def test_plain_text_of_head_without_closing_tag():
+    raw = EDGE_CASES[1][0]
+
+    assert html_to_text(raw) == "Azi\n===\n\nx"
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 20])
+def test_fence_inside_unfenced_document_is_content(chunk):
+    raw = "<html><body><p>Use ``` for code</p><p>after</p></body></html>"
+
+    result = streamed(raw, chunk)
+
+    assert result.body == "<p>Use ``` for code</p><p>after</p>"
+    assert result.document == raw
+    assert sanitize_html(raw).body == result.body
+
+
+@pytest.mark.parametrize(
+    "raw, expected_body",
+    [
+        ("```html\n<html><body><p>x</p></body></html>\n```\nNotes", "<p>x</p>"),
+        # No </html>: the closing fence ends the fenced document.
+        ("```html\n<html><body><p>x</p>\n```\nNotes", "<p>x</p>"),
+        ("Here:\n```html\n<p>fragment</p>\n```\nNotes", "<p>fragment</p>"),
+        ("<p>Use ``` here</p><p>y</p>", "<p>Use ``` here</p><p>y</p>"),
+    ],
+)
+def test_fences(raw, expected_body):
+    assert sanitize_html(raw).body == expected_body
+
+
+@pytest.mark.parametrize(
+    "html, expected",
+    [
+        ("<!DOCTYPE html><html><head><title>T</title></head><body><p>x</p></body></html>", "<p>x</p>"),
+        ("<html><body><p>Use ``` for code</p><p>after</p></body></html>", "<p>Use ``` for code</p><p>after</p>"),
+        # Email preparation only extracts the body; it cleans nothing.
+        (
+            "<html><body><p>Site-ul stiripesurse.ro este o sursă.</p></body></html>",
+            "<p>Site-ul stiripesurse.ro este o sursă.</p>",
+        ),
+        ("<p>&lt;b&gt; is escaped</p>", "<p>&lt;b&gt; is escaped</p>"),
+        ("  <p>fragment</p>\n", "<p>fragment</p>"),
+    ],
+)
+def test_prepare_html_for_email_extracts_the_body_only(html, expected):
+    assert prepare_html_for_email(html) == expected
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from functions.html_text import PlainTextRenderer, html_to_text, wrap_line
+
+DIGEST = (
+    "<html><head><title>T</title><style>p{}</style></head><body>"
+    "<h1>Știri</h1><p>Un   paragraf\n scurt.</p><h2>Top</h2><h3>Mic</h3><p>după</p>"
+    "<ul><li>unu</li><li>doi<ul><li>sub</li></ul></li></ul><ol><li>a</li><li>b</li></ol>"
+    "</body></html>"
+)
+
+
+def test_structure_of_a_digest():
+    assert html_to_text(DIGEST, 40) == (
+        "Știri\n=====\n\n"
+        "Un paragraf scurt.\n\n"
+        "Top\n---\n\n"
+        "Mic\n\n"
+        "după\n\n"
+        "- unu\n- doi\n  - sub\n\n"
+        "1. a\n2. b"
+    )
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 64])
+def test_streamed_chunks_render_the_same(chunk):
+    renderer = PlainTextRenderer(40)
+    for start in range(0, len(DIGEST), chunk):
+        renderer.feed(DIGEST[start : start + chunk])
+    renderer.close()
+
+    assert renderer.text == html_to_text(DIGEST, 40)
+
+
+def test_links():
+    html = (
+        '<p>Vezi <a href="https://x.ro/a">articolul</a>, <a href="#top">sus</a>, '
+        '<a href="mailto:a@b.ro">a@b.ro</a>, <a href="javascript:void(0)">js</a> '
+        'și <a href="https://y.ro"></a></p>'
+    )
+
+    assert html_to_text(html, 0) == (
+        "Vezi articolul (https://x.ro/a), sus, a@b.ro, js și https://y.ro"
+    )
+
+
+def test_list_items_wrap_under_their_text():
+    html = "<ul><li>" + "cuvânt " * 12 + "</li></ul>"
+
+    assert html_to_text(html, 40) == (
+        "- cuvânt cuvânt cuvânt cuvânt cuvânt\n"
+        "  cuvânt cuvânt cuvânt cuvânt cuvânt\n"
+        "  cuvânt cuvânt"
+    )
+
+
+def test_pre_line_breaks_and_rules():
+    html = "<pre>  cod\n    indentat</pre><p>a<br>b</p><hr><p>după</p>"
+
+    assert html_to_text(html, 40) == (
+        "  cod\n    indentat\n\na\nb\n\n" + "-" * 40 + "\n\ndupă"
+    )
+
+
+def test_skipped_content_entities_and_cells():
+    html = (
+        "<script>alert(1)</script><p>&amp; &lt;ok&gt;</p>"
+        "<table><tr><td>a</td><td>b</td></tr></table>"
+    )
+
+    assert html_to_text(html, 40) == "& <ok>\n\na b"
+
+
+def test_head_without_closing_tag():
+    html = "<html><head><meta charset=utf-8><title>T</title><p>no closing head</p>"
+
+    assert html_to_text(html, 40) == "no closing head"
+
+
+def test_width_defaults_to_settings(monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings.gmail, "plain_text_width", 10)
+
+    assert html_to_text("<p>one two three four</p>") == "one two\nthree four"
+
+
+def test_wrap_line():
+    assert wrap_line("a b c", 0) == ["a b c"]
+    assert wrap_line("a  b c", 3, "- ", "  ") == ["- a", "  b", "  c"]
+    # Long words (URLs) are never broken.
+    assert wrap_line("https://example.ro/long end", 10) == ["https://example.ro/long", "end"]
+    assert wrap_line("", 10, "> ") == ["> "]
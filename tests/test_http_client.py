@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from config import NewsConfig
+from functions.http_cache import HttpCache
+from functions.http_client import HttpClient
+
+
+def make_client(tmp_path=None, **overrides) -> HttpClient:
+    config = NewsConfig(
+        http_retries=overrides.pop("http_retries", 2),
+        http_backoff_factor=0,
+        connect_timeout=1.0,
+        read_timeout=overrides.pop("read_timeout", 1.0),
+        **overrides,
+    )
+    cache = HttpCache(str(tmp_path / "http")) if tmp_path is not None else None
+    return HttpClient(config, cache=cache)
+
+
+def test_retries_5xx_then_succeeds(local_server):
+    answers = iter([(503, {}, b"busy"), (502, {}, b"busy"), (200, {}, b"page")])
+    local_server.routes["/flaky"] = lambda handler: next(answers)
+    client = make_client(http_retries=2)
+
+    assert client.fetch(f"{local_server.url}/flaky") == b"page"
+    assert local_server.hits("/flaky") == 3
+
+
+def test_gives_up_after_retries(local_server):
+    local_server.routes["/down"] = lambda handler: (503, {}, b"busy")
+    client = make_client(http_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        client.fetch(f"{local_server.url}/down")
+    assert local_server.hits("/down") == 3
+
+
+def test_client_errors_are_not_retried(local_server):
+    local_server.routes["/gone"] = lambda handler: (404, {}, b"missing")
+    client = make_client(http_retries=2)
+
+    with pytest.raises(requests.HTTPError):
+        client.fetch(f"{local_server.url}/gone")
+    assert local_server.hits("/gone") == 1
+
+
+def test_read_timeout(local_server):
+    def slow(handler):
+        time.sleep(1.0)
+        return 200, {}, b"late"
+
+    local_server.routes["/slow"] = slow
+    client = make_client(http_retries=0, read_timeout=0.2)
+
+    start = time.perf_counter()
+    with pytest.raises(requests.RequestException):
+        client.fetch(f"{local_server.url}/slow")
+    assert time.perf_counter() - start < 0.9
+
+
+def test_connections_are_reused(local_server):
+    local_server.routes["/page"] = lambda handler: (200, {}, b"page")
+    client = make_client()
+
+    for _ in range(5):
+        client.fetch(f"{local_server.url}/page")
+    assert client.stats() == {"requests": 5, "connections": 1, "reused": 4}
+
+
+def test_etag_revalidation(local_server, tmp_path):
+    state = {"etag": '"v1"', "body": b"first version"}
+
+    def page(handler):
+        if handler.headers.get("If-None-Match") == state["etag"]:
+            return 304, {"ETag": state["etag"]}, b""
+        return 200, {"ETag": state["etag"]}, state["body"]
+
+    local_server.routes["/etag"] = page
+    client = make_client(tmp_path)
+    url = f"{local_server.url}/etag"
+
+    assert client.fetch(url) == b"first version"
+    assert client.fetch(url) == b"first version"
+    assert local_server.requests[1][2].get("If-None-Match") == '"v1"'
+    assert client.cache.stats()["hits"] == 1
+
+    state.update(etag='"v2"', body=b"second version")
+    assert client.fetch(url) == b"second version"
+    assert client.fetch(url) == b"second version"
+    assert client.cache.stats()["hits"] == 2
+
+
+def test_last_modified_revalidation(local_server, tmp_path):
+    stamp = "Sat, 17 Oct 2026 06:00:00 GMT"
+
+    def page(handler):
+        if handler.headers.get("If-Modified-Since") == stamp:
+            return 304, {}, b""
+        return 200, {"Last-Modified": stamp}, b"listing"
+
+    local_server.routes["/lm"] = page
+    client = make_client(tmp_path)
+    url = f"{local_server.url}/lm"
+
+    assert client.fetch(url) == b"listing"
+    assert client.fetch(url) == b"listing"
+    assert local_server.requests[1][2].get("If-Modified-Since") == stamp
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_missing_cached_object_downloads_again(local_server, tmp_path):
+    def page(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, b"body"
+
+    local_server.routes["/lost"] = page
+    client = make_client(tmp_path)
+    url = f"{local_server.url}/lost"
+    client.fetch(url)
+    entry = client.cache.lookup(url)
+    (tmp_path / "http" / "objects" / entry.digest[:2] / entry.digest).unlink()
+
+    assert client.fetch(url) == b"body"
+    # Conditional request answered 304, then an unconditional download.
+    assert local_server.hits("/lost") == 3
+
+
+def test_expired_entries_are_not_revalidated(local_server, tmp_path):
+    local_server.routes["/ttl"] = lambda handler: (200, {"ETag": '"v1"'}, b"body")
+    client = make_client(tmp_path)
+    client.cache.ttl = 0
+    url = f"{local_server.url}/ttl"
+
+    client.fetch(url)
+    time.sleep(0.01)
+    client.fetch(url)
+    assert "If-None-Match" not in local_server.requests[1][2]
+
+
+def test_revalidation_restarts_the_ttl(local_server, tmp_path):
+    def page(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, b"body"
+
+    local_server.routes["/fresh"] = page
+    client = make_client(tmp_path)
+    client.cache.ttl = 60
+    url = f"{local_server.url}/fresh"
+    client.fetch(url)
+    # Stored 50 s ago: still fresh, but only 10 s left.
+    client.cache._db.execute("UPDATE entries SET stored_at = stored_at - 50")
+
+    assert client.fetch(url) == b"body"
+    assert local_server.requests[1][2].get("If-None-Match") == '"v1"'
+    assert time.time() - client.cache.lookup(url).stored_at < 5
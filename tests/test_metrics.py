@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import MetricsConfig, settings
+from functions import metrics
+from functions.metrics import RunMetrics, bind_context, record_run
+
+PREFIX = metrics.PROMETHEUS_PREFIX
+
+
+def no_files() -> MetricsConfig:
+    return MetricsConfig(report_path=None, prometheus_path=None)
+
+
+def test_spans_nest_across_tasks_and_bound_threads():
+    run = RunMetrics(no_files())
+
+    def child(name: str) -> None:
+        with run.span(name):
+            pass
+
+    async def fetch() -> None:
+        with run.span("fetch"):
+            await asyncio.to_thread(child, "thread")
+
+    with run.span("run"):
+        with run.span("stage", workers=2) as stage:
+            asyncio.run(fetch())
+            with ThreadPoolExecutor(1) as pool:
+                pool.submit(bind_context(child), "bound").result()
+                pool.submit(child, "unbound").result()
+
+    by_name = {record.name: record for record in run.spans}
+    assert by_name["run"].parent is None
+    assert by_name["stage"].parent == by_name["run"].id
+    assert by_name["stage"].attributes == {"workers": 2}
+    assert by_name["fetch"].parent == stage.id
+    assert by_name["thread"].parent == by_name["fetch"].id
+    # Plain thread pools lose the context unless the call is bound.
+    assert by_name["bound"].parent == stage.id
+    assert by_name["unbound"].parent is None
+
+
+def test_span_records_errors():
+    run = RunMetrics(no_files())
+
+    with pytest.raises(ValueError):
+        with run.span("analyze"):
+            raise ValueError("no answer")
+
+    (record,) = run.spans
+    assert record.error == "ValueError: no answer"
+    assert record.duration >= 0
+
+
+def test_counters_sum_over_omitted_labels():
+    run = RunMetrics(no_files())
+    run.count("http_requests", host="a.ro", cached=True)
+    run.count("http_requests", 2, host="a.ro", cached=False)
+    run.count("http_requests", host="b.ro", cached=False)
+
+    assert run.counter("http_requests") == 4
+    assert run.counter("http_requests", host="a.ro") == 3
+    assert run.counter("http_requests", cached=False) == 3
+    assert run.counter("missing") == 0
+
+
+def test_json_report():
+    run = RunMetrics(no_files())
+    with run.span("run"):
+        with run.span("fetch", url="https://a.ro"):
+            pass
+    run.count("pages", source="biziday")
+    run.finish()
+
+    report = json.loads(run.to_json())
+
+    assert report["run_id"] == run.run_id
+    assert report["status"] == "ok"
+    assert [span["name"] for span in report["spans"]] == ["run", "fetch"]
+    assert report["spans"][1]["parent"] == report["spans"][0]["id"]
+    assert report["spans"][1]["attributes"] == {"url": "https://a.ro"}
+    assert report["counters"] == [{"name": "pages", "labels": {"source": "biziday"}, "value": 1}]
+
+
+def test_prometheus_export():
+    run = RunMetrics(no_files())
+    run.count("emails-sent", 2, backend="smtp")
+    run.count("emails-sent", backend='gm"ail\n')
+    run.count("ai_tokens", 1.5)
+    run.spans = [
+        metrics.SpanRecord(1, "fetch", None, 0.0, duration=0.25),
+        metrics.SpanRecord(2, "fetch", None, 0.3, duration=0.5, error="TimeoutError"),
+    ]
+    run.duration = 2.0
+    run.status = "error"
+    run.started_at = 1700000000.0
+
+    lines = run.to_prometheus().splitlines()
+
+    assert lines == [
+        f"# TYPE {PREFIX}_ai_tokens_total counter",
+        f"{PREFIX}_ai_tokens_total 1.5",
+        f"# TYPE {PREFIX}_emails_sent_total counter",
+        f'{PREFIX}_emails_sent_total{{backend="gm\\"ail\\n"}} 1',
+        f'{PREFIX}_emails_sent_total{{backend="smtp"}} 2',
+        f"# TYPE {PREFIX}_span_duration_seconds summary",
+        f'{PREFIX}_span_duration_seconds_sum{{span="fetch"}} 0.75',
+        f'{PREFIX}_span_duration_seconds_count{{span="fetch"}} 2',
+        f"# TYPE {PREFIX}_span_max_seconds gauge",
+        f'{PREFIX}_span_max_seconds{{span="fetch"}} 0.5',
+        f"# TYPE {PREFIX}_span_errors gauge",
+        f'{PREFIX}_span_errors{{span="fetch"}} 1',
+        f"# TYPE {PREFIX}_run_duration_seconds gauge",
+        f"{PREFIX}_run_duration_seconds 2.0",
+        f"# TYPE {PREFIX}_run_success gauge",
+        f"{PREFIX}_run_success 0",
+        f"# TYPE {PREFIX}_run_timestamp_seconds gauge",
+        f"{PREFIX}_run_timestamp_seconds 1700000000.0",
+    ]
+
+
+def test_record_run_writes_both_reports_even_on_failure(tmp_path, monkeypatch):
+    report_path = tmp_path / "reports" / "run.json"
+    prometheus_path = tmp_path / "reports" / "run.prom"
+    monkeypatch.setattr(settings.metrics, "report_path", str(report_path))
+    monkeypatch.setattr(settings.metrics, "prometheus_path", str(prometheus_path))
+
+    with pytest.raises(RuntimeError):
+        with record_run(send_email=False):
+            with metrics.span("scrape"):
+                metrics.count("pages")
+                time.sleep(0.01)
+            raise RuntimeError("boom")
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["status"] == "error"
+    assert [span["name"] for span in report["spans"]] == ["run", "scrape"]
+    assert report["spans"][0]["attributes"] == {"send_email": False}
+    assert report["spans"][0]["error"] == "RuntimeError: boom"
+    assert f"{PREFIX}_pages_total 1" in prometheus_path.read_text(encoding="utf-8")
+    assert f"{PREFIX}_run_success 0" in prometheus_path.read_text(encoding="utf-8")
+    # Written atomically: no temporary files are left behind.
+    assert sorted(path.name for path in report_path.parent.iterdir()) == ["run.json", "run.prom"]
+
+
+def test_unwritable_report_is_only_a_warning(tmp_path, caplog):
+    run = RunMetrics(MetricsConfig(report_path=str(tmp_path), prometheus_path=None))
+
+    run.finish()
+
+    assert "Could not write metrics" in caplog.text
+
+
+def test_annotate_updates_the_innermost_span():
+    run = RunMetrics(no_files())
+    # Outside any span it does nothing.
+    metrics.annotate(ignored=True)
+    with run.span("outer"):
+        with run.span("inner") as inner:
+            metrics.annotate(mode="packed")
+
+    assert inner.attributes == {"mode": "packed"}
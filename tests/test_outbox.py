@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Optional
+
+import pytest
+
+import main
+from config import settings
+from functions.email_service import DeliveryBackend, RenderedEmail
+from functions.outbox import FAILED, PENDING, SENDING, SENT, Outbox
+
+
+class RecordingBackend(DeliveryBackend):
+    """Delivers nothing; records every delivery and what it reports as sent."""
+
+    name = "test"
+    from_email = "news@example.com"
+
+    def __init__(self, delivered_ids: frozenset[str] = frozenset(), fail: frozenset[str] = frozenset()):
+        self.delivered_ids = delivered_ids
+        self.fail = fail
+        self.deliveries: list[tuple[str, str]] = []
+        self.checked: list[str] = []
+
+    def authenticate(self) -> bool:
+        return True
+
+    def deliver(self, rendered: RenderedEmail, recipient, idempotency_key: Optional[str] = None):
+        if recipient in self.fail:
+            raise RuntimeError("550 mailbox unavailable")
+        message_id = rendered.message_id(idempotency_key)
+        self.deliveries.append((recipient, message_id))
+        return message_id, 1
+
+    def was_delivered(self, message_id: str) -> bool:
+        self.checked.append(message_id)
+        return message_id in self.delivered_ids
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.sqlite3"))
+    yield box
+    box.close()
+
+
+def statuses(outbox: Outbox) -> dict[str, str]:
+    rows = outbox._db.execute("SELECT recipient, status FROM deliveries").fetchall()
+    return dict(rows)
+
+
+def test_same_run_enqueues_once(outbox):
+    first = outbox.enqueue("Subject", "<p>x</p>", ["a@example.com"], run_id="2026-10-16")
+    second = outbox.enqueue("Subject", "<p>x</p>", ["a@example.com"], run_id="2026-10-16")
+
+    assert first == second
+    assert outbox.counts() == {PENDING: 1}
+
+
+def test_identical_content_in_a_later_run_is_sent_again(outbox):
+    first = outbox.enqueue("Subject", "<p>x</p>", ["a@example.com"], run_id="2026-10-16")
+    (row,) = outbox.unfinished(first)
+    outbox._mark(row[2], SENT, message_id="<m@example.com>")
+
+    second = outbox.enqueue("Subject", "<p>x</p>", ["a@example.com"], run_id="2026-10-17")
+
+    assert second != first
+    assert [recipient for _, recipient, _, _ in outbox.unfinished()] == ["a@example.com"]
+
+
+def test_deliver_records_status_and_errors(outbox):
+    digest_id = outbox.enqueue("S", "<p>x</p>", ["a@example.com", "bad@example.com"])
+    backend = RecordingBackend(fail=frozenset({"bad@example.com"}))
+
+    report = outbox.deliver(backend, digest_id)
+
+    assert report.sent == 1
+    assert statuses(outbox) == {"a@example.com": SENT, "bad@example.com": FAILED}
+    assert "550" in report.failed[0].error
+    # Sent rows are never delivered again.
+    outbox.deliver(RecordingBackend(), digest_id)
+    assert outbox.counts(digest_id) == {SENT: 2}
+
+
+def test_sending_row_already_delivered_is_not_resent(outbox):
+    digest_id = outbox.enqueue("S", "<p>x</p>", ["a@example.com"])
+    (row,) = outbox.unfinished(digest_id)
+    outbox._mark(row[2], SENDING)
+    message = outbox.render(RecordingBackend(), [row])[digest_id]
+    message_id = message.message_id(row[2])
+    backend = RecordingBackend(delivered_ids=frozenset({message_id}))
+
+    result = outbox.deliver_row(backend, outbox.unfinished(digest_id)[0], message)
+
+    assert result.ok and result.message_id == message_id
+    assert backend.checked == [message_id]
+    assert backend.deliveries == []
+    assert statuses(outbox) == {"a@example.com": SENT}
+
+
+def test_sending_row_not_delivered_is_resent_with_the_same_message_id(outbox):
+    digest_id = outbox.enqueue("S", "<p>x</p>", ["a@example.com"])
+    (row,) = outbox.unfinished(digest_id)
+    outbox._mark(row[2], SENDING)
+    message = outbox.render(RecordingBackend(), [row])[digest_id]
+    backend = RecordingBackend()
+
+    result = outbox.deliver_row(backend, outbox.unfinished(digest_id)[0], message)
+
+    assert result.ok
+    assert backend.deliveries == [("a@example.com", message.message_id(row[2]))]
+    assert statuses(outbox) == {"a@example.com": SENT}
+
+
+def test_pending_rows_are_not_checked_with_the_backend(outbox):
+    digest_id = outbox.enqueue("S", "<p>x</p>", ["a@example.com"])
+    backend = RecordingBackend()
+
+    outbox.deliver(backend, digest_id)
+
+    assert backend.checked == []
+    assert len(backend.deliveries) == 1
+
+
+def test_resume_finishes_only_the_latest_run(tmp_path, monkeypatch):
+    path = str(tmp_path / "outbox.sqlite3")
+    monkeypatch.setattr(settings.gmail, "outbox_path", path)
+    outbox = Outbox(path)
+    old = outbox.enqueue("S", "<p>old</p>", ["rejected@example.com"], run_id="2026-10-16")
+    (old_row,) = outbox.unfinished(old)
+    outbox._mark(old_row[2], FAILED, error="550 no such user")
+    # The latest run died mid-way: one sent, one in flight, one not started.
+    latest = outbox.enqueue(
+        "S", "<p>new</p>", ["a@example.com", "b@example.com", "c@example.com"], run_id="2026-10-17"
+    )
+    rows = outbox.unfinished(latest)
+    outbox._mark(rows[0][2], SENT, message_id="<a@example.com>")
+    outbox._mark(rows[1][2], SENDING)
+    outbox.close()
+    backend = RecordingBackend()
+    monkeypatch.setattr(main, "get_delivery_backend", lambda **kwargs: backend)
+
+    main.resume_pending_deliveries()
+
+    assert sorted(recipient for recipient, _ in backend.deliveries) == [
+        "b@example.com",
+        "c@example.com",
+    ]
+    outbox = Outbox(path)
+    assert outbox.counts(latest) == {SENT: 3}
+    assert outbox.counts(old) == {FAILED: 1}
+    outbox.close()
+
+
+def test_outbox_without_run_ids_is_migrated(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE digests (id TEXT PRIMARY KEY, subject TEXT NOT NULL, body BLOB NOT NULL, "
+        "is_html INTEGER NOT NULL, from_header TEXT, created_at REAL NOT NULL)"
+    )
+    db.commit()
+    db.close()
+
+    outbox = Outbox(path)
+    outbox.enqueue("S", "<p>x</p>", ["a@example.com"], run_id="2026-10-17")
+
+    assert outbox.latest_run() == "2026-10-17"
+    outbox.close()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from benchmarks.parser_parity import extract_all
+from functions.html_parser import FALLBACK_BACKEND, available_backends
+
+OTHER_BACKENDS = [backend for backend in available_backends() if backend != FALLBACK_BACKEND]
+
+
+@pytest.fixture(scope="module")
+def reference() -> dict:
+    return extract_all(FALLBACK_BACKEND)
+
+
+def test_reference_extracts_every_fixture(reference):
+    assert reference["stiripesurse"]
+    assert reference["biziday"]
+    assert "<body" not in reference["email_html"]
+
+
+@pytest.mark.skipif(not OTHER_BACKENDS, reason="only html.parser is installed")
+@pytest.mark.parametrize("backend", OTHER_BACKENDS)
+def test_backend_matches_html_parser(backend, reference):
+    result = extract_all(backend)
+    for key in reference:
+        assert result[key] == reference[key], f"{backend} differs from {FALLBACK_BACKEND} in {key}"
@@ -0,0 +1,306 @@
+"""
+``NewsDigestPipeline`` end to end: the news sites and the OpenAI API are
+served by the local test server, delivery goes to a recording backend.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from email import message_from_bytes
+from email.policy import default
+from typing import Callable, Optional
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+openai = pytest.importorskip("openai")
+
+from config import DigestConfig, MetricsConfig, NewsConfig, settings
+from functions import ai_client, metrics
+from functions.email_service import DeliveryBackend, RenderedEmail
+from functions.http_client import HttpClient
+from functions.pipeline import DEFAULT_DIGEST, NewsDigestPipeline
+from functions.scraping import format_news
+
+ANSWER = "```html\n<!DOCTYPE html><html><body><p>Analiza zilei</p></body></html>\n```"
+
+
+def stiripesurse_page(*slugs: str) -> bytes:
+    items = "".join(
+        f'<article><h2>Știre {slug}</h2><a href="/stiri/{slug}.html">{slug}</a></article>'
+        for slug in slugs
+    )
+    return f"<html><body>{items}</body></html>".encode()
+
+
+def biziday_page(*slugs: str) -> bytes:
+    items = "".join(f'<li><a href="/biziday/{slug}">Biziday {slug}</a></li>' for slug in slugs)
+    return f"<html><body><h2>Știri verificate</h2><ul>{items}</ul></body></html>".encode()
+
+
+def completion(content: str) -> bytes:
+    return json.dumps(
+        {
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": settings.ai.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+    ).encode()
+
+
+@dataclass
+class NewsSites:
+    """The local stand-ins of both news sites and of the OpenAI API."""
+
+    server: object
+    # Prompt of every chat completion request, in arrival order.
+    prompts: list[str] = field(default_factory=list)
+    # Answer of the model to a prompt.
+    answer: Callable[[str], str] = lambda prompt: ANSWER
+
+    def serve(self, path: str, body: bytes, status: int = 200) -> None:
+        self.server.routes[path] = lambda handler: (status, {}, body)
+
+    def client(self) -> HttpClient:
+        return HttpClient(NewsConfig(http_retries=0, connect_timeout=1.0, read_timeout=5.0))
+
+
+class RecordingBackend(DeliveryBackend):
+    """Delivers nothing; records every delivered message."""
+
+    name = "test"
+    from_email = "news@example.com"
+
+    def __init__(self, authenticated: bool = True) -> None:
+        self.authenticated = authenticated
+        self.deliveries: list[tuple[str, RenderedEmail]] = []
+
+    def authenticate(self) -> bool:
+        return self.authenticated
+
+    def deliver(self, rendered: RenderedEmail, recipient, idempotency_key: Optional[str] = None):
+        self.deliveries.append((recipient, rendered))
+        return rendered.message_id(idempotency_key), 1
+
+    def html_sent_to(self, recipient: str) -> str:
+        rendered = dict(self.deliveries)[recipient]
+        message = message_from_bytes(rendered.for_recipient(recipient), policy=default)
+        return message.get_body(("html",)).get_content()
+
+
+@pytest.fixture
+def sites(local_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.news, "stiripesurse_url", f"{local_server.url}/stiri/")
+    monkeypatch.setattr(settings.news, "biziday_url", f"{local_server.url}/biziday/")
+    monkeypatch.setattr(settings.news, "biziday_max_pages", 2)
+    monkeypatch.setattr(settings.news, "article_store_enabled", False)
+    monkeypatch.setattr(settings.news, "dedupe_enabled", False)
+    monkeypatch.setattr(settings.ai, "cache_enabled", False)
+    monkeypatch.setattr(settings.ai, "stream", False)
+    monkeypatch.setattr(settings.ai, "prompt_packing_enabled", False)
+    monkeypatch.setattr(settings.ai, "map_reduce_enabled", False)
+    monkeypatch.setattr(settings.gmail, "outbox_enabled", False)
+    monkeypatch.setattr(settings.gmail, "outbox_path", str(tmp_path / "outbox.sqlite3"))
+
+    state = NewsSites(local_server)
+    state.serve("/stiri/", stiripesurse_page("s1", "s2", "s3"))
+    state.serve("/biziday/", biziday_page("b1", "b2"))
+    state.serve("/biziday/page/2/", biziday_page("b3"))
+
+    def chat(handler):
+        prompt = json.loads(handler.body)["messages"][0]["content"]
+        state.prompts.append(prompt)
+        return 200, {"Content-Type": "application/json"}, completion(state.answer(prompt))
+
+    local_server.routes["/chat/completions"] = chat
+    client = openai.OpenAI(api_key="test", base_url=local_server.url, max_retries=0)
+    monkeypatch.setattr(ai_client, "get_openai_client", lambda: client)
+    return state
+
+
+def titles(result) -> dict[str, list[str]]:
+    return {source: [a.title for a in items] for source, items in result.articles.items()}
+
+
+def test_scrapes_analyzes_and_keeps_page_order(sites):
+    result = NewsDigestPipeline(client=sites.client()).run()[DEFAULT_DIGEST]
+
+    assert titles(result) == {
+        "stiripesurse": ["Știre s1", "Știre s2", "Știre s3"],
+        "biziday": ["Biziday b1", "Biziday b2", "Biziday b3"],
+    }
+    (prompt,) = sites.prompts
+    assert format_news(result.articles) in prompt
+    assert "<p>Analiza zilei</p>" in result.html
+    assert "```" not in result.html
+    assert result.report is None
+    for path in ("/stiri/", "/biziday/", "/biziday/page/2/"):
+        assert sites.server.hits(path) == 1
+
+
+def test_failed_page_ends_that_source_only(sites):
+    sites.serve("/biziday/page/2/", b"busy", status=503)
+
+    result = NewsDigestPipeline(client=sites.client()).run()[DEFAULT_DIGEST]
+
+    assert titles(result)["biziday"] == ["Biziday b1", "Biziday b2"]
+    assert len(result.articles["stiripesurse"]) == 3
+    assert result.html is not None
+
+
+@pytest.mark.parametrize("outbox", [False, True])
+def test_delivers_to_every_recipient(sites, monkeypatch, outbox):
+    monkeypatch.setattr(settings.gmail, "outbox_enabled", outbox)
+    backend = RecordingBackend()
+    recipients = ["a@example.com", "b@example.com", "", "c@example.com"]
+
+    result = NewsDigestPipeline(
+        send_email=True, recipients=recipients, backend=backend, client=sites.client()
+    ).run()[DEFAULT_DIGEST]
+
+    assert result.report.sent == 3
+    assert sorted(recipient for recipient, _ in backend.deliveries) == [
+        "a@example.com",
+        "b@example.com",
+        "c@example.com",
+    ]
+    assert "Analiza zilei" in backend.html_sent_to("b@example.com")
+
+
+def test_failed_authentication_fails_every_delivery(sites):
+    backend = RecordingBackend(authenticated=False)
+
+    result = NewsDigestPipeline(
+        send_email=True, recipients=["a@example.com"], backend=backend, client=sites.client()
+    ).run()[DEFAULT_DIGEST]
+
+    assert backend.deliveries == []
+    assert [(r.recipient, r.ok, r.error) for r in result.report.results] == [
+        ("a@example.com", False, "authentication failed")
+    ]
+
+
+def test_packed_prompt_links_are_restored(sites, monkeypatch):
+    monkeypatch.setattr(settings.ai, "prompt_packing_enabled", True)
+    sites.answer = lambda prompt: '<html><body><a href="#a1">prima</a></body></html>'
+
+    result = NewsDigestPipeline(client=sites.client()).run()[DEFAULT_DIGEST]
+
+    (prompt,) = sites.prompts
+    assert "[a1] Știre s1" in prompt
+    assert "/stiri/s1.html" not in prompt
+    assert 'href="https://www.stiripesurse.ro/stiri/s1.html"' in result.html
+
+
+def test_every_stage_is_timed(sites):
+    run = metrics.start_run(MetricsConfig(report_path=None, prometheus_path=None))
+
+    NewsDigestPipeline(
+        send_email=True,
+        recipients=["a@example.com"],
+        backend=RecordingBackend(),
+        client=sites.client(),
+    ).run()
+
+    names = {record.name for record in run.spans}
+    assert {"fetch", "extract", "dedupe", "pack", "analyze", "render", "deliver"} <= names
+    assert run.counter("scrape_pages") == 3
+    assert run.counter("emails_sent", backend="test") == 1
+
+
+def test_unknown_source_fails_before_scraping(sites):
+    with pytest.raises(ValueError):
+        NewsDigestPipeline(digests=[DigestConfig("x", sources=["nosuchsite"])])
+
+    assert sites.server.requests == []
+
+
+# -- multi-digest runs -------------------------------------------------------
+
+
+def answer_by_prompt(prompt: str) -> str:
+    kind = "brief" if "rezumat scurt" in prompt else "analysis"
+    sources = "+".join(
+        name for name, marker in (("s", "Știre s1"), ("b", "Biziday b1")) if marker in prompt
+    )
+    return f"<html><body><p>{kind} {sources}</p></body></html>"
+
+
+def test_digests_with_the_same_sources_and_prompt_share_one_analysis(sites):
+    run = metrics.start_run(MetricsConfig(report_path=None, prometheus_path=None))
+    backend = RecordingBackend()
+    digests = [
+        DigestConfig("ro", recipients=["a@example.com"]),
+        DigestConfig("team", recipients=["b@example.com"], subject="Team digest"),
+    ]
+
+    results = NewsDigestPipeline(
+        send_email=True, backend=backend, client=sites.client(), digests=digests
+    ).run()
+
+    assert len(sites.prompts) == 1
+    assert run.counter("digest_analyses_shared") == 1
+    assert results["ro"].html == results["team"].html
+    assert results["ro"].articles == results["team"].articles
+    assert (results["ro"].report.sent, results["team"].report.sent) == (1, 1)
+    rendered = dict(backend.deliveries)["b@example.com"]
+    team = message_from_bytes(rendered.for_recipient("b@example.com"), policy=default)
+    assert team["Subject"] == "Team digest"
+
+
+def test_each_source_is_scraped_once_for_every_source_set(sites):
+    sites.answer = answer_by_prompt
+    digests = [
+        DigestConfig("all"),
+        DigestConfig("biziday-only", sources=["biziday"]),
+        DigestConfig("brief", sources=["biziday"], prompt="NEWS_BRIEF_PROMPT"),
+    ]
+
+    results = NewsDigestPipeline(client=sites.client(), digests=digests).run()
+
+    for path in ("/stiri/", "/biziday/", "/biziday/page/2/"):
+        assert sites.server.hits(path) == 1
+    assert len(sites.prompts) == 3
+    assert "<p>analysis s+b</p>" in results["all"].html
+    assert "<p>analysis b</p>" in results["biziday-only"].html
+    assert "<p>brief b</p>" in results["brief"].html
+    assert list(results["biziday-only"].articles) == ["biziday"]
+
+
+def test_recipient_of_identical_digests_is_mailed_once(sites):
+    backend = RecordingBackend()
+    digests = [
+        DigestConfig("first", recipients=["a@example.com", "b@example.com"]),
+        DigestConfig("second", recipients=["b@example.com", "c@example.com"]),
+    ]
+
+    NewsDigestPipeline(
+        send_email=True, backend=backend, client=sites.client(), digests=digests
+    ).run()
+
+    assert sorted(recipient for recipient, _ in backend.deliveries) == [
+        "a@example.com",
+        "b@example.com",
+        "c@example.com",
+    ]
+
+
+def test_unknown_prompt_template_fails_before_scraping(sites):
+    with pytest.raises(ValueError, match="NO_SUCH_PROMPT"):
+        NewsDigestPipeline(digests=[DigestConfig("x", prompt="NO_SUCH_PROMPT")])
+
+    with pytest.raises(ValueError):
+        NewsDigestPipeline(digests=[])
+
+    assert sites.server.requests == []
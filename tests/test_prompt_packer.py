@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import pytest
+
+from config import AIConfig
+from functions import prompt_packer
+from functions.article import Article
+from functions.prompt_packer import LINK_ID_NOTE, count_tokens, pack_articles, restore_links
+from functions.sources import SOURCE_HEADERS
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # The 4-characters-per-token estimate, whether or not tiktoken is installed.
+    monkeypatch.setattr(prompt_packer, "_get_encoding", lambda model: None)
+
+
+def article(title: str, source: str = "stiripesurse") -> Article:
+    slug = title.lower().replace(" ", "-")
+    return Article(title=title, link=f"https://{source}.ro/{slug}", source=source)
+
+
+def budget_for(results: dict[str, list[Article]], *picked: tuple[int, Article]) -> int:
+    """The budget that fits exactly ``picked`` (index in the flat list, article)."""
+    overhead = count_tokens(LINK_ID_NOTE) + sum(
+        count_tokens(SOURCE_HEADERS[source]) for source in results
+    )
+    return overhead + sum(
+        count_tokens(f"[a{index + 1}] {item.title}\n") for index, item in picked
+    )
+
+
+RESULTS = {
+    "stiripesurse": [
+        article("Parlamentul adoptă bugetul pe anul viitor după o dezbatere lungă"),
+        article("Ploi abundente și vânt puternic în vestul țării până duminică"),
+        article("Echipa națională câștigă meciul amical disputat la Cluj aseară"),
+    ],
+    "biziday": [
+        article("Banca centrală menține dobânda de politică monetară neschimbată", "biziday"),
+        article("Prețul energiei scade pentru consumatorii casnici din ianuarie", "biziday"),
+    ],
+}
+
+
+def test_everything_fits_a_large_budget():
+    packed = pack_articles(RESULTS, budget=100_000, config=AIConfig())
+
+    assert (packed.selected, packed.total) == (5, 5)
+    assert packed.links == {
+        f"a{i}": item.link
+        for i, item in enumerate(RESULTS["stiripesurse"] + RESULTS["biziday"], 1)
+    }
+    lines = packed.text.splitlines()
+    assert lines[0] == LINK_ID_NOTE
+    assert lines.index(SOURCE_HEADERS["stiripesurse"]) < lines.index(SOURCE_HEADERS["biziday"])
+    assert f"[a4] {RESULTS['biziday'][0].title}" in lines
+    assert "https://" not in packed.text
+    assert packed.tokens == count_tokens(packed.text)
+    assert packed.saved_tokens == packed.original_tokens - packed.tokens > 0
+
+
+def test_tight_budget_keeps_the_newest_of_each_source():
+    first, newest_biziday = RESULTS["stiripesurse"][0], RESULTS["biziday"][0]
+    budget = budget_for(RESULTS, (0, first), (3, newest_biziday))
+
+    packed = pack_articles(RESULTS, budget=budget, config=AIConfig())
+
+    assert packed.selected == 2
+    assert packed.links == {"a1": first.link, "a2": newest_biziday.link}
+    assert packed.tokens <= budget
+
+
+def test_source_weights_rank_sources():
+    biziday = RESULTS["biziday"]
+    budget = budget_for(RESULTS, (3, biziday[0]), (4, biziday[1]))
+    config = AIConfig(source_weights={"stiripesurse": 0.1, "biziday": 1.0})
+
+    packed = pack_articles(RESULTS, budget=budget, config=config)
+
+    assert list(packed.links.values()) == [item.link for item in biziday]
+    assert SOURCE_HEADERS["stiripesurse"] not in packed.text
+
+
+def test_near_duplicate_headlines_lose_priority():
+    items = [
+        article("Guvernul aprobă majorarea salariului minim de la anul"),
+        article("Guvernul aprobă majorarea salariului minim de anul viitor"),
+        article("Inundații în Moldova după ploile torențiale de ieri"),
+        article("Cutremur de magnitudine patru în zona Vrancea azi"),
+    ]
+    results = {"stiripesurse": items}
+    budget = budget_for(results, (0, items[0]), (2, items[2]))
+
+    packed = pack_articles(results, budget=budget, config=AIConfig(novelty_weight=0.5))
+    assert list(packed.links.values()) == [items[0].link, items[2].link]
+
+    # Without the novelty penalty, the duplicate ranks by recency alone.
+    budget = budget_for(results, (0, items[0]), (1, items[1]))
+    packed = pack_articles(results, budget=budget, config=AIConfig(novelty_weight=0.0))
+    assert list(packed.links.values()) == [items[0].link, items[1].link]
+
+
+def test_restore_links():
+    links = {"a1": "https://stiripesurse.ro/a?x=1&y=2", "a2": "https://biziday.ro/b"}
+    html = (
+        '<a href="#a1">one</a> <a href=\'#a2\'>two</a> '
+        '<a href="#a9">unknown</a> <a href="#top">anchor</a> <a href="https://x.ro">x</a>'
+    )
+
+    assert restore_links(html, links) == (
+        '<a href="https://stiripesurse.ro/a?x=1&y=2">one</a> '
+        "<a href='https://biziday.ro/b'>two</a> "
+        '<a href="#a9">unknown</a> <a href="#top">anchor</a> <a href="https://x.ro">x</a>'
+    )
+
+
+def test_packed_ids_round_trip_through_restore_links():
+    packed = pack_articles(RESULTS, budget=100_000, config=AIConfig())
+    html = "".join(f'<li><a href="#{short_id}">x</a></li>' for short_id in packed.links)
+
+    restored = restore_links(html, packed.links)
+
+    for item in RESULTS["stiripesurse"] + RESULTS["biziday"]:
+        assert f'href="{item.link}"' in restored
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import base64
+from email import message_from_bytes
+from email.policy import default
+
+import pytest
+
+from functions import email_service
+from functions.email_service import RenderedEmail, build_email_message
+
+FROM = "AI News <news@example.com>"
+BODY = "<html><body><h2>Știri</h2><p>Bună <a href='https://x.ro'>dimineața</a></p></body></html>"
+DATE = "Sat, 17 Oct 2026 07:00:00 +0300"
+
+
+@pytest.fixture(autouse=True)
+def fixed_date(monkeypatch):
+    monkeypatch.setattr(email_service, "formatdate", lambda localtime=False: DATE)
+
+
+def parse(raw: bytes):
+    return message_from_bytes(raw, policy=default)
+
+
+def test_stamped_message_has_every_header_once():
+    rendered = RenderedEmail("Știri de astăzi", BODY, FROM)
+
+    message = parse(rendered.for_recipient("reader@example.com", "k" * 40))
+
+    assert message["To"] == "reader@example.com"
+    assert message["From"] == FROM
+    assert message["Subject"] == "Știri de astăzi"
+    assert message["Message-ID"] == f"<{'k' * 32}@example.com>"
+    assert message["Date"] == DATE
+    for name in ("To", "From", "Subject", "Message-ID", "Date", "MIME-Version"):
+        assert len(message.get_all(name)) == 1
+    assert "Bună" in message.get_body(("html",)).get_content()
+    assert "Bună dimineața" in message.get_body(("plain",)).get_content()
+
+
+def test_matches_a_message_built_per_recipient():
+    rendered = RenderedEmail("Subject", BODY, FROM)
+    built = build_email_message("reader@example.com", "Subject", BODY, FROM)
+
+    stamped = parse(rendered.for_recipient("reader@example.com"))
+
+    assert [part.get_content() for part in stamped.iter_parts()] == [
+        part.get_payload(decode=True).decode("utf-8") for part in built.get_payload()
+    ]
+
+
+def test_only_the_header_block_differs_between_recipients():
+    rendered = RenderedEmail("Subject", BODY, FROM)
+
+    first = rendered.for_recipient("a@example.com")
+    second = rendered.for_recipient(["b@example.com", "c@example.com"])
+
+    assert first.endswith(rendered.payload) and second.endswith(rendered.payload)
+    assert parse(second)["To"] == "b@example.com, c@example.com"
+    assert parse(first)["Message-ID"] != parse(second)["Message-ID"]
+
+
+@pytest.mark.parametrize("local", ["a", "ab", "abc", "abcd", "abcde", "abcdef"])
+def test_header_block_is_padded_for_base64(local):
+    rendered = RenderedEmail("Subject", BODY, FROM)
+
+    headers, message_id = rendered.stamp(f"{local}@example.com")
+
+    assert len(headers) % 3 == 0
+    assert parse(headers + rendered.payload)["To"] == f"{local}@example.com"
+    assert message_id in headers.decode("ascii")
+
+
+def test_encode_for_is_the_base64url_message():
+    rendered = RenderedEmail("Subject", BODY, FROM)
+
+    encoded = rendered.encode_for("reader@example.com", "key")
+
+    assert base64.urlsafe_b64decode(encoded) == rendered.for_recipient(
+        "reader@example.com", "key"
+    )
+
+
+def test_non_ascii_display_name_is_encoded():
+    rendered = RenderedEmail("Subject", BODY, FROM)
+
+    headers, _ = rendered.stamp("Ioana Știrbu <ioana@example.com>")
+
+    assert headers.isascii()
+    assert parse(headers + rendered.payload)["To"] == "Ioana Știrbu <ioana@example.com>"
+
+
+def test_plain_body_has_no_html_part():
+    rendered = RenderedEmail("Subject", "Just text", FROM, is_html=False)
+
+    message = parse(rendered.for_recipient("reader@example.com"))
+
+    assert message.get_body(("html",)) is None
+    assert message.get_body(("plain",)).get_content().strip() == "Just text"
+
+
+def test_smtp_payload_uses_crlf():
+    rendered = RenderedEmail("Subject", BODY, FROM)
+
+    assert b"\r\n" in rendered.smtp_payload
+    assert b"\n" not in rendered.smtp_payload.replace(b"\r\n", b"")
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import smtplib
+import socket
+import time
+from email import message_from_bytes
+from email.policy import default
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from config import SmtpConfig
+from functions.email_service import SmtpSender
+
+# Idle connections are closed by the server after this long.
+IDLE_TIMEOUT = 0.3
+
+
+class Recorder(Sink):
+    """Keeps the envelope and parsed message of every delivery."""
+
+    def __init__(self) -> None:
+        self.received: list[tuple[list[str], object]] = []
+
+    async def handle_DATA(self, server, session, envelope) -> str:  # noqa: N802
+        message = message_from_bytes(envelope.original_content, policy=default)
+        self.received.append((list(envelope.rcpt_tos), message))
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    recorder = Recorder()
+    controller = Controller(
+        recorder, hostname="127.0.0.1", port=free_port(), timeout=IDLE_TIMEOUT
+    )
+    controller.start()
+    try:
+        yield controller, recorder
+    finally:
+        controller.stop()
+
+
+def make_sender(controller, **config) -> SmtpSender:
+    return SmtpSender(
+        from_email="news@example.com",
+        from_name="AI News",
+        config=SmtpConfig(
+            host=controller.hostname, port=controller.port, starttls=False, **config
+        ),
+    )
+
+
+def test_delivers_rendered_message(smtp_server):
+    controller, recorder = smtp_server
+    sender = make_sender(controller)
+
+    assert sender.send("reader@example.com", "Știri de astăzi", "<p>Bună dimineața</p>")
+    sender.close()
+
+    (envelope, message), = recorder.received
+    assert envelope == ["reader@example.com"]
+    assert message["To"] == "reader@example.com"
+    assert message["Subject"] == "Știri de astăzi"
+    assert message["From"] == "AI News <news@example.com>"
+    assert message["Message-ID"].endswith("@example.com>")
+    assert message["Date"].datetime.timestamp() == pytest.approx(time.time(), abs=60)
+    html = message.get_body(("html",)).get_content()
+    plain = message.get_body(("plain",)).get_content()
+    assert "Bună dimineața" in html
+    assert "Bună dimineața" in plain
+
+
+def test_list_of_recipients_is_one_message(smtp_server):
+    controller, recorder = smtp_server
+    sender = make_sender(controller)
+
+    assert sender.send(["a@example.com", "b@example.com"], "Subject", "<p>x</p>")
+    sender.close()
+
+    (envelope, message), = recorder.received
+    assert envelope == ["a@example.com", "b@example.com"]
+    assert message["To"] == "a@example.com, b@example.com"
+
+
+def test_reuses_connection_between_sends(smtp_server):
+    controller, recorder = smtp_server
+    sender = make_sender(controller)
+
+    report = sender.send_bulk([f"r{i}@example.com" for i in range(5)], "S", "<p>x</p>", max_workers=1)
+    sender.close()
+
+    assert report.sent == 5
+    assert sender.connections_opened == 1
+    assert len(recorder.received) == 5
+
+
+def test_retries_on_new_connection_after_server_drops_idle_ones(smtp_server):
+    controller, recorder = smtp_server
+    sender = make_sender(controller)
+    assert sender.authenticate()
+    # A second pooled connection: the retry must not pick another stale one.
+    sender._idle.put(sender._connect())
+    time.sleep(IDLE_TIMEOUT * 3)
+
+    report = sender.send_bulk(["reader@example.com"], "Subject", "<p>x</p>")
+    sender.close()
+
+    assert report.sent == 1
+    assert report.results[0].attempts == 2
+    assert sender.connections_opened == 3
+    assert [envelope for envelope, _ in recorder.received] == [["reader@example.com"]]
+
+
+def test_idle_connections_are_capped_at_pool_size(smtp_server):
+    controller, recorder = smtp_server
+    sender = make_sender(controller, pool_size=2)
+    recipients = [f"r{i}@example.com" for i in range(12)]
+
+    report = sender.send_bulk(recipients, "S", "<p>x</p>", max_workers=6)
+
+    assert report.sent == 12
+    assert sender._idle.qsize() <= 2
+    sender.close()
+
+
+def test_failed_login_closes_the_connection(smtp_server, monkeypatch):
+    controller, recorder = smtp_server
+    sender = make_sender(controller, username="user", password="secret")
+    closed = []
+    original_close = smtplib.SMTP.close
+    monkeypatch.setattr(
+        smtplib.SMTP, "close", lambda self: closed.append(self) or original_close(self)
+    )
+
+    # The test server offers no AUTH, so login() fails after connecting.
+    with pytest.raises(smtplib.SMTPException):
+        sender._connect()
+
+    assert len(closed) == 1
+    assert closed[0].sock is None
+    assert sender.connections_opened == 0
@@ -0,0 +1,141 @@
+"""
+Registry extraction against reference copies of the per-site scrapers it
+replaced (``extract_stiripesurse`` and ``extract_from_soup``).
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from config import settings
+from functions.html_parser import parse_html
+from functions.sources import get_source
+
+FIXTURES = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+
+STIRIPESURSE_EDGE_CASES = """
+<html><body>
+<article><h2>Absolute link</h2><a href="https://www.stiripesurse.ro/a.html">a</a></article>
+<article><h3>Relative link</h3><a href="/b.html">b</a></article>
+<article><h2>Empty href</h2><a href="">c</a></article>
+<article><h2>No link at all</h2></article>
+<article><h2></h2><a href="/untitled.html">untitled</a></article>
+<article><a href="/only-a.html">Title in the link</a></article>
+<article><p>No title element</p></article>
+</body></html>
+"""
+
+BIZIDAY_EDGE_CASES = """
+<html><body>
+<ul class="menu"><li><a href="/menu">Menu item</a></li></ul>
+<h2>Știri verificate</h2>
+<ul>
+<li><a href="/x">Item with link Biziday · 2026-10-17 07:00</a></li>
+<li>Item without a link</li>
+<li><a href="https://www.biziday.ro/y">Absolute</a></li>
+<li><a href="/x">Item with link Biziday · 2026-10-17 07:00</a></li>
+<li></li>
+</ul>
+</body></html>
+"""
+
+
+def baseline_stiripesurse(soup) -> list[tuple[str, str]]:
+    """``extract_stiripesurse`` before the registry (reference copy)."""
+    articles = []
+    for article in soup.find_all("article")[: settings.news.max_articles]:
+        title_elem = article.find(["h2", "h3", "a"])
+        link_elem = article.find("a", href=True)
+        if title_elem and link_elem:
+            title = title_elem.get_text(strip=True)
+            link = link_elem.get("href", "")
+            if not link.startswith("http"):
+                link = "https://www.stiripesurse.ro" + link
+            articles.append((title, link))
+    return articles
+
+
+def baseline_biziday(soup, articles: list, seen_keys: set) -> None:
+    """``extract_from_soup`` before the registry (reference copy)."""
+    base_url = settings.news.biziday_url.rstrip("/")
+    verified_header = None
+    for tag in soup.find_all(["h1", "h2", "h3", "strong"]):
+        if "Știri verificate" in tag.get_text(strip=True):
+            verified_header = tag
+            break
+    candidate_lis: list = []
+    if verified_header:
+        next_container = verified_header.find_next(["ul", "div", "section"])
+        if next_container:
+            candidate_lis = next_container.find_all("li", recursive=True)
+    if not candidate_lis:
+        candidate_lis = soup.find_all("li")
+    for li in candidate_lis:
+        parent_id = li.parent.get("id", "") if li.parent else ""
+        parent_class = " ".join(li.parent.get("class", [])) if li.parent else ""
+        if any(
+            key in (parent_id + parent_class).lower()
+            for key in ["menu", "cookie", "footer", "privacy"]
+        ):
+            continue
+        text = li.get_text(" ", strip=True)
+        if not text:
+            continue
+        cleaned_text = re.sub(r"Biziday\s*·\s*\d{4}-\d{2}-\d{2}.*$", "", text).strip() or text
+        link_tag = li.find("a", href=True)
+        link = link_tag["href"].strip() if link_tag else base_url
+        if link and not link.startswith("http"):
+            link = base_url + "/" + link.lstrip("/")
+        key = (cleaned_text, link)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        articles.append(key)
+        if len(articles) >= settings.news.max_articles:
+            return
+
+
+def pairs(articles) -> list[tuple[str, str]]:
+    return [(article.title, article.link) for article in articles]
+
+
+@pytest.mark.parametrize(
+    "html",
+    [(FIXTURES / "stiripesurse.html").read_bytes(), STIRIPESURSE_EDGE_CASES],
+    ids=["fixture", "edge-cases"],
+)
+def test_stiripesurse_matches_baseline(html):
+    soup = parse_html(html)
+
+    assert pairs(get_source("stiripesurse").extract(soup)) == baseline_stiripesurse(soup)
+
+
+def test_stiripesurse_empty_href_links_to_the_site():
+    articles = get_source("stiripesurse").extract(parse_html(STIRIPESURSE_EDGE_CASES))
+
+    assert ("Empty href", "https://www.stiripesurse.ro") in pairs(articles)
+    assert "No link at all" not in [article.title for article in articles]
+
+
+@pytest.mark.parametrize(
+    "pages",
+    [
+        [(FIXTURES / name).read_bytes() for name in ("biziday_page1.html", "biziday_page2.html")],
+        [BIZIDAY_EDGE_CASES, BIZIDAY_EDGE_CASES],
+    ],
+    ids=["fixture", "edge-cases"],
+)
+def test_biziday_matches_baseline(pages):
+    registry, registry_keys = [], set()
+    baseline, baseline_keys = [], set()
+    for html in pages:
+        soup = parse_html(html)
+        get_source("biziday").extract(soup, registry, registry_keys)
+        baseline_biziday(soup, baseline, baseline_keys)
+
+    assert pairs(registry) == baseline